@@ -1,69 +1,48 @@
 # final_app.py - LOCAL DATABASE WITH IMMEDIATE APPEND
 import streamlit as st
 import pandas as pd
-import yfinance as yf
+import os
 from datetime import datetime, timedelta
-import numpy as np
 import time
+import uuid
+from data_paths import get_data_dir
+from scan_results_store import ScanResultsStore
+from scan_cache import ScanResultCache
+from scan_jobs import ScanJobManager, JOB_CANCELLED, JOB_FAILED
+from lazy_modules import LazyModuleRegistry
 
 # Import the local tracking system
 try:
     from local_recommendations_tracker import LocalRecommendationsTracker
     TRACKING_AVAILABLE = True
-    # Initialize tracker immediately
-    if 'tracker' not in st.session_state:
-        st.session_state.tracker = LocalRecommendationsTracker()
-        st.success(f"✅ Local database ready at: {st.session_state.tracker.db_path}")
 except ImportError:
     TRACKING_AVAILABLE = False
     st.error("❌ Local tracking system not available. Please ensure local_recommendations_tracker.py is in the same directory.")
 
-# Safe import handling for stock logic
-@st.cache_data
-def safe_import_modules():
-    """Safely import custom modules with fallback options"""
-    modules = {}
-    
-    try:
-        from indian_stock_logic import get_indian_recommendations, get_indian_market_overview
-        modules['indian_stock'] = True
-        modules['get_indian_recommendations'] = get_indian_recommendations
-        modules['get_indian_market_overview'] = get_indian_market_overview
-        st.success("✅ Indian stock logic imported successfully")
-    except Exception as e:
-        modules['indian_stock'] = False
-        st.error(f"❌ Indian stock logic import failed: {e}")
-    
-    try:
-        from us_stock_logic import get_us_recommendations, get_us_market_overview
-        modules['us_stock'] = True
-        modules['get_us_recommendations'] = get_us_recommendations
-        modules['get_us_market_overview'] = get_us_market_overview
-        st.success("✅ US stock logic imported successfully")
-    except Exception as e:
-        modules['us_stock'] = False
-        st.error(f"❌ US stock logic import failed: {e}")
-    
-    try:
-        from fixed_fno_options_logic import generate_fno_opportunities, get_options_summary
-        modules['fno'] = True
-        modules['generate_fno_opportunities'] = generate_fno_opportunities
-        modules['get_options_summary'] = get_options_summary
-        st.success("✅ F&O options logic imported successfully")
-    except Exception as e:
-        modules['fno'] = False
-        st.error(f"❌ F&O options logic import failed: {e}")
-    
-    try:
-        from news_logic import get_latest_news
-        modules['news'] = True
-        modules['get_latest_news'] = get_latest_news
-        st.success("✅ News logic imported successfully")
-    except Exception as e:
-        modules['news'] = False
-        st.error(f"❌ News logic import failed: {e}")
-    
-    return modules
+@st.cache_resource
+def get_tracker():
+    """One tracker per server process instead of one per browser session"""
+    return LocalRecommendationsTracker()
+
+if TRACKING_AVAILABLE and 'tracker' not in st.session_state:
+    st.session_state.tracker = get_tracker()
+    st.success(f"✅ Local database ready at: {st.session_state.tracker.db_path}")
+
+# Tab modules and their helpers (news archive, keyword classifier, strategy search)
+# are imported on first use, not at startup.
+# Budgets are for a cold container; yfinance/feedparser dominate.
+@st.cache_resource
+def get_module_registry():
+    """Lazy-loading registry for the tab logic modules"""
+    registry = LazyModuleRegistry()
+    registry.register('indian_stock', 'indian_stock_logic', budget_ms=1500)
+    registry.register('us_stock', 'us_stock_logic', budget_ms=1500)
+    registry.register('fno', 'fixed_fno_options_logic', budget_ms=1500)
+    registry.register('news', 'news_logic', budget_ms=800)
+    registry.register('news_archive', 'news_archive', budget_ms=500)
+    registry.register('news_keywords', 'news_keywords', budget_ms=100)
+    registry.register('option_strategies', 'option_strategies', budget_ms=300)
+    return registry
 
 # Page configuration
 st.set_page_config(
@@ -99,25 +78,189 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state for recommendations
-if 'indian_recos' not in st.session_state:
-    st.session_state.indian_recos = pd.DataFrame()
-if 'us_recos' not in st.session_state:
-    st.session_state.us_recos = pd.DataFrame()
-if 'fno_recos' not in st.session_state:
-    st.session_state.fno_recos = pd.DataFrame()
+# Precomputed scan results (written by scan_daemon.py and by every dashboard scan)
+@st.cache_resource
+def get_scan_store():
+    """Shared scan results store"""
+    return ScanResultsStore()
+
+# One cache per server process: every browser tab and teammate shares scan results
+@st.cache_resource
+def get_scan_cache():
+    """Process-wide scan result cache (15 min TTL, LRU); concurrent identical scans are joined by the job manager"""
+    return ScanResultCache(max_entries=32, ttl_seconds=900)
+
+SCAN_REGISTRY_NAMES = {'indian': 'indian_stock', 'us': 'us_stock', 'fno': 'fno'}
+
+# Scans run as background jobs; sessions poll them instead of running the loop inline
+@st.cache_resource
+def get_job_manager():
+    """Process-wide scan job manager (shares the scan store and result cache)"""
+    return ScanJobManager(max_workers=2, store=get_scan_store(), cache=get_scan_cache())
+
+def get_session_owner():
+    """Stable id for this browser session, used as the job owner"""
+    if 'session_owner' not in st.session_state:
+        st.session_state.session_owner = uuid.uuid4().hex
+    return st.session_state.session_owner
+
+def submit_scan_job(scan_type, params=None):
+    """Start (or join) a background scan and release this session's previous one"""
+    # Import through the registry so the import cost shows up in the budget report
+    get_module_registry().load(SCAN_REGISTRY_NAMES[scan_type])
+    
+    manager = get_job_manager()
+    previous_job_id = st.session_state.get(f'{scan_type}_job_id')
+    job_id = manager.submit(scan_type, params, owner=get_session_owner())
+    if previous_job_id and previous_job_id != job_id:
+        manager.cancel(previous_job_id, owner=get_session_owner())
+    st.session_state[f'{scan_type}_job_id'] = job_id
+
+LIVE_TABLE_COLUMNS = ['Stock', 'LTP', 'Target', '% Gain', 'Tech Score', 'Primary Pattern', 'Risk']
+
+@st.fragment(run_every="1s")
+def render_scan_job(scan_type):
+    """Progress, live top-N table and cancel button for this session's running scan"""
+    job_id = st.session_state.get(f'{scan_type}_job_id')
+    job = get_job_manager().poll(job_id) if job_id else None
+    if job is None:
+        return
+    
+    if job['finished']:
+        # Hand the outcome to the tab and redraw the page once
+        st.session_state[f'{scan_type}_job_id'] = None
+        st.session_state[f'{scan_type}_job_outcome'] = job
+        st.rerun()
+    
+    st.progress(job['progress'], text=job['message'])
+    if st.button("⏹️ Cancel Scan", key=f"cancel_{scan_type}_job"):
+        get_job_manager().cancel(job_id, owner=get_session_owner())
+        st.session_state[f'{scan_type}_job_id'] = None
+        st.session_state[f'{scan_type}_job_outcome'] = dict(job, status=JOB_CANCELLED, message="⏹️ Scan cancelled")
+        st.rerun()
+    
+    partial_df = job['partial_results']
+    if partial_df is not None and not partial_df.empty:
+        columns = [col for col in LIVE_TABLE_COLUMNS if col in partial_df.columns]
+        st.caption(f"📡 Live top {len(partial_df)} so far - table updates as batches complete")
+        st.dataframe(partial_df[columns], use_container_width=True, hide_index=True)
+
+def take_scan_outcome(scan_type):
+    """Move a finished job into the session; returns the job snapshot if it completed"""
+    job = st.session_state.pop(f'{scan_type}_job_outcome', None)
+    if job is None:
+        return None
+    
+    if job['status'] == JOB_FAILED:
+        st.error(f"Error during scan: {job['error']}")
+        return None
+    if job['status'] == JOB_CANCELLED:
+        st.warning(job['message'])
+        return None
+    
+    st.session_state[f'{scan_type}_recos'] = job['results'].copy()
+    st.session_state[f'{scan_type}_scan_info'] = {
+        'scan_id': job['scan_id'],
+        'completed_at': job['finished_at'],
+        'source': 'dashboard'
+    }
+    if job['message']:
+        st.info(job['message'])
+    return job
+
+def show_scan_info(scan_info):
+    """Caption describing where the displayed result set came from"""
+    if scan_info:
+        origin = "precomputed by scan daemon" if scan_info.get('source') == 'daemon' else "dashboard scan"
+        st.caption(f"🕒 Scan {scan_info['scan_id']} • completed {scan_info['completed_at']} • {origin}")
+
+# Export payloads are serialized only when a copy box is opened or a download is
+# clicked, and cached per result-set version (scan id / DB version + filters)
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_export_payload(version, export_format, _df):
+    """Serialized copy/download text for one result-set version (_df is not hashed)"""
+    if export_format == 'text':
+        return _df.to_string(index=False, max_cols=None, max_rows=None)
+    if export_format == 'tsv':
+        return _df.to_csv(index=False, sep='\t')
+    return _df.to_csv(index=False)
+
+def scan_result_version(scan_type):
+    """Version of the result set currently shown for a scan type"""
+    scan_info = st.session_state.get(f'{scan_type}_scan_info') or {}
+    recos = st.session_state[f'{scan_type}_recos']
+    return scan_info.get('scan_id') or f"{scan_type}-{scan_info.get('completed_at')}-{len(recos)}"
+
+def render_copy_boxes(scan_type):
+    """Copy/paste text areas, built only while the toggle is on"""
+    if not st.toggle("📋 Show copy/paste text", key=f"copy_{scan_type}_toggle"):
+        return
+    
+    recos = st.session_state[f'{scan_type}_recos']
+    version = scan_result_version(scan_type)
+    col1, col2 = st.columns(2)
+    with col1:
+        copy_text = build_export_payload(version, 'text', recos)
+        st.text_area("📋 Copy Exact Format (Select All + Ctrl+C):", copy_text, height=150, key=f"copy_{scan_type}_exact")
+    
+    with col2:
+        copy_tsv = build_export_payload(version, 'tsv', recos)
+        st.text_area("📋 Copy for Excel (Tab-separated):", copy_tsv, height=150, key=f"copy_{scan_type}_excel")
+
+SHARED_SCAN_HELP = ("Runs in the background - you can cancel it or change the settings and rescan. "
+                    "Results of an identical scan run by any session in the current 15-minute market-data window are reused")
+
+# Initialize session state for recommendations - load the latest precomputed scans instantly
+for scan_type, recos_key in [('indian', 'indian_recos'), ('us', 'us_recos'), ('fno', 'fno_recos')]:
+    if recos_key not in st.session_state:
+        try:
+            scan_info, latest_df = get_scan_store().load_latest(scan_type)
+        except Exception:
+            scan_info, latest_df = None, pd.DataFrame()
+        st.session_state[recos_key] = latest_df
+        st.session_state[f'{scan_type}_scan_info'] = scan_info
 if 'news_data' not in st.session_state:
     st.session_state.news_data = []
+if 'fno_strategies' not in st.session_state:
+    st.session_state.fno_strategies = pd.DataFrame()
 
 # Main title
 st.markdown('<h1 class="main-header">📈 Kamal\'s Local Auto-Append Trading Dashboard</h1>', unsafe_allow_html=True)
 
-# Import modules
-modules = safe_import_modules()
+# Lazy module registry (nothing is imported yet)
+modules = get_module_registry()
+
+# Database reads are cached on the DB file's modification time, so any write
+# (dashboard, scan daemon, price monitor) invalidates them and nothing else does
+def get_db_mtime():
+    """Modification time of the tracker database (cache key for DB reads)"""
+    try:
+        return os.path.getmtime(get_tracker().db_path)
+    except OSError:
+        return 0.0
+
+@st.cache_data(show_spinner=False)
+def cached_database_info(db_mtime):
+    """Tracker database info for a given DB version"""
+    return get_tracker().get_database_info()
 
+@st.cache_data(show_spinner=False)
+def cached_performance_summary(db_mtime):
+    """Tracker performance summary for a given DB version"""
+    return get_tracker().get_performance_summary()
+
+@st.cache_data(show_spinner=False)
+def cached_recommendations(db_mtime, status_filter, market_filter):
+    """Filtered tracker rows for a given DB version"""
+    return get_tracker().get_all_recommendations(status_filter, market_filter)
+
+# Each section below is a fragment: its buttons rerun only that section.
+# Writes change the DB mtime, so the rows read further down a fragment are already fresh.
 # Database Information
-if TRACKING_AVAILABLE:
-    db_info = st.session_state.tracker.get_database_info()
+@st.fragment
+def render_db_panel():
+    """Database status panel and tracker actions"""
+    db_info = cached_database_info(get_db_mtime())
     st.markdown(f"""
     <div class="db-info">
     <strong>💾 Local Database Status</strong><br>
@@ -139,7 +282,7 @@ if TRACKING_AVAILABLE:
     
     with col2:
         if st.button("📊 View Performance Summary"):
-            summary = st.session_state.tracker.get_performance_summary()
+            summary = cached_performance_summary(get_db_mtime())
             
             col_a, col_b, col_c, col_d = st.columns(4)
             with col_a:
@@ -179,23 +322,101 @@ if TRACKING_AVAILABLE:
             filename = st.session_state.tracker.export_to_csv()
             st.success(f"✅ Exported to: {filename}")
 
+if TRACKING_AVAILABLE:
+    render_db_panel()
+
 # Create tabs
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["📰 Market News", "🇮🇳 Indian Stocks", "🇺🇸 US Stocks", "📊 F&O Options", "📋 Database View"])
 
+# News is read from the local archive; the ingester appends new items every 5 minutes
+NEWS_TIME_RANGES = {
+    'Last 6 hours': 6, 'Last 24 hours': 24, 'Last 48 hours': 48,
+    'Last 7 days': 168, 'Last 30 days': 720, 'All time': None
+}
+NEWS_IMPACTS = ['High', 'Medium', 'Low']
+
+def news_categories():
+    """Category filter options: the classifier's categories plus its catch-all"""
+    return [category for category, _ in modules.get('news_keywords', 'CATEGORY_KEYWORDS')] + ['General Business']
+
+@st.cache_resource
+def get_news_archive():
+    """Shared news archive"""
+    return modules.get('news_archive', 'NewsArchive')()
+
+@st.cache_resource
+def get_news_ingester():
+    """Process-wide news ingester (started once, fetches in the background)"""
+    ingester = modules.get('news_archive', 'NewsIngester')(get_news_archive(), interval_seconds=300)
+    ingester.start()
+    return ingester
+
+def get_news_archive_mtime():
+    """Modification time of the news archive (cache key for archive reads)"""
+    try:
+        return os.path.getmtime(get_news_archive().db_path)
+    except OSError:
+        return 0.0
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_news_query(archive_mtime, hours, sources, categories, impacts, keywords, limit):
+    """Filtered archive news for a given archive version"""
+    start = time.time() - hours * 3600 if hours else None
+    return get_news_archive().query_news(
+        start=start, sources=sources, categories=categories, impacts=impacts, keywords=keywords, limit=limit
+    )
+
+@st.cache_data(show_spinner=False)
+def cached_news_sources(archive_mtime):
+    """Sources present in the archive for a given archive version"""
+    return get_news_archive().get_sources()
+
+@st.cache_data(show_spinner=False)
+def cached_news_sentiment(archive_mtime, window_hours=48):
+    """Current sentiment and its hourly rolling series for a given archive version"""
+    archive = get_news_archive()
+    series = pd.DataFrame(archive.get_sentiment_series(window_hours, step_hours=1, points=48))
+    series = series.set_index('window_end')[['high_ratio', 'medium_ratio']].rename(
+        columns={'high_ratio': 'High impact share', 'medium_ratio': 'Medium impact share'}
+    )
+    return archive.get_sentiment(window_hours), series
+
+# Scan tables show each symbol's recent archived news (tickers are tagged at ingest)
+SYMBOL_NEWS_HOURS = 168
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_symbol_news(archive_mtime, market, symbols):
+    """Per-symbol news count and impact for a given archive version"""
+    return get_news_archive().get_symbol_news_stats(market, symbols, SYMBOL_NEWS_HOURS)
+
+def with_news_columns(df, market):
+    """Scan results with News (7d) and News Impact columns"""
+    if df.empty or 'Stock' not in df.columns:
+        return df
+    stats = cached_symbol_news(get_news_archive_mtime(), market, tuple(df['Stock']))
+    df = df.copy()
+    df['News (7d)'] = df['Stock'].map(lambda symbol: stats.get(symbol, {}).get('count', 0))
+    df['News Impact'] = df['Stock'].map(lambda symbol: stats.get(symbol, {}).get('impact', '-'))
+    return df
+
 # Tab 1: Market News (MINIMAL FIXES FOR LINKS ONLY)
-with tab1:
+@st.fragment
+def render_news_tab():
+    """News tab; Refresh News and the filters rerun only this tab"""
     st.subheader("📰 Latest Market News & Analysis")
+
+    news_available = modules.is_available('news')
+    if news_available:
+        ingester = get_news_ingester()
     
     if st.button("🔄 Refresh News", type="primary"):
-        if modules.get('news'):
-            try:
-                st.session_state.news_data = modules['get_latest_news']()
-                if st.session_state.news_data:
-                    st.success(f"✅ Loaded {len(st.session_state.news_data)} latest news items")
-                else:
-                    st.warning("No news data available")
-            except Exception as e:
-                st.error(f"Error loading news: {e}")
+        if news_available:
+            with st.spinner("Fetching news from all sources..."):
+                added = ingester.run_once()
+            if ingester.last_error:
+                st.error(f"Error loading news: {ingester.last_error}")
+            else:
+                st.success(f"✅ Archived {added} new news items")
         else:
             # Sample news when module is not available
             st.session_state.news_data = [
@@ -211,9 +432,51 @@ with tab1:
                 }
             ]
             st.info("Using sample news data (news module not available)")
+
+    if news_available:
+        archive_mtime = get_news_archive_mtime()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            time_range = st.selectbox("Time range", list(NEWS_TIME_RANGES), index=2, key="news_time_range")
+        with col2:
+            impacts = st.multiselect("Impact", NEWS_IMPACTS, key="news_impacts")
+        with col3:
+            categories = st.multiselect("Category", news_categories(), key="news_categories")
+        col4, col5 = st.columns([1, 2])
+        with col4:
+            sources = st.multiselect("Source", cached_news_sources(archive_mtime), key="news_sources")
+        with col5:
+            keywords = st.text_input("Search headlines and summaries", key="news_keywords",
+                                     placeholder="e.g. repo rate")
+
+        news_data = cached_news_query(
+            archive_mtime, NEWS_TIME_RANGES[time_range], tuple(sources), tuple(categories),
+            tuple(impacts), keywords.strip(), 200
+        )
+        sentiment, sentiment_series = cached_news_sentiment(archive_mtime)
+        with st.expander(f"🌡️ News Sentiment (48h): {sentiment['sentiment']}"):
+            col_a, col_b, col_c = st.columns(3)
+            col_a.metric("News Items", sentiment['total_news'])
+            col_b.metric("High Impact", sentiment['high_impact_news'], f"{sentiment['high_ratio']:.0%}", delta_color="off")
+            col_c.metric("Medium Impact", sentiment['medium_impact_news'], f"{sentiment['medium_ratio']:.0%}", delta_color="off")
+            st.line_chart(sentiment_series)
+
+        status = ingester.get_status()
+        if status['last_run']:
+            st.caption(f"🗄️ Archive updated {status['last_run']} (+{status['last_added']} items) • next fetch {status['next_run'] or '-'}")
+    else:
+        news_data = st.session_state.news_data
     
-    if st.session_state.news_data:
-        for news in st.session_state.news_data:
+    if news_data:
+        news_count = len(news_data)
+        show_count = st.select_slider(
+            "Items to show", options=[25, 50, 100, 200], value=50, key="news_show_count"
+        ) if news_count > 25 else news_count
+        
+        for news in news_data[:show_count]:
+            also_reported = news.get('also_reported_by') or []
+            also_note = f" (+ {', '.join(also_reported)})" if also_reported else ""
+            tickers_note = f" | 🏷️ {news['tickers']}" if news.get('tickers') else ""
             with st.container():
                 st.markdown(f"""
                 <div class="news-item">
@@ -223,7 +486,7 @@ with tab1:
                 🎯 <strong>{news.get('market_impact', 'Low')}</strong> Impact | 
                 🕒 {news.get('time', 'Unknown')} IST | 
                 📅 {news.get('date', 'Unknown')} |
-                📰 {news.get('source', 'Unknown')}</small><br>
+                📰 {news.get('source', 'Unknown')}{also_note}{tickers_note}</small><br>
                 """, unsafe_allow_html=True)
                 
                 # MINIMAL FIX: Add clickable link
@@ -234,11 +497,18 @@ with tab1:
                     st.markdown("🔗 Link unavailable")
                 
                 st.markdown("</div>", unsafe_allow_html=True)
+    elif news_available:
+        st.info("No archived news matches these filters yet. Click 'Refresh News' to fetch the latest market updates!")
     else:
         st.info("Click 'Refresh News' to load the latest market updates!")
 
+with tab1:
+    render_news_tab()
+
 # Tab 2: Indian Stocks
-with tab2:
+@st.fragment
+def render_indian_tab():
+    """Indian scan tab"""
     st.subheader("🇮🇳 Indian Stock Recommendations - Auto-Append to Database")
     
     col1, col2, col3 = st.columns(3)
@@ -249,52 +519,112 @@ with tab2:
     with col3:
         batch_size_in = st.number_input("Stocks to Scan", value=200, min_value=50, max_value=500, key="in_batch")
     
-    if st.button("🔍 Scan Indian Stocks", type="primary"):
-        with st.spinner("Scanning Indian stocks..."):
-            try:
-                if modules.get('indian_stock'):
-                    st.session_state.indian_recos = modules['get_indian_recommendations'](
-                        min_price_in, max_rsi_in, min_volume=50000, batch_size=batch_size_in
+    if st.button("🔍 Scan Indian Stocks", type="primary", help=SHARED_SCAN_HELP):
+        if modules.is_available('indian_stock'):
+            submit_scan_job('indian', {'min_price': min_price_in, 'max_rsi': max_rsi_in, 'min_volume': 50000, 'batch_size': batch_size_in})
+        else:
+            st.error("Indian stock module not available")
+    
+    job = take_scan_outcome('indian')
+    if job is not None:
+        try:
+            if not st.session_state.indian_recos.empty:
+                st.success(f"🎯 Found {len(st.session_state.indian_recos)} Indian stock opportunities!")
+            
+                # IMMEDIATE AUTO-APPEND TO DATABASE (the session that started the scan appends it)
+                if TRACKING_AVAILABLE and not job['from_cache'] and job['submitted_by'] == get_session_owner():
+                    added_count = st.session_state.tracker.add_recommendations(
+                        st.session_state.indian_recos, "Indian"
                     )
-                    
-                    if not st.session_state.indian_recos.empty:
-                        st.success(f"🎯 Found {len(st.session_state.indian_recos)} Indian stock opportunities!")
-                        
-                        # IMMEDIATE AUTO-APPEND TO DATABASE
-                        if TRACKING_AVAILABLE:
-                            added_count = st.session_state.tracker.add_recommendations(
-                                st.session_state.indian_recos, "Indian"
-                            )
-                            st.markdown(f"""
-                            <div class="db-info">
-                            <strong>💾 AUTO-APPENDED TO DATABASE!</strong><br>
-                            ✅ Added {added_count} new Indian stocks to local database<br>
-                            📁 Location: C:\\Users\\kamal\\Downloads\\DASHBOARD FILES\\recommendations_tracker.db<br>
-                            🔄 Previous data preserved, new data appended
-                            </div>
-                            """, unsafe_allow_html=True)
-                    else:
-                        st.warning("No stocks found. Try relaxing the criteria.")
-                else:
-                    st.error("Indian stock module not available")
-            except Exception as e:
-                st.error(f"Error during scan: {e}")
+                    st.markdown(f"""
+                    <div class="db-info">
+                    <strong>💾 AUTO-APPENDED TO DATABASE!</strong><br>
+                    ✅ Added {added_count} new Indian stocks to local database<br>
+                    📁 Location: {st.session_state.tracker.db_path}<br>
+                    🔄 Previous data preserved, new data appended
+                    </div>
+                    """, unsafe_allow_html=True)
+            else:
+                st.warning("No stocks found. Try relaxing the criteria.")
+        except Exception as e:
+            st.error(f"Error saving scan results: {e}")
+    
+    render_scan_job('indian')
     
     if not st.session_state.indian_recos.empty:
         st.markdown(f"**📊 Latest Scan Results: {len(st.session_state.indian_recos)} opportunities**")
+        show_scan_info(st.session_state.indian_scan_info)
         
         # Copy functionality
-        col1, col2 = st.columns(2)
-        with col1:
-            copy_text = st.session_state.us_recos.to_string(index=False, max_cols=None, max_rows=None)
-            st.text_area("📋 Copy Exact Format (Select All + Ctrl+C):", copy_text, height=150, key="copy_us_exact")
+        render_copy_boxes('indian')
         
-        with col2:
-            copy_tsv = st.session_state.us_recos.to_csv(index=False, sep='\t')
-            st.text_area("📋 Copy for Excel (Tab-separated):", copy_tsv, height=150, key="copy_us_excel")
+        st.dataframe(
+            with_news_columns(st.session_state.indian_recos, "Indian"), 
+            use_container_width=True, 
+            height=400,
+            column_config={
+                "Selection Reason": st.column_config.TextColumn(width="large")
+            }
+        )
+
+with tab2:
+    render_indian_tab()
+
+# Tab 3: US Stocks
+@st.fragment
+def render_us_tab():
+    """US scan tab"""
+    st.subheader("🇺🇸 US Stock Recommendations - Auto-Append to Database")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        min_price_us = st.number_input("Min Price ($)", value=25, min_value=1, key="us_price")
+    with col2:
+        max_rsi_us = st.number_input("Max RSI", value=65, min_value=1, max_value=100, key="us_rsi")
+    with col3:
+        batch_size_us = st.number_input("Stocks to Scan", value=200, min_value=50, max_value=500, key="us_batch")
+    
+    if st.button("🔍 Scan US Stocks", type="primary", help=SHARED_SCAN_HELP):
+        if modules.is_available('us_stock'):
+            submit_scan_job('us', {'min_price': min_price_us, 'max_rsi': max_rsi_us, 'min_volume': 500000, 'batch_size': batch_size_us})
+        else:
+            st.error("US stock module not available")
+    
+    job = take_scan_outcome('us')
+    if job is not None:
+        try:
+            if not st.session_state.us_recos.empty:
+                st.success(f"🎯 Found {len(st.session_state.us_recos)} US stock opportunities!")
+            
+                # IMMEDIATE AUTO-APPEND TO DATABASE (the session that started the scan appends it)
+                if TRACKING_AVAILABLE and not job['from_cache'] and job['submitted_by'] == get_session_owner():
+                    added_count = st.session_state.tracker.add_recommendations(
+                        st.session_state.us_recos, "US"
+                    )
+                    st.markdown(f"""
+                    <div class="db-info">
+                    <strong>💾 AUTO-APPENDED TO DATABASE!</strong><br>
+                    ✅ Added {added_count} new US stocks to local database<br>
+                    📁 Location: {st.session_state.tracker.db_path}<br>
+                    🔄 Previous data preserved, new data appended
+                    </div>
+                    """, unsafe_allow_html=True)
+            else:
+                st.warning("No stocks found. Try relaxing the criteria.")
+        except Exception as e:
+            st.error(f"Error saving scan results: {e}")
+    
+    render_scan_job('us')
+    
+    if not st.session_state.us_recos.empty:
+        st.markdown(f"**📊 Latest Scan Results: {len(st.session_state.us_recos)} opportunities**")
+        show_scan_info(st.session_state.us_scan_info)
+        
+        # Copy functionality
+        render_copy_boxes('us')
         
         st.dataframe(
-            st.session_state.us_recos, 
+            with_news_columns(st.session_state.us_recos, "US"), 
             use_container_width=True, 
             height=400,
             column_config={
@@ -302,41 +632,137 @@ with tab2:
             }
         )
 
+with tab3:
+    render_us_tab()
+
 # Tab 4: F&O Options
-with tab4:
+@st.fragment
+def render_fno_tab():
+    """F&O tab"""
     st.subheader("📊 F&O Options & Index Trading")
     
-    if modules.get('fno'):
-        if st.button("🔍 Generate F&O Opportunities", type="primary"):
-            with st.spinner("Generating F&O analysis..."):
-                try:
-                    st.session_state.fno_recos = modules['generate_fno_opportunities']()
-                    
-                    if not st.session_state.fno_recos.empty:
-                        summary = modules['get_options_summary'](st.session_state.fno_recos)
-                        st.success(f"🎯 Generated {summary['total_opportunities']} F&O opportunities!")
-                    else:
-                        st.warning("No F&O opportunities found.")
-                except Exception as e:
-                    st.error(f"Error generating F&O opportunities: {e}")
+    if modules.is_available('fno'):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            full_ladder = st.toggle("Scan full strike ladder", key="fno_full_ladder",
+                                    help="Score every strike around ATM for all F&O underlyings instead of the ATM strike only")
+        with col2:
+            ladder_width = st.number_input("Strikes each side of ATM", value=10, min_value=1, max_value=40,
+                                           key="fno_ladder_width", disabled=not full_ladder)
+        with col3:
+            ladder_top_k = st.number_input("Contracts per underlying", value=3, min_value=1, max_value=10,
+                                           key="fno_ladder_top_k", disabled=not full_ladder)
+        simulation_paths = st.select_slider(
+            "Monte Carlo paths", options=[0, 20_000, 50_000, 100_000], value=20_000, key="fno_simulation_paths",
+            format_func=lambda paths: f"{paths // 1000}k" if paths else "Off",
+            help="Paths per contract for the MC outcome columns; more paths are more precise but slower"
+        )
+        
+        if st.button("🔍 Generate F&O Opportunities", type="primary", help=SHARED_SCAN_HELP):
+            fno_params = {'simulation_paths': simulation_paths}
+            if full_ladder:
+                fno_params.update({'ladder_width': ladder_width, 'top_k': ladder_top_k})
+            submit_scan_job('fno', fno_params)
+        
+        job = take_scan_outcome('fno')
+        if job is not None:
+            if not st.session_state.fno_recos.empty:
+                summary = modules.get('fno', 'get_options_summary')(st.session_state.fno_recos)
+                st.success(f"🎯 Generated {summary['total_opportunities']} F&O opportunities!")
+            else:
+                st.warning("No F&O opportunities found.")
+        
+        render_scan_job('fno')
         
         if not st.session_state.fno_recos.empty:
             st.markdown(f"**📊 F&O Results: {len(st.session_state.fno_recos)} opportunities**")
+            show_scan_info(st.session_state.fno_scan_info)
             st.dataframe(st.session_state.fno_recos, use_container_width=True, height=500)
             
-            # Download option
-            csv = st.session_state.fno_recos.to_csv(index=False)
+            # Download option (CSV is built when the button is clicked)
+            fno_version = scan_result_version('fno')
+            fno_recos = st.session_state.fno_recos
             st.download_button(
                 "📥 Download F&O Recommendations",
-                csv,
+                lambda: build_export_payload(fno_version, 'csv', fno_recos),
                 f"fno_opportunities_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
                 "text/csv"
             )
+            
+            render_scenario_heatmap(st.session_state.fno_recos)
+        
+        render_strategy_builder()
     else:
         st.error("F&O module not available")
 
+def render_scenario_heatmap(fno_recos):
+    """P&L heatmap (spot move x days left) for one recommendation at a chosen vol shift"""
+    import altair as alt
+    
+    with st.expander("🗺️ Scenario P&L (spot x days left x volatility)"):
+        labels = [
+            f"{row['Underlying']} {row['Strike']} {row['Option Type']} ({row['Expiry Date']})"
+            for _, row in fno_recos.iterrows()
+        ]
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            position = st.selectbox("Contract", range(len(labels)), format_func=labels.__getitem__,
+                                    key="fno_scenario_contract")
+        scenarios = modules.get('fno', 'recommendation_scenarios')(fno_recos)[position]
+        with col2:
+            vol_shift = st.select_slider("Vol shift (points)", options=sorted(scenarios['Vol Shift'].unique()), value=0.0,
+                                         key="fno_scenario_vol_shift")
+        
+        grid = scenarios[scenarios['Vol Shift'] == vol_shift]
+        base = alt.Chart(grid).encode(
+            x=alt.X('Spot Move %:O', title='Spot move %'),
+            y=alt.Y('Days Left:O', sort='descending', title='Days left'),
+            tooltip=['Spot', 'Days Left', 'IV %', 'Option Value', 'P&L', 'P&L %']
+        )
+        heatmap = base.mark_rect().encode(
+            color=alt.Color('P&L:Q', scale=alt.Scale(scheme='redyellowgreen', domainMid=0), title='P&L')
+        )
+        labels_layer = base.mark_text(fontSize=11).encode(text=alt.Text('P&L:Q', format='.1f'))
+        st.altair_chart(heatmap + labels_layer, use_container_width=True)
+        st.caption(f"P&L per unit vs the entry premium; IV {grid['IV %'].iloc[0]}% at this vol shift")
+
+def render_strategy_builder():
+    """Multi-leg strategy search over the priced strike ladders"""
+    with st.expander("🧩 Strategy Builder (spreads, straddles, strangles, iron condors)"):
+        col1, col2 = st.columns(2)
+        with col1:
+            all_types = modules.get('option_strategies', 'STRATEGY_TYPES')
+            strategy_types = st.multiselect("Strategies", all_types, default=all_types, key="fno_strategy_types")
+            strategy_width = st.number_input("Strikes each side of ATM", value=10, min_value=2, max_value=15,
+                                             key="fno_strategy_width")
+            strategy_top_k = st.number_input("Strategies per underlying", value=5, min_value=1, max_value=20,
+                                             key="fno_strategy_top_k")
+        with col2:
+            max_loss_pct = st.number_input("Max loss (% of spot)", value=5.0, min_value=0.1, max_value=100.0, step=0.5,
+                                           key="fno_strategy_max_loss")
+            max_margin_pct = st.number_input("Max margin (% of spot)", value=20.0, min_value=0.1, max_value=100.0,
+                                             step=1.0, key="fno_strategy_max_margin")
+            min_pop = st.slider("Min probability of profit %", 0, 95, 0, key="fno_strategy_min_pop")
+        
+        if st.button("🧮 Search Strategies", disabled=not strategy_types):
+            with st.spinner("Searching strategies..."):
+                st.session_state.fno_strategies = modules.get('fno', 'generate_fno_strategies')(
+                    strategy_types, int(strategy_width), int(strategy_top_k), max_loss_pct, max_margin_pct, min_pop / 100
+                )
+            if st.session_state.fno_strategies.empty:
+                st.warning("No strategies within the limits.")
+        
+        if not st.session_state.fno_strategies.empty:
+            st.markdown(f"**🧩 {len(st.session_state.fno_strategies)} strategies** (per-unit values)")
+            st.dataframe(st.session_state.fno_strategies, use_container_width=True, height=400)
+
+with tab4:
+    render_fno_tab()
+
 # Tab 5: Database View
-with tab5:
+@st.fragment
+def render_database_tab():
+    """Database view; Refresh Data reruns only this tab"""
     st.subheader("📋 Complete Database View - All Historical Recommendations")
     
     if TRACKING_AVAILABLE:
@@ -360,11 +786,11 @@ with tab5:
             if st.button("🗂️ Archive Completed"):
                 archived_count = st.session_state.tracker.archive_completed_recommendations()
                 st.success(f"✅ Archived {archived_count} completed recommendations")
-                st.rerun()
         
         with col4:
             if st.button("🔄 Refresh Data"):
-                st.rerun()
+                # The click already reruns just this tab; drop cached rows so they are re-read
+                cached_recommendations.clear()
         
         # Manual cleanup section
         st.markdown("### 🗑️ Manual Data Management")
@@ -375,7 +801,6 @@ with tab5:
             if st.button("🗑️ Delete Old Records", help="Only deletes Target Hit/SL Hit/Archived records"):
                 deleted_count = st.session_state.tracker.manual_cleanup_old_records(days_old)
                 st.success(f"✅ Deleted {deleted_count} old records")
-                st.rerun()
         
         with col_b:
             st.markdown("**Individual Delete:**")
@@ -383,12 +808,11 @@ with tab5:
             if st.button("🗑️ Delete by ID"):
                 if st.session_state.tracker.delete_recommendation(delete_id):
                     st.success(f"✅ Deleted recommendation ID: {delete_id}")
-                    st.rerun()
                 else:
                     st.error(f"❌ Could not find recommendation ID: {delete_id}")
         
         # Get and display filtered data
-        all_recommendations = st.session_state.tracker.get_all_recommendations(status_filter, market_filter)
+        all_recommendations = cached_recommendations(get_db_mtime(), status_filter, market_filter)
         
         if not all_recommendations.empty:
             st.markdown(f"**📊 Showing {len(all_recommendations)} recommendations**")
@@ -417,11 +841,11 @@ with tab5:
                 }
             )
             
-            # Export filtered data
-            csv_filtered = all_recommendations.to_csv(index=False)
+            # Export filtered data (CSV is built when the button is clicked)
+            export_version = f"tracker-{get_db_mtime()}-{status_filter}-{market_filter}"
             st.download_button(
                 "📥 Export Filtered Data",
-                csv_filtered,
+                lambda: build_export_payload(export_version, 'csv', all_recommendations),
                 f"filtered_recommendations_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
                 "text/csv"
             )
@@ -432,107 +856,59 @@ with tab5:
     else:
         st.error("Database tracking not available")
 
+with tab5:
+    render_database_tab()
+
 # Sidebar
-st.sidebar.title("💾 Local Database Info")
+@st.fragment(run_every="30s")
+def render_sidebar():
+    """Sidebar metrics; polls every 30s but only re-reads the DB after it changes"""
+    st.title("💾 Local Database Info")
 
-if TRACKING_AVAILABLE:
-    db_info = st.session_state.tracker.get_database_info()
-    summary = st.session_state.tracker.get_performance_summary()
+    if TRACKING_AVAILABLE:
+        db_info = cached_database_info(get_db_mtime())
+        summary = cached_performance_summary(get_db_mtime())
     
-    st.sidebar.success("✅ Database Active")
-    st.sidebar.metric("Total Records", summary['total_recommendations'])
-    st.sidebar.metric("Active Trades", summary['active_recommendations'])
-    st.sidebar.metric("Success Rate", f"{summary['success_rate']}%")
-    st.sidebar.metric("Database Size", f"{db_info.get('size_kb', 0)} KB")
+        st.success("✅ Database Active")
+        st.metric("Total Records", summary['total_recommendations'])
+        st.metric("Active Trades", summary['active_recommendations'])
+        st.metric("Success Rate", f"{summary['success_rate']}%")
+        st.metric("Database Size", f"{db_info.get('size_kb', 0)} KB")
     
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("**💾 Database Location:**")
-    st.sidebar.code(db_info['path'])
+        st.markdown("---")
+        st.markdown("**💾 Database Location:**")
+        st.code(db_info['path'])
     
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("**🔧 Features:**")
-    st.sidebar.markdown("• Instant scan append")
-    st.sidebar.markdown("• Manual price updates")
-    st.sidebar.markdown("• Target/SL detection")
-    st.sidebar.markdown("• Manual data management")
-    st.sidebar.markdown("• Copy/paste functionality")
-    st.sidebar.markdown("• Local file storage")
+        st.markdown("---")
+        st.markdown("**🔧 Features:**")
+        st.markdown("• Instant scan append")
+        st.markdown("• Manual price updates")
+        st.markdown("• Target/SL detection")
+        st.markdown("• Manual data management")
+        st.markdown("• Copy/paste functionality")
+        st.markdown("• Local file storage")
     
-else:
-    st.sidebar.error("❌ Database Unavailable")
+    else:
+        st.error("❌ Database Unavailable")
+
+    with st.expander("⏱️ Module Import Budget"):
+        import_report = pd.DataFrame(modules.import_report())
+        st.dataframe(import_report[['Module', 'Status', 'Import ms', 'Budget ms', 'Over Budget']], hide_index=True)
+        over_budget = import_report[import_report['Over Budget']]
+        if not over_budget.empty:
+            st.warning(f"Over budget: {', '.join(over_budget['Module'])}")
+        for _, failed in import_report[import_report['Status'] == 'Failed'].iterrows():
+            st.error(f"{failed['File']}: {failed['Error']}")
+
+with st.sidebar:
+    render_sidebar()
 
 # Footer
 st.markdown("---")
-st.markdown("""
+st.markdown(f"""
 <div style="text-align: center; color: #666;">
 <strong>Kamal's Local Auto-Append Trading Dashboard</strong><br>
 💾 Local database storage • 🔄 Immediate append • 📊 Manual control<br>
-<em>Every scan automatically saves to: C:\\Users\\kamal\\Downloads\\DASHBOARD FILES\\</em>
+<em>Every scan automatically saves to: {get_data_dir()}</em>
 </div>
 """, unsafe_allow_html=True)
-copy_text = st.session_state.indian_recos.to_string(index=False, max_cols=None, max_rows=None)
-st.text_area("📋 Copy Exact Format (Select All + Ctrl+C):", copy_text, height=150, key="copy_indian_exact")
-        
-with col2:
-    copy_tsv = st.session_state.indian_recos.to_csv(index=False, sep='\t')
-    st.text_area("📋 Copy for Excel (Tab-separated):", copy_tsv, height=150, key="copy_indian_excel")
-        
-st.dataframe(
-    st.session_state.indian_recos, 
-    use_container_width=True, 
-    height=400,
-    column_config={
-        "Selection Reason": st.column_config.TextColumn(width="large")
-    }
-)
-
-# Tab 3: US Stocks
-with tab3:
-    st.subheader("🇺🇸 US Stock Recommendations - Auto-Append to Database")
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        min_price_us = st.number_input("Min Price ($)", value=25, min_value=1, key="us_price")
-    with col2:
-        max_rsi_us = st.number_input("Max RSI", value=65, min_value=1, max_value=100, key="us_rsi")
-    with col3:
-        batch_size_us = st.number_input("Stocks to Scan", value=200, min_value=50, max_value=500, key="us_batch")
-    
-    if st.button("🔍 Scan US Stocks", type="primary"):
-        with st.spinner("Scanning US stocks..."):
-            try:
-                if modules.get('us_stock'):
-                    st.session_state.us_recos = modules['get_us_recommendations'](
-                        min_price_us, max_rsi_us, min_volume=500000, batch_size=batch_size_us
-                    )
-                    
-                    if not st.session_state.us_recos.empty:
-                        st.success(f"🎯 Found {len(st.session_state.us_recos)} US stock opportunities!")
-                        
-                        # IMMEDIATE AUTO-APPEND TO DATABASE
-                        if TRACKING_AVAILABLE:
-                            added_count = st.session_state.tracker.add_recommendations(
-                                st.session_state.us_recos, "US"
-                            )
-                            st.markdown(f"""
-                            <div class="db-info">
-                            <strong>💾 AUTO-APPENDED TO DATABASE!</strong><br>
-                            ✅ Added {added_count} new US stocks to local database<br>
-                            📁 Location: C:\\Users\\kamal\\Downloads\\DASHBOARD FILES\\recommendations_tracker.db<br>
-                            🔄 Previous data preserved, new data appended
-                            </div>
-                            """, unsafe_allow_html=True)
-                    else:
-                        st.warning("No stocks found. Try relaxing the criteria.")
-                else:
-                    st.error("US stock module not available")
-            except Exception as e:
-                st.error(f"Error during scan: {e}")
-    
-    if not st.session_state.us_recos.empty:
-        st.markdown(f"**📊 Latest Scan Results: {len(st.session_state.us_recos)} opportunities**")
-        
-        # Copy functionality
-        col1, col2 = st.columns(2)
-        with col1:
-            copy_text = st.session_state
@@ -0,0 +1,18 @@
+# data_paths.py - WHERE THE DASHBOARD KEEPS ITS LOCAL DATABASES
+import os
+
+# Folder of the original Windows setup; DASHBOARD_DATA_DIR points every database somewhere else
+WINDOWS_DATA_DIR = r"C:\Users\kamal\Downloads\DASHBOARD FILES"
+
+def get_data_dir():
+    """Directory for the SQLite databases and option chain snapshots
+
+    DASHBOARD_DATA_DIR when set, else the Windows folder on Windows and
+    ~/DASHBOARD FILES elsewhere.
+    """
+    configured = os.environ.get('DASHBOARD_DATA_DIR')
+    if configured:
+        return configured
+    if os.name == 'nt':
+        return WINDOWS_DATA_DIR
+    return os.path.join(os.path.expanduser('~'), 'DASHBOARD FILES')
@@ -0,0 +1,172 @@
+# expiry_calendar.py - PRECOMPUTED NSE F&O EXPIRY CALENDAR
+import bisect
+import calendar
+import csv
+import os
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+# Weekday numbers (datetime.weekday)
+TUESDAY, WEDNESDAY, THURSDAY = 1, 2, 3
+
+# Contracts expire at the close
+EXPIRY_TIME = time(15, 30)
+
+HOLIDAY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nse_holidays.csv")
+
+# Expiry rules per contract series: (effective from, cycle, weekday), oldest first.
+# A rule covers scheduled dates from its start until the next rule's start;
+# 'weekly' expires every week on the weekday, 'monthly' on the month's last one.
+EXPIRY_RULES = {
+    'NIFTY': [
+        (date(2019, 2, 11), 'weekly', THURSDAY),
+        (date(2025, 9, 1), 'weekly', TUESDAY),
+    ],
+    'BANKNIFTY': [
+        (date(2019, 1, 1), 'weekly', THURSDAY),
+        (date(2023, 9, 4), 'weekly', WEDNESDAY),
+        (date(2024, 11, 14), 'monthly', WEDNESDAY),  # weekly contracts discontinued
+        (date(2025, 1, 1), 'monthly', THURSDAY),
+        (date(2025, 9, 1), 'monthly', TUESDAY),
+    ],
+    'STOCKS': [
+        (date(2019, 1, 1), 'monthly', THURSDAY),
+        (date(2025, 9, 1), 'monthly', TUESDAY),
+    ],
+}
+
+def load_holidays(path=HOLIDAY_FILE):
+    """Exchange holidays (set of dates) from a date,description CSV; empty if the file is missing"""
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            return {date.fromisoformat(row['date'].strip()) for row in csv.DictReader(f) if row.get('date')}
+    except (OSError, ValueError) as e:
+        print(f"Error reading holiday file {path}: {e}")
+        return set()
+
+def days_until_expiry(expiry, as_of=None):
+    """Calendar days, with the fraction of a day, from as_of (default now) to an expiry datetime; 0 once expired"""
+    as_of = as_of or datetime.now()
+    return max((expiry - as_of).total_seconds() / 86400, 0.0)
+
+def _scheduled_dates(cycle, weekday, first, last):
+    # Rule dates in [first, last] before holiday adjustment
+    if cycle == 'weekly':
+        day = first + timedelta(days=(weekday - first.weekday()) % 7)
+        while day <= last:
+            yield day
+            day += timedelta(days=7)
+        return
+    year, month = first.year, first.month
+    while date(year, month, 1) <= last:
+        month_end = date(year, month, calendar.monthrange(year, month)[1])
+        day = month_end - timedelta(days=(month_end.weekday() - weekday) % 7)
+        if first <= day <= last:
+            yield day
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+class ExpiryCalendar:
+    """Sorted expiry table per contract series, built once from the rules and the holiday list
+
+    Expiries falling on a weekend or holiday move to the previous trading day.
+    The table spans the rules' first year through next year (or the holiday
+    list's last year, if later). Years the holiday list doesn't cover are only
+    moved off weekends: is_holiday_checked is False for their expiries and
+    lookups there print a warning. Lookups bisect the table, so historical
+    dates cost the same as today.
+    """
+
+    def __init__(self, holidays=(), rules=None, start_year=None, end_year=None):
+        self.holidays = frozenset(holidays)
+        self.rules = rules or EXPIRY_RULES
+        self.holiday_years = frozenset(day.year for day in self.holidays)
+        rules_start = min(effective for series_rules in self.rules.values() for effective, _, _ in series_rules)
+        self.first_day = date(start_year or rules_start.year, 1, 1)
+        self.last_day = date(end_year or max(datetime.now().year + 1, *self.holiday_years), 12, 31)
+        first, last = self.first_day, self.last_day
+        self._warned_years = set()
+
+        self._expiries = {}  # series -> sorted expiry datetimes
+        self._monthly = {}   # series -> sorted monthly (last of the month) expiry datetimes
+        for series, series_rules in self.rules.items():
+            dates = set()
+            for index, (effective, cycle, weekday) in enumerate(series_rules):
+                rule_end = series_rules[index + 1][0] - timedelta(days=1) if index + 1 < len(series_rules) else last
+                for day in _scheduled_dates(cycle, weekday, max(effective, first), min(rule_end, last)):
+                    dates.add(self.previous_trading_day(day))
+            expiries = [datetime.combine(day, EXPIRY_TIME) for day in sorted(dates)]
+            self._expiries[series] = expiries
+            self._monthly[series] = [
+                expiry for expiry, following in zip(expiries, expiries[1:] + [None])
+                if following is None or following.month != expiry.month
+            ]
+
+        misplaced = self.off_calendar_expiries()
+        if misplaced:
+            raise ValueError(f"expiries not on trading days: {misplaced[:5]}")
+
+    def off_calendar_expiries(self):
+        """(series, expiry) pairs that fall on a weekend, a holiday or outside the covered years"""
+        return [
+            (series, expiry) for series, expiries in self._expiries.items() for expiry in expiries
+            if not (self.first_day <= expiry.date() <= self.last_day and self.is_trading_day(expiry.date()))
+        ]
+
+    def is_holiday_checked(self, expiry):
+        """True if the expiry's year is in the holiday list (otherwise it was only moved off weekends)"""
+        return expiry.year in self.holiday_years
+
+    def _check_covered(self, day):
+        # Warn (once per year) about lookups outside the table or the holiday list
+        if day.year in self._warned_years:
+            return
+        if not self.first_day <= day <= self.last_day:
+            self._warned_years.add(day.year)
+            print(f"Expiry calendar covers {self.first_day.year}-{self.last_day.year}; no expiries for {day.year}")
+        elif day.year not in self.holiday_years:
+            self._warned_years.add(day.year)
+            print(f"No exchange holidays listed for {day.year}; its expiries are only moved off weekends")
+
+    def is_trading_day(self, day):
+        """Weekday that is not an exchange holiday"""
+        return day.weekday() < 5 and day not in self.holidays
+
+    def previous_trading_day(self, day):
+        """The day itself if it trades, else the closest trading day before it"""
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def series(self):
+        """Contract series in the calendar"""
+        return list(self._expiries)
+
+    def next_expiry(self, series, as_of=None, monthly=False):
+        """First expiry (datetime at the close) strictly after as_of (default now), or None past the table"""
+        as_of = as_of or datetime.now()
+        if not isinstance(as_of, datetime):
+            as_of = datetime.combine(as_of, time.min)
+        self._check_covered(as_of.date())
+        if as_of.date() < self.first_day:
+            return None
+        table = self._monthly[series] if monthly else self._expiries[series]
+        position = bisect.bisect_right(table, as_of)
+        if position < len(table):
+            self._check_covered(table[position].date())
+            return table[position]
+        self._check_covered(self.last_day + timedelta(days=1))
+        return None
+
+    def expiries_between(self, series, start, end, monthly=False):
+        """Expiries with start <= expiry date <= end (dates or datetimes), within the table's years"""
+        table = self._monthly[series] if monthly else self._expiries[series]
+        start = datetime.combine(start if not isinstance(start, datetime) else start.date(), time.min)
+        end = datetime.combine(end if not isinstance(end, datetime) else end.date(), time.max)
+        self._check_covered(start.date())
+        self._check_covered(end.date())
+        return table[bisect.bisect_left(table, start):bisect.bisect_right(table, end)]
+
+@lru_cache(maxsize=1)
+def get_expiry_calendar():
+    """Process-wide calendar built from EXPIRY_RULES and the bundled holiday file"""
+    return ExpiryCalendar(load_holidays())
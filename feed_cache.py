@@ -0,0 +1,163 @@
+# feed_cache.py - CONDITIONAL-GET STATE AND PARSED ENTRIES PER NEWS FEED SOURCE
+import sqlite3
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from data_paths import get_data_dir
+
+class FeedCache:
+    """HTTP validators and last body per news source (on disk) plus parsed entries (in memory)
+
+    The ETag / Last-Modified of each source's last 200 response is sent back
+    as If-None-Match / If-Modified-Since, so an unchanged feed costs a 304.
+    Parsed and scored entries are kept by GUID (or link) and a fingerprint of
+    their raw fields, so unchanged items are never re-parsed or re-scored.
+    """
+
+    def __init__(self, db_directory=None, max_entries=2000):
+        # Same directory as the recommendations tracker database by default
+        self.db_directory = db_directory or get_data_dir()
+        self.db_path = os.path.join(self.db_directory, "feed_cache.db")
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()  # entry key -> (fingerprint, parsed item)
+        self._source_entries = {}      # source -> entry keys of its last parsed feed
+        self._lock = threading.Lock()
+
+        # Ensure directory exists
+        os.makedirs(self.db_directory, exist_ok=True)
+
+        # Initialize database
+        self.init_database()
+
+    def init_database(self):
+        """Initialize the SQLite database with the per-source feed state table"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feed_state (
+                source TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB,
+                fetched_at TEXT,
+                checked_at TEXT,
+                not_modified_count INTEGER DEFAULT 0
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def conditional_headers(self, source):
+        """If-None-Match / If-Modified-Since headers for a source's next request"""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute(
+                "SELECT etag, last_modified FROM feed_state WHERE source = ? AND body IS NOT NULL", (source,)
+            ).fetchone()
+            conn.close()
+
+        headers = {}
+        if row:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def save_feed(self, source, url, etag, last_modified, body):
+        """Store the validators and body of a full (200) response"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('''
+                INSERT OR REPLACE INTO feed_state
+                (source, url, etag, last_modified, body, fetched_at, checked_at, not_modified_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+            ''', (source, url, etag, last_modified, sqlite3.Binary(body), now, now))
+            conn.commit()
+            conn.close()
+
+            # New body: entry list is rebuilt on the next parse
+            self._source_entries.pop(source, None)
+
+    def mark_not_modified(self, source):
+        """Record a 304 for a source"""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('''
+                UPDATE feed_state SET checked_at = ?, not_modified_count = not_modified_count + 1
+                WHERE source = ?
+            ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), source))
+            conn.commit()
+            conn.close()
+
+    def load_body(self, source):
+        """Last full body downloaded for a source (None if never fetched)"""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute("SELECT body FROM feed_state WHERE source = ?", (source,)).fetchone()
+            conn.close()
+        return bytes(row[0]) if row and row[0] is not None else None
+
+    @staticmethod
+    def entry_fingerprint(*raw_fields):
+        """Fingerprint of an entry's raw fields; changes when the publisher edits the item"""
+        return hashlib.sha1('\x1f'.join(str(field) for field in raw_fields).encode('utf-8')).hexdigest()
+
+    def get_entry(self, entry_key, fingerprint):
+        """Parsed item for an unchanged entry, or None"""
+        with self._lock:
+            cached = self._entries.get(entry_key)
+            if cached is None or cached[0] != fingerprint:
+                return None
+            self._entries.move_to_end(entry_key)
+            return cached[1]
+
+    def put_entry(self, entry_key, fingerprint, item):
+        """Cache a parsed item, evicting the least recently used ones"""
+        with self._lock:
+            self._entries[entry_key] = (fingerprint, item)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_source_entries(self, source, entry_keys):
+        """Remember which entries a source's current feed body contains"""
+        with self._lock:
+            self._source_entries[source] = list(entry_keys)
+
+    def get_source_items(self, source):
+        """Parsed items of a source's current feed body, or None if they must be re-parsed"""
+        with self._lock:
+            entry_keys = self._source_entries.get(source)
+            if entry_keys is None or any(key not in self._entries for key in entry_keys):
+                return None
+            return [self._entries[key][1] for key in entry_keys]
+
+    def get_feed_stats(self):
+        """Per-source cache state for display"""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            rows = conn.execute('''
+                SELECT source, etag IS NOT NULL OR last_modified IS NOT NULL, LENGTH(body),
+                       fetched_at, checked_at, not_modified_count
+                FROM feed_state ORDER BY source
+            ''').fetchall()
+            conn.close()
+
+        return [{
+            'source': source,
+            'conditional': bool(conditional),
+            'body_bytes': body_bytes or 0,
+            'fetched_at': fetched_at,
+            'checked_at': checked_at,
+            'not_modified_count': not_modified_count
+        } for source, conditional, body_bytes, fetched_at, checked_at, not_modified_count in rows]
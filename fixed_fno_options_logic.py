@@ -1,9 +1,25 @@
 # fixed_fno_options_logic.py - ENHANCED WITH TECHNICAL REASONING
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import streamlit as st
+from options_pricing import (
+    DAYS_PER_YEAR, black_scholes_price, black_scholes_greeks, default_volatility, strike_ladder, years_to_expiry,
+    ladder_grid, score_ladder_contracts, top_k_per_row, target_hit_probability
+)
+from option_chain import (
+    load_chain_snapshot, fresh_quotes, add_iv_and_greeks, lookup_contract, atm_implied_vol, matching_expiry
+)
+from option_simulation import historical_volatility, simulate_option_outcomes
+from expiry_calendar import days_until_expiry, get_expiry_calendar
+from price_cache import get_price_cache
+from options_history import get_options_history, stored_iv
+from option_scenarios import SPOT_SHOCKS_PCT, VOL_SHIFTS, DAY_STEPS, get_scenario_cache
+from option_strategies import (
+    STRATEGY_TYPES, enumerate_strategies, evaluate_strategies, strategy_margin, describe_legs
+)
+
+# Yahoo tickers of the index underlyings
+INDEX_TICKERS = {'NIFTY': '^NSEI', 'BANKNIFTY': '^NSEBANK'}
 
 def analyze_index_technical_bias(data, index_name):
     """Analyze technical bias for indices with reasoning"""
@@ -126,8 +142,12 @@ def analyze_index_technical_bias(data, index_name):
             'is_fallback': True
         }
 
-def analyze_stock_fno_bias(data, symbol, rsi_value):
-    """Analyze F&O stock technical bias"""
+def analyze_stock_fno_bias(data, symbol, rsi_value, vol_regime=None):
+    """Analyze F&O stock technical bias
+
+    vol_regime (options_history) scales the strength: option buyers pay up
+    when IV sits high in its yearly range and get a discount when it is low.
+    """
     try:
         if len(data) < 5:
             return {
@@ -200,11 +220,22 @@ def analyze_stock_fno_bias(data, symbol, rsi_value):
             bias = 'Bearish'
         else:
             bias = 'Neutral'
+        
+        # 6. Volatility regime from the stored ATM IV history
+        strength = abs(bias_score)
+        iv_percentile = (vol_regime or {}).get('iv_percentile')
+        if iv_percentile is not None and bias != 'Neutral':
+            if iv_percentile >= 80:
+                reasons.insert(0, "Rich IV")
+                strength *= 0.75
+            elif iv_percentile <= 20:
+                reasons.insert(0, "Cheap IV")
+                strength *= 1.25
             
         return {
             'bias': bias,
             'reasoning': " + ".join(reasons[:3]) if reasons else "Technical Setup",
-            'strength': round(abs(bias_score), 1),
+            'strength': round(strength, 1),
             'is_fallback': False
         }
         
@@ -219,54 +250,22 @@ def analyze_stock_fno_bias(data, symbol, rsi_value):
 def get_next_expiry_dates():
     """Get next expiry dates with fallback handling"""
     try:
-        today = datetime.now()
-        
-        # NIFTY: Next Thursday
-        days_until_thursday = (3 - today.weekday()) % 7
-        if days_until_thursday == 0 and today.hour >= 15:
-            days_until_thursday = 7
-        nifty_expiry = today + timedelta(days=days_until_thursday)
-        
-        # Monthly expiry calculation
-        year = today.year
-        month = today.month
-        
-        # Find last Thursday of current month
-        last_day = 31
-        while last_day > 0:
-            try:
-                test_date = datetime(year, month, last_day)
-                break
-            except ValueError:
-                last_day -= 1
-        
-        last_thursday = last_day - (test_date.weekday() - 3) % 7
-        last_thursday_date = datetime(year, month, last_thursday)
-        
-        # If past last Thursday, move to next month
-        if today > last_thursday_date or (today.date() == last_thursday_date.date() and today.hour >= 15):
-            if month == 12:
-                year += 1
-                month = 1
-            else:
-                month += 1
-            
-            last_day = 31
-            while last_day > 0:
-                try:
-                    test_date = datetime(year, month, last_day)
-                    break
-                except ValueError:
-                    last_day -= 1
-            
-            last_thursday = last_day - (test_date.weekday() - 3) % 7
-            last_thursday_date = datetime(year, month, last_thursday)
-        
+        # Precomputed exchange calendar: weekday rules per series, holidays rolled back
+        expiry_calendar = get_expiry_calendar()
+        now = datetime.now()
+        nifty_expiry = expiry_calendar.next_expiry('NIFTY', now)
+        banknifty_expiry = expiry_calendar.next_expiry('BANKNIFTY', now)
+        stocks_expiry = expiry_calendar.next_expiry('STOCKS', now)
+        if None in (nifty_expiry, banknifty_expiry, stocks_expiry):
+            raise ValueError("expiry calendar exhausted")
+        
+        # Expiries in a year without a holiday list are flagged like the offset fallback
         return {
             'nifty': nifty_expiry,
-            'banknifty': last_thursday_date,
-            'stocks': last_thursday_date,
-            'is_fallback': False
+            'banknifty': banknifty_expiry,
+            'stocks': stocks_expiry,
+            'is_fallback': not all(expiry_calendar.is_holiday_checked(expiry)
+                                   for expiry in (nifty_expiry, banknifty_expiry, stocks_expiry))
         }
         
     except Exception as e:
@@ -282,12 +281,13 @@ def get_next_expiry_dates():
 def fetch_current_index_prices():
     """Fetch current prices with comprehensive fallback"""
     try:
-        # Attempt to fetch real data
-        nifty = yf.Ticker("^NSEI")
-        nifty_data = nifty.history(period="5d")
+        # Attempt to fetch real data (both indices in one grouped request, cached)
+        bars = get_price_cache().get_many(list(INDEX_TICKERS.values()), "1mo")
+        nifty_history = bars[INDEX_TICKERS['NIFTY']]
+        nifty_data = nifty_history.tail(5)
         
-        banknifty = yf.Ticker("^NSEBANK")
-        banknifty_data = banknifty.history(period="5d")
+        banknifty_history = bars[INDEX_TICKERS['BANKNIFTY']]
+        banknifty_data = banknifty_history.tail(5)
         
         nifty_price = nifty_data['Close'].iloc[-1] if not nifty_data.empty else None
         banknifty_price = banknifty_data['Close'].iloc[-1] if not banknifty_data.empty else None
@@ -313,6 +313,9 @@ def fetch_current_index_prices():
             'BANKNIFTY_ANALYSIS': banknifty_analysis if banknifty_analysis else {
                 'bias': 'Neutral', 'reasoning': 'Data Unavailable*', 'strength': 1, 'is_fallback': True
             },
+            # Realized volatility over the month (None -> simulations use implied volatility)
+            'NIFTY_HIST_VOL': historical_volatility(nifty_history['Close']) if not nifty_history.empty else None,
+            'BANKNIFTY_HIST_VOL': historical_volatility(banknifty_history['Close']) if not banknifty_history.empty else None,
             'fallback_flags': fallback_flags
         }
         
@@ -326,6 +329,8 @@ def fetch_current_index_prices():
             'BANKNIFTY_ANALYSIS': {
                 'bias': 'Neutral', 'reasoning': 'Fetch Failed*', 'strength': 1, 'is_fallback': True
             },
+            'NIFTY_HIST_VOL': None,
+            'BANKNIFTY_HIST_VOL': None,
             'fallback_flags': {
                 'nifty_price': True, 'banknifty_price': True,
                 'nifty_analysis': True, 'banknifty_analysis': True, 'complete_fallback': True
@@ -341,14 +346,27 @@ def get_expanded_fno_stocks():
         'ONGC', 'COALINDIA', 'NTPC', 'POWERGRID', 'HCLTECH', 'TECHM', 'DRREDDY'
     ]
 
-def fetch_stock_prices_with_analysis(symbols):
-    """Fetch stock prices with technical analysis"""
+def fetch_stock_prices_with_analysis(symbols, progress_callback=None, cancel_event=None, vol_regimes=None):
+    """Fetch stock prices with technical analysis (stops early once cancel_event is set)
+
+    Bars come from the shared price cache: one grouped download for whatever
+    an earlier scan hasn't already pulled. vol_regimes (underlying -> stored
+    vol regime) feed the bias analysis.
+    """
     stocks_data = {}
+    if cancel_event is not None and cancel_event.is_set():
+        return stocks_data
+    bars = get_price_cache().get_many([f"{symbol}.NS" for symbol in symbols], "1mo")
     
-    for symbol in symbols:
+    for i, symbol in enumerate(symbols):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        
+        if progress_callback:
+            progress_callback((i + 1) / len(symbols), f"Analyzing {symbol}... ({i+1}/{len(symbols)})")
+        
         try:
-            stock = yf.Ticker(f"{symbol}.NS")
-            data = stock.history(period="1mo")
+            data = bars[f"{symbol}.NS"]
             
             if not data.empty:
                 current_price = round(data['Close'].iloc[-1], 2)
@@ -367,13 +385,14 @@ def fetch_stock_prices_with_analysis(symbols):
                     rsi_is_fallback = True
                 
                 # Get technical bias
-                bias_analysis = analyze_stock_fno_bias(data, symbol, current_rsi)
+                bias_analysis = analyze_stock_fno_bias(data, symbol, current_rsi, (vol_regimes or {}).get(symbol))
                 
                 stocks_data[symbol] = {
                     'price': current_price,
                     'rsi': current_rsi,
                     'bias_analysis': bias_analysis,
                     'volume_avg': data['Volume'].mean() if 'Volume' in data.columns else 1000000,
+                    'hist_vol': historical_volatility(data['Close']),
                     'fallback_flags': {
                         'rsi': rsi_is_fallback,
                         'price': False,
@@ -397,6 +416,7 @@ def fetch_stock_prices_with_analysis(symbols):
                         'bias': 'Neutral', 'reasoning': 'Default Data*', 'strength': 1, 'is_fallback': True
                     },
                     'volume_avg': 1000000,
+                    'hist_vol': None,
                     'fallback_flags': {
                         'rsi': True, 'price': True, 'analysis': True, 'complete_fallback': True
                     }
@@ -411,6 +431,7 @@ def fetch_stock_prices_with_analysis(symbols):
                     'bias': 'Neutral', 'reasoning': 'Error*', 'strength': 1, 'is_fallback': True
                 },
                 'volume_avg': 1000000,
+                'hist_vol': None,
                 'fallback_flags': {
                     'rsi': True, 'price': True, 'analysis': True, 'error': True
                 }
@@ -420,36 +441,15 @@ def fetch_stock_prices_with_analysis(symbols):
 
 def get_correct_strike_prices(underlying_price, option_type):
     """Get correct strike intervals"""
-    if option_type == 'index':
-        if underlying_price > 40000:  # Bank Nifty range
-            interval = 100
-        else:  # Nifty range  
-            interval = 50
-    else:  # Stock options
-        if underlying_price >= 2000:
-            interval = 100
-        elif underlying_price >= 1000:
-            interval = 50
-        elif underlying_price >= 500:
-            interval = 20
-        elif underlying_price >= 250:
-            interval = 10
-        else:
-            interval = 5
-    
-    # Generate strikes around ATM
-    atm_strike = round(underlying_price / interval) * interval
-    
-    strikes = []
-    for i in range(-3, 4):  # 3 strikes below and above ATM
-        strike = atm_strike + (i * interval)
-        if strike > 0:
-            strikes.append(strike)
-    
-    return strikes
+    # 3 strikes below and above ATM at the NSE strike interval
+    return strike_ladder(underlying_price, option_type, width=3).tolist()
+
+# Spot move per unit of bias strength (middle of the old 2-6% stock / 1-3% index ranges)
+STOCK_TARGET_MOVE = 0.04
+INDEX_TARGET_MOVE = 0.02
 
 def calculate_spot_targets_with_reasoning(current_spot, bias_analysis, option_type, strike):
-    """Calculate spot targets with detailed reasoning"""
+    """Calculate spot targets with detailed reasoning (deterministic: same analysis, same targets)"""
     try:
         bias = bias_analysis['bias']
         reasoning = bias_analysis['reasoning']
@@ -457,9 +457,9 @@ def calculate_spot_targets_with_reasoning(current_spot, bias_analysis, option_ty
         
         # Base movement calculation
         if current_spot < 1000:  # Stock
-            base_move_pct = np.random.uniform(0.02, 0.06) * strength  # 2-6% based on strength
+            base_move_pct = STOCK_TARGET_MOVE * strength
         else:  # Index
-            base_move_pct = np.random.uniform(0.01, 0.03) * strength  # 1-3% based on strength
+            base_move_pct = INDEX_TARGET_MOVE * strength
         
         if bias == 'Bullish':
             spot_target = current_spot * (1 + base_move_pct)
@@ -504,62 +504,16 @@ def calculate_spot_targets_with_reasoning(current_spot, bias_analysis, option_ty
             'is_fallback': True
         }
 
-def calculate_realistic_premium(spot_price, strike, option_type, days_to_expiry, underlying_type):
-    """Calculate realistic option premium based on actual market conditions"""
+def calculate_realistic_premium(spot_price, strike, option_type, days_to_expiry, underlying_type, volatility=None):
+    """Black-Scholes premium; volatility defaults to the underlying's assumption"""
     try:
-        # Calculate intrinsic value
-        if option_type == 'CE':
-            intrinsic_value = max(0, spot_price - strike)
-            moneyness = spot_price / strike
-        else:  # PE
-            intrinsic_value = max(0, strike - spot_price)
-            moneyness = strike / spot_price
-        
-        # Time value calculation (more realistic)
-        time_factor = days_to_expiry / 365.0
-        
-        # Volatility assumptions (based on underlying)
-        if underlying_type == 'index':
-            if spot_price > 40000:  # Bank Nifty
-                implied_vol = 0.18  # 18% volatility
-                base_premium_pct = 0.015  # 1.5% of spot for ATM options
-            else:  # Nifty
-                implied_vol = 0.15  # 15% volatility
-                base_premium_pct = 0.012  # 1.2% of spot for ATM options
-        else:  # Stock
-            implied_vol = 0.25  # 25% volatility for stocks
-            base_premium_pct = 0.02   # 2% of spot for ATM options
-        
-        # Calculate time value based on moneyness
-        if 0.98 <= moneyness <= 1.02:  # ATM options
-            time_value = spot_price * base_premium_pct * np.sqrt(time_factor)
-        elif moneyness > 1.05 or moneyness < 0.95:  # Deep OTM/ITM
-            time_value = spot_price * base_premium_pct * 0.3 * np.sqrt(time_factor)
-        else:  # Near ATM
-            time_value = spot_price * base_premium_pct * 0.7 * np.sqrt(time_factor)
-        
-        # Adjust for very short expiry (time decay)
-        if days_to_expiry <= 3:
-            time_value *= 0.5  # Significant time decay
-        elif days_to_expiry <= 7:
-            time_value *= 0.7
-        
-        # Total premium
-        total_premium = intrinsic_value + time_value
-        
-        # Minimum premium bounds
-        if underlying_type == 'index':
-            min_premium = 5 if spot_price < 25000 else 10
-        else:
-            min_premium = 2
-        
-        # Maximum premium bounds (prevent unrealistic values)
-        max_premium = spot_price * 0.08  # Max 8% of spot price
-        
-        # Apply bounds
-        total_premium = max(min_premium, min(total_premium, max_premium))
+        vol = volatility or default_volatility(spot_price, underlying_type)
+        premium = black_scholes_price(
+            spot_price, strike, years_to_expiry(days_to_expiry), vol, option_type == 'CE'
+        )
         
-        return round(total_premium, 2)
+        # Never below one NSE tick
+        return round(max(float(premium), 0.05), 2)
         
     except Exception:
         # Fallback premium
@@ -568,113 +522,470 @@ def calculate_realistic_premium(spot_price, strike, option_type, days_to_expiry,
         else:
             return round(spot_price * 0.01, 2)   # 1% of spot
 
-def calculate_realistic_target(current_premium, spot_move_pct, option_type, days_to_expiry):
-    """Calculate realistic target premium and gain percentage"""
-    try:
-        # Option gain multiplier based on spot movement
-        # Options have leveraged exposure to underlying movement
-        
-        if days_to_expiry <= 3:
-            # Very short expiry - higher leverage but more risk
-            leverage_factor = spot_move_pct * 8  # 8x leverage
-        elif days_to_expiry <= 7:
-            # Short expiry - good leverage
-            leverage_factor = spot_move_pct * 6  # 6x leverage
-        elif days_to_expiry <= 15:
-            # Medium expiry - moderate leverage
-            leverage_factor = spot_move_pct * 4  # 4x leverage
-        else:
-            # Longer expiry - lower leverage due to time decay
-            leverage_factor = spot_move_pct * 3  # 3x leverage
-        
-        # Cap the maximum gain to realistic levels
-        max_gain_pct = min(leverage_factor, 150)  # Max 150% gain
-        min_gain_pct = max(leverage_factor * 0.3, 20)  # Min 20% gain
-        
-        # Random gain within realistic range
-        expected_gain_pct = np.random.uniform(min_gain_pct, max_gain_pct)
-        
-        # Calculate target premium
-        target_premium = current_premium * (1 + expected_gain_pct / 100)
-        
-        return round(target_premium, 2), round(expected_gain_pct, 1)
-        
-    except Exception:
-        # Fallback calculation
-        fallback_gain = 30  # 30% gain
-        target_premium = current_premium * 1.3
-        return round(target_premium, 2), fallback_gain
+def calculate_target_premium(current_premium, spot_target, strike, option_type, days_to_expiry, volatility):
+    """(target premium, gain %): Black-Scholes value with the spot at its target
+
+    Valued like the strike-ladder scan: the target is reached after
+    LADDER_TARGET_HORIZON_DAYS (or at expiry, if sooner) at the contract's
+    volatility.
+    """
+    remaining_days = max(days_to_expiry - LADDER_TARGET_HORIZON_DAYS, 0.0)
+    target_premium = round(float(black_scholes_price(
+        spot_target, strike, years_to_expiry(remaining_days), volatility, option_type == 'CE'
+    )), 2)
+    gain_pct = round((target_premium / current_premium - 1) * 100, 1) if current_premium > 0 else 0.0
+    return target_premium, gain_pct
 
-def estimate_option_premium_enhanced(spot_price, strike, option_type, days_to_expiry, direction, is_fallback=False):
-    """Enhanced option premium estimation with fallback tracking"""
+def estimate_option_premium_enhanced(spot_price, strike, option_type, days_to_expiry, direction, is_fallback=False,
+                                     underlying_type='stock', volatility=None):
+    """Enhanced option premium estimation with fallback tracking
+
+    Priced with Black-Scholes like calculate_realistic_premium; the trade
+    direction no longer changes the premium.
+    """
     try:
-        # Calculate moneyness
-        if option_type == 'CE':
-            moneyness = spot_price / strike
-            itm_value = max(0, spot_price - strike)
-        else:  # PE
-            moneyness = strike / spot_price  
-            itm_value = max(0, strike - spot_price)
-        
-        # Time value
-        time_value_factor = np.sqrt(days_to_expiry / 30) * 0.8
-        
-        # Base premium
-        if moneyness > 1.02:  # ITM
-            base_premium = itm_value + (spot_price * 0.02 * time_value_factor)
-        elif moneyness > 0.98:  # ATM  
-            base_premium = spot_price * 0.03 * time_value_factor
-        else:  # OTM
-            base_premium = spot_price * 0.01 * time_value_factor
-        
-        # Direction-based adjustment
-        if direction.startswith('Bullish') and option_type == 'CE':
-            premium_multiplier = np.random.uniform(1.3, 2.8)
-        elif direction.startswith('Bearish') and option_type == 'PE':
-            premium_multiplier = np.random.uniform(1.3, 2.8)
-        else:
-            premium_multiplier = np.random.uniform(0.8, 1.8)
-        
-        estimated_premium = base_premium * premium_multiplier
-        
-        # Bounds checking
-        if estimated_premium < 5:
-            estimated_premium = np.random.uniform(5, 20)
-        elif estimated_premium > spot_price * 0.15:
-            estimated_premium = spot_price * 0.15
-        
-        premium_with_flag = round(estimated_premium, 2)
+        premium_with_flag = calculate_realistic_premium(
+            spot_price, strike, option_type, days_to_expiry, underlying_type, volatility
+        )
         if is_fallback:
             premium_with_flag = f"{premium_with_flag}*"
         
         return premium_with_flag
         
-    except:
-        fallback_premium = round(np.random.uniform(10, 50), 2)
+    except Exception:
+        fallback_premium = round(spot_price * 0.01, 2)
         return f"{fallback_premium}*"
 
-def generate_fno_opportunities():
-    """Generate comprehensive F&O opportunities with technical reasoning"""
+def underlying_volatility(chain, underlying, spot_price, expiry_date, underlying_type, vol_regime=None):
+    """(volatility, source) for pricing an underlying's options
+
+    The snapshot's ATM implied volatility, else the latest stored ATM IV
+    (options_history, if recent), else the assumed volatility.
+    """
+    vol = atm_implied_vol(chain, underlying, spot_price, expiry_date)
+    if vol:
+        return vol, 'Chain ATM IV'
+    vol = stored_iv(vol_regime)
+    if vol:
+        return vol, 'IV History'
+    return default_volatility(spot_price, underlying_type), 'Assumed Vol'
+
+def price_option_contract(chain, underlying, spot_price, strike, option_type, expiry_date, days_to_expiry, underlying_type,
+                          vol_regime=None):
+    """Premium, IV and Greeks for one contract
+
+    Uses the snapshot's LTP and implied volatility when it lists the contract,
+    else Black-Scholes at the underlying's volatility (underlying_volatility).
+    """
+    contract = lookup_contract(chain, underlying, strike, option_type, expiry_date)
+    if contract is not None and pd.notna(contract.get('iv')):
+        premium = round(float(contract['ltp']), 2)
+        vol = float(contract['iv'])
+        vol_source = 'Chain LTP/IV'
+    else:
+        vol, vol_source = underlying_volatility(chain, underlying, spot_price, expiry_date, underlying_type, vol_regime)
+        premium = calculate_realistic_premium(spot_price, strike, option_type, days_to_expiry, underlying_type, vol)
+    
+    greeks = black_scholes_greeks(spot_price, strike, years_to_expiry(days_to_expiry), vol, option_type == 'CE')
+    return {
+        'premium': premium,
+        'IV %': round(vol * 100, 1),
+        'Delta': round(float(greeks['delta']), 3),
+        'Gamma': round(float(greeks['gamma']), 5),
+        'Vega': round(float(greeks['vega']), 2),
+        'Theta': round(float(greeks['theta']), 2),
+        'Vol Source': vol_source
+    }
+
+def option_analytics_columns(contract):
+    """Recommendation columns for a priced contract"""
+    return {key: value for key, value in contract.items() if key != 'premium'}
+
+# Strike-ladder scan: days for the spot to reach its target, and the smallest
+# |delta| worth trading (filters far-OTM lottery tickets)
+LADDER_TARGET_HORIZON_DAYS = 5
+LADDER_MIN_ABS_DELTA = 0.15
+
+def collect_fno_underlyings(index_data, stock_data, expiry_dates):
+    """Indices and F&O stocks as dicts with name, spot, type, expiry, analysis, rsi and fallback_notes"""
+    underlyings = []
+    for name in ('NIFTY', 'BANKNIFTY'):
+        fallback_notes = []
+        if index_data['fallback_flags'].get(f'{name.lower()}_price'):
+            fallback_notes.append("Price*")
+        if index_data[f'{name}_ANALYSIS']['is_fallback']:
+            fallback_notes.append("Analysis*")
+        underlyings.append({
+            'name': name, 'spot': index_data[name], 'type': 'index', 'expiry': expiry_dates[name.lower()],
+            'analysis': index_data[f'{name}_ANALYSIS'], 'rsi': None, 'fallback_notes': fallback_notes
+        })
+    for stock, stock_info in stock_data.items():
+        fallback_notes = [note for flag, note in (('price', "Price*"), ('rsi', "RSI*"), ('analysis', "Analysis*"))
+                          if stock_info['fallback_flags'].get(flag)]
+        underlyings.append({
+            'name': stock, 'spot': stock_info['price'], 'type': 'stock', 'expiry': expiry_dates['stocks'],
+            'analysis': stock_info['bias_analysis'], 'rsi': stock_info['rsi'], 'fallback_notes': fallback_notes
+        })
+    if expiry_dates.get('is_fallback'):
+        for underlying in underlyings:
+            underlying['fallback_notes'].append("Expiry*")
+    return underlyings
+
+def compute_spot_targets(underlyings):
+    """Dict underlying -> spot target/SL data (calculate_spot_targets_with_reasoning), computed once per scan"""
+    return {
+        u['name']: calculate_spot_targets_with_reasoning(u['spot'], u['analysis'], u['type'], u['spot'])
+        for u in underlyings
+    }
+
+def scan_fno_strike_ladders(index_data, stock_data, expiry_dates, chain, width=10, top_k=3,
+                            min_abs_delta=LADDER_MIN_ABS_DELTA, vol_regimes=None, spot_targets=None):
+    """Score every CE/PE strike within +/- width intervals of ATM for all F&O underlyings
+
+    Each contract's expected return against its underlying's bias target and
+    stop comes from one vectorized pass (options_pricing.score_ladder_contracts);
+    the top_k contracts per underlying become recommendations. spot_targets
+    (compute_spot_targets) is computed here when not passed in.
+    """
+    now = datetime.now()
+    underlyings = collect_fno_underlyings(index_data, stock_data, expiry_dates)
+    
+    spot_targets = spot_targets or compute_spot_targets(underlyings)
+    spot_data = [spot_targets[u['name']] for u in underlyings]
+    spots = np.array([u['spot'] for u in underlyings], dtype=float)
+    days = np.array([days_until_expiry(u['expiry'], now) for u in underlyings])
+    vol_regimes = vol_regimes or {}
+    vols = np.array([
+        underlying_volatility(chain, u['name'], u['spot'], u['expiry'], u['type'], vol_regimes.get(u['name']))[0]
+        for u in underlyings
+    ])
+    strikes = ladder_grid(spots, [u['type'] for u in underlyings], width)
+    
+    scores = score_ladder_contracts(
+        spots, strikes, years_to_expiry(days), vols,
+        [s['spot_target'] for s in spot_data], [s['spot_sl'] for s in spot_data],
+        LADDER_TARGET_HORIZON_DAYS / DAYS_PER_YEAR
+    )
+    # Same side as the single-strike scan: PE for a bearish bias, CE otherwise; positive expectation only
+    wants_put = np.array([s['direction'] == 'Bearish' for s in spot_data])
+    side_matches = np.stack([~wants_put, wants_put], axis=1)[:, None, :]
+    tradable = side_matches & (np.abs(scores['delta']) >= min_abs_delta) & (scores['expected_return'] > 0)
+    expected_return = np.where(tradable, scores['expected_return'], np.nan)
+    rows, columns = top_k_per_row(expected_return.reshape(len(underlyings), -1), top_k)
+    
+    recommendations = []
+    for row, column in zip(rows, columns):
+        underlying, spot_info = underlyings[row], spot_data[row]
+        strike_index, type_index = divmod(int(column), 2)
+        strike = strikes[row, strike_index]
+        option_type = 'CE' if type_index == 0 else 'PE'
+        contract = price_option_contract(
+            chain, underlying['name'], underlying['spot'], strike, option_type,
+            underlying['expiry'], float(days[row]), underlying['type'], vol_regimes.get(underlying['name'])
+        )
+        target_premium = round(float(scores['target_value'][row, strike_index, type_index]), 2)
+        gain_pct = round((target_premium / contract['premium'] - 1) * 100, 1) if contract['premium'] > 0 else 0.0
+        
+        fallback_notes = underlying['fallback_notes']
+        recommendation = {
+            'Underlying': underlying['name'],
+            'Current Spot': underlying['spot'],
+            'Spot Target': spot_info['spot_target'],
+            'Spot SL': spot_info['spot_sl'],
+            'Spot Move %': f"{spot_info['target_pct']:.1f}%",
+            'Strike': int(strike),
+            'Option Type': option_type,
+            'Premium (LTP)': contract['premium'],
+            'Target Premium': target_premium,
+            'Option Gain %': gain_pct,
+            'Expected Return %': round(float(expected_return[row, strike_index, type_index]) * 100, 1),
+            'Target Prob %': round(float(scores['target_probability'][row]) * 100, 1),
+            'Days to Expiry': round(float(days[row]), 2),
+            'Expiry Date': underlying['expiry'].strftime('%d-%b-%Y'),
+            **option_analytics_columns(contract),
+            'Selection Reason': spot_info['reasoning'],
+            'Technical Bias': underlying['analysis']['bias'],
+            'Direction': spot_info['direction'],
+            'Strategy': f"{underlying['name']} {int(strike)} {option_type} - {underlying['analysis']['bias']} Setup",
+            'Risk Level': 'High' if underlying['name'] == 'BANKNIFTY' or gain_pct > 100 else 'Medium',
+            'Data Quality': "Real Data" if not fallback_notes else f"Mixed Data ({', '.join(fallback_notes)})"
+        }
+        if underlying['rsi'] is None:
+            recommendation['Bias Strength'] = underlying['analysis']['strength']
+        else:
+            recommendation['RSI Level'] = underlying['rsi']
+        recommendations.append(recommendation)
+    
+    return recommendations
+
+# Strategy search: per-unit risk limits as % of spot, and the margin share of spot per naked short call
+STRATEGY_MAX_LOSS_PCT = 5.0
+STRATEGY_MAX_MARGIN_PCT = 20.0
+NAKED_MARGIN_RATE = {'index': 0.12, 'stock': 0.20}
+
+def ladder_premiums(chain, underlying, spot, strikes, expiry_date, years, vol):
+    """(S, 2) [CE, PE] premiums for a strike row: snapshot LTP where listed at this expiry, else Black-Scholes"""
+    premiums = black_scholes_price(spot, strikes[:, None], years, vol, np.array([True, False])[None, :])
+    premiums = np.where(np.isnan(strikes)[:, None], np.nan, premiums)
+    if chain.empty:
+        return premiums
+    rows = chain[chain['underlying'] == underlying]
+    listed_expiry = matching_expiry(rows, expiry_date)
+    if listed_expiry is None:
+        return premiums
+    rows = rows[rows['expiry'] == listed_expiry]
+    for column, option_type in enumerate(('CE', 'PE')):
+        listed = rows[rows['option_type'] == option_type].drop_duplicates('strike').set_index('strike')['ltp']
+        ltp = pd.Series(strikes).map(listed).to_numpy(dtype=float)
+        premiums[:, column] = np.where(np.isnan(ltp), premiums[:, column], ltp)
+    return premiums
+
+def search_fno_strategies(index_data, stock_data, expiry_dates, chain, hist_vols, strategy_types=None, width=10,
+                          top_k=5, max_loss_pct=STRATEGY_MAX_LOSS_PCT, max_margin_pct=STRATEGY_MAX_MARGIN_PCT,
+                          min_pop=0.0, vol_regimes=None, spot_targets=None):
+    """Best multi-leg strategies per F&O underlying (verticals, straddles, strangles, iron condors)
+
+    Legs are enumerated once for the ladder size; each underlying's whole
+    strategy set is valued with one broadcast pass over its priced ladder
+    (option_strategies.evaluate_strategies) against a terminal-spot
+    distribution centred on the bias-weighted target/stop outcome at historical
+    volatility. Strategies over the max-loss or margin limits (% of spot) or
+    under min_pop are pruned; the rest rank by expected value, then
+    probability of profit. spot_targets is shared with the ladder scan
+    (compute_spot_targets; computed here when not passed in).
+    """
+    now = datetime.now()
+    strategies = enumerate_strategies(2 * width + 1, strategy_types or STRATEGY_TYPES)
+    if not len(strategies['name']):
+        return []
+    
+    underlyings = collect_fno_underlyings(index_data, stock_data, expiry_dates)
+    spot_targets = spot_targets or compute_spot_targets(underlyings)
+    recommendations = []
+    for underlying in underlyings:
+        spot = float(underlying['spot'])
+        days = days_until_expiry(underlying['expiry'], now)
+        years = float(years_to_expiry(days))
+        if years <= 0:
+            continue
+        strikes = ladder_grid([spot], [underlying['type']], width)[0]
+        vol, vol_source = underlying_volatility(
+            chain, underlying['name'], spot, underlying['expiry'], underlying['type'], (vol_regimes or {}).get(underlying['name'])
+        )
+        premiums = ladder_premiums(chain, underlying['name'], spot, strikes, underlying['expiry'], years, vol)
+        
+        spot_info = spot_targets[underlying['name']]
+        probability = float(target_hit_probability(spot, spot_info['spot_target'], spot_info['spot_sl']))
+        expected_spot = probability * spot_info['spot_target'] + (1 - probability) * spot_info['spot_sl']
+        # Same time to expiry as the leg premiums, so expiry-day legs aren't intrinsic against a day of spread
+        sigma_t = (hist_vols.get(underlying['name']) or vol) * np.sqrt(years)
+        
+        results = evaluate_strategies(strategies, strikes, premiums, expected_spot, sigma_t)
+        margin = strategy_margin(strategies, results['max_loss'], spot, NAKED_MARGIN_RATE[underlying['type']])
+        keep = results['valid'] & (results['expected_value'] > 0) & (results['pop'] >= min_pop)
+        if max_loss_pct is not None:
+            keep &= results['max_loss'] <= spot * max_loss_pct / 100
+        if max_margin_pct is not None:
+            keep &= margin <= spot * max_margin_pct / 100
+        candidates = np.flatnonzero(keep)
+        ranked = candidates[np.lexsort((-results['pop'][candidates], -results['expected_value'][candidates]))][:top_k]
+        
+        fallback_notes = underlying['fallback_notes']
+        for index in ranked:
+            max_loss, max_profit = results['max_loss'][index], results['max_profit'][index]
+            recommendations.append({
+                'Underlying': underlying['name'],
+                'Current Spot': spot,
+                'Strategy': strategies['name'][index],
+                'Legs': describe_legs(strategies, index, strikes),
+                'Net Debit': round(float(results['net_debit'][index]), 2),
+                'Max Loss': round(float(max_loss), 2) if np.isfinite(max_loss) else None,
+                'Max Profit': round(float(max_profit), 2) if np.isfinite(max_profit) else None,
+                'Margin': round(float(margin[index]), 2),
+                'Expected Value': round(float(results['expected_value'][index]), 2),
+                'EV / Margin %': round(float(results['expected_value'][index] / margin[index]) * 100, 1)
+                if margin[index] > 0 else None,
+                'POP %': round(float(results['pop'][index]) * 100, 1),
+                'Days to Expiry': round(days, 2),
+                'Expiry Date': underlying['expiry'].strftime('%d-%b-%Y'),
+                'IV %': round(vol * 100, 1),
+                'Vol Source': vol_source,
+                'Technical Bias': underlying['analysis']['bias'],
+                'Direction': spot_info['direction'],
+                'Data Quality': "Real Data" if not fallback_notes else f"Mixed Data ({', '.join(fallback_notes)})"
+            })
+    return recommendations
+
+def generate_fno_strategies(strategy_types=None, width=10, top_k=5, max_loss_pct=STRATEGY_MAX_LOSS_PCT,
+                            max_margin_pct=STRATEGY_MAX_MARGIN_PCT, min_pop=0.0, progress_callback=None):
+    """Multi-leg strategy recommendations for all F&O underlyings (see search_fno_strategies)"""
+    try:
+        market_data = load_fno_market_data(progress_callback)
+        df = pd.DataFrame(search_fno_strategies(
+            market_data['index_data'], market_data['stock_data'], market_data['expiry_dates'],
+            market_data['chain'], market_data['hist_vols'], strategy_types, width, top_k,
+            max_loss_pct, max_margin_pct, min_pop, market_data['vol_regimes'], market_data['spot_targets']
+        ))
+        if not df.empty:
+            df['Sort_Order'] = df['Underlying'].apply(lambda x: 0 if x in ['NIFTY', 'BANKNIFTY'] else 1)
+            df = df.sort_values(['Sort_Order', 'Underlying', 'Expected Value'], ascending=[True, True, False])
+            df = df.drop('Sort_Order', axis=1)
+        if progress_callback:
+            progress_callback(1.0, f"✅ Found {len(df)} F&O strategies")
+        return df
+    except Exception as e:
+        print(f"Error in F&O strategy search: {e}")
+        if progress_callback:
+            progress_callback(1.0, f"❌ Error in F&O strategy search: {e}")
+        return pd.DataFrame()
+
+def load_fno_market_data(progress_callback=None, cancel_event=None):
+    """Expiries, index and stock analysis, priced option chain, historical vols and vol regimes for all F&O underlyings
+
+    The priced chain and its ATM IVs go into the options history, so each
+    run extends the IV record the vol regimes are ranked against. Returns
+    None when cancel_event is set during the stock fetches.
+    """
+    if progress_callback:
+        progress_callback(0.0, "Fetching NIFTY and BANKNIFTY prices...")
+    expiry_dates = get_next_expiry_dates()
+    fno_stocks = get_expanded_fno_stocks()
+    underlying_names = ['NIFTY', 'BANKNIFTY'] + fno_stocks
+    
+    # Vol regimes from the stored IV history (new dated snapshot files are imported first)
+    try:
+        options_history = get_options_history()
+        options_history.import_snapshot_files()
+        vol_regimes = options_history.get_vol_regimes(underlying_names)
+    except Exception as e:
+        print(f"Error reading options history: {e}")
+        options_history, vol_regimes = None, {}
+    
+    # All underlyings in one grouped request; bars the equity scan already pulled are reused
+    get_price_cache().prefetch(list(INDEX_TICKERS.values()) + [f"{stock}.NS" for stock in fno_stocks], "1mo")
+    index_data = fetch_current_index_prices()
+    
+    # Stock fetches take the bulk of the time; map them onto 10%-90%
+    stock_progress = None
+    if progress_callback:
+        stock_progress = lambda fraction, message: progress_callback(0.1 + fraction * 0.8, message)
+    stock_data = fetch_stock_prices_with_analysis(fno_stocks, progress_callback=stock_progress, cancel_event=cancel_event,
+                                                  vol_regimes=vol_regimes)
+    
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    
+    # Option chain snapshot (recent quotes only): implied volatility and Greeks for every listed contract in one batch
+    spots = {'NIFTY': index_data['NIFTY'], 'BANKNIFTY': index_data['BANKNIFTY']}
+    spots.update({stock: info['price'] for stock, info in stock_data.items()})
+    chain = add_iv_and_greeks(fresh_quotes(load_chain_snapshot()), spots)
+    hist_vols = {'NIFTY': index_data.get('NIFTY_HIST_VOL'), 'BANKNIFTY': index_data.get('BANKNIFTY_HIST_VOL')}
+    hist_vols.update({stock: info.get('hist_vol') for stock, info in stock_data.items()})
+    
+    if options_history is not None and not chain.empty:
+        try:
+            options_history.save_chain(chain, datetime.now(), hist_vols)
+            vol_regimes = options_history.get_vol_regimes(underlying_names)
+        except Exception as e:
+            print(f"Error saving options history: {e}")
+    return {
+        'expiry_dates': expiry_dates, 'fno_stocks': fno_stocks, 'index_data': index_data,
+        'stock_data': stock_data, 'chain': chain, 'hist_vols': hist_vols, 'vol_regimes': vol_regimes,
+        'spot_targets': compute_spot_targets(collect_fno_underlyings(index_data, stock_data, expiry_dates))
+    }
+
+def add_vol_regime_columns(df, vol_regimes):
+    """Recommendations with IV rank, IV percentile and IV minus realized vol of their underlying"""
+    if df.empty:
+        return df
+    df = df.copy()
+    for column, key in (('IV Rank', 'iv_rank'), ('IV Percentile', 'iv_percentile'), ('IV-RV Spread', 'iv_rv_spread')):
+        df[column] = df['Underlying'].map(lambda name: (vol_regimes.get(name) or {}).get(key))
+    return df
+
+# Monte Carlo outcome simulation for every recommendation (fixed seed: same inputs, same numbers).
+# 20k paths keep the standard error of the probabilities under 0.4 points; scans can ask for more
+MONTE_CARLO_PATHS = 20_000
+MONTE_CARLO_SEED = 42
+
+def add_simulated_outcomes(df, hist_vols, n_paths=MONTE_CARLO_PATHS, seed=MONTE_CARLO_SEED, workers=1):
+    """Recommendations with Monte Carlo outcome columns for holding each option to target, SL or expiry
+
+    Paths use each underlying's historical volatility (hist_vols maps
+    underlying -> vol; implied volatility when missing); exits are repriced
+    at the contract's implied volatility. All contracts are simulated in one batch.
+    """
+    if df.empty:
+        return df
+    df = df.copy()
+    pricing_vols = df['IV %'].astype(float) / 100
+    path_vols = df['Underlying'].map(hist_vols).astype(float).fillna(pricing_vols)
+    outcomes = simulate_option_outcomes(
+        df['Current Spot'].astype(float), df['Strike'].astype(float), df['Option Type'] == 'CE',
+        df['Days to Expiry'].astype(float), df['Premium (LTP)'].astype(float),
+        df['Spot Target'].astype(float), df['Spot SL'].astype(float),
+        path_vols.to_numpy(), pricing_vols.to_numpy(), n_paths=n_paths, seed=seed, workers=workers,
+        percentiles=(5, 50, 95)
+    )
+    df['MC Target Prob %'] = np.round(outcomes['target_probability'] * 100, 1)
+    df['MC SL Prob %'] = np.round(outcomes['stop_probability'] * 100, 1)
+    df['MC Expected P&L'] = np.round(outcomes['expected_pnl'], 2)
+    df['MC Expected Return %'] = np.round(outcomes['expected_return'] * 100, 1)
+    for column, values in zip(('MC P&L P5', 'MC P&L P50', 'MC P&L P95'), outcomes['pnl_percentiles'].T):
+        df[column] = np.round(values, 2)
+    return df
+
+def generate_fno_opportunities(progress_callback=None, cancel_event=None, ladder_width=0, top_k=3,
+                               simulation_paths=MONTE_CARLO_PATHS, simulation_workers=1):
+    """Generate comprehensive F&O opportunities with technical reasoning
+
+    progress_callback(fraction, message) is called as the scan advances so
+    callers (dashboard, scan daemon) can render progress their own way.
+    Setting cancel_event (a threading.Event) abandons the scan after the
+    current stock fetch and returns an empty DataFrame. With ladder_width > 0
+    every strike within that many intervals of ATM is scored for every F&O
+    underlying and the top_k contracts per underlying are returned. Each
+    recommendation carries Monte Carlo outcome columns from simulation_paths
+    paths (0 skips the simulation), spread over simulation_workers processes.
+    """
     
     try:
         # Get current data with fallback tracking
-        expiry_dates = get_next_expiry_dates()
-        index_data = fetch_current_index_prices()
-        
-        fno_stocks = get_expanded_fno_stocks()
-        stock_data = fetch_stock_prices_with_analysis(fno_stocks)
+        market_data = load_fno_market_data(progress_callback, cancel_event)
+        if market_data is None:
+            if progress_callback:
+                progress_callback(1.0, "⏹️ F&O scan cancelled")
+            return pd.DataFrame()
+        expiry_dates, fno_stocks = market_data['expiry_dates'], market_data['fno_stocks']
+        index_data, stock_data = market_data['index_data'], market_data['stock_data']
+        chain, hist_vols = market_data['chain'], market_data['hist_vols']
+        vol_regimes, spot_targets = market_data['vol_regimes'], market_data['spot_targets']
         
         recommendations = []
         
+        if ladder_width:
+            df = pd.DataFrame(scan_fno_strike_ladders(
+                index_data, stock_data, expiry_dates, chain, width=ladder_width, top_k=top_k, vol_regimes=vol_regimes,
+                spot_targets=spot_targets
+            ))
+            df = add_vol_regime_columns(df, vol_regimes)
+            if simulation_paths:
+                df = add_simulated_outcomes(df, hist_vols, simulation_paths, workers=simulation_workers)
+            if not df.empty:
+                df['Sort_Order'] = df['Underlying'].apply(lambda x: 0 if x in ['NIFTY', 'BANKNIFTY'] else 1)
+                df = df.sort_values(['Sort_Order', 'Underlying', 'Expected Return %'], ascending=[True, True, False])
+                df = df.drop('Sort_Order', axis=1)
+            if progress_callback:
+                progress_callback(1.0, f"✅ Scored strike ladders: {len(df)} F&O opportunities")
+            return df
+        
         # === NIFTY OPTIONS ===
         nifty_price = index_data['NIFTY']
         nifty_analysis = index_data['NIFTY_ANALYSIS']
-        nifty_expiry_days = (expiry_dates['nifty'] - datetime.now()).days
+        nifty_expiry_days = days_until_expiry(expiry_dates['nifty'])
         
         # Get spot analysis
-        nifty_spot_data = calculate_spot_targets_with_reasoning(
-            nifty_price, nifty_analysis, 'index', nifty_price
-        )
+        nifty_spot_data = spot_targets['NIFTY']
         
         # NIFTY: Show ONLY 1 best opportunity
         nifty_strikes = get_correct_strike_prices(nifty_price, 'index')
@@ -686,14 +997,17 @@ def generate_fno_opportunities():
         else:
             primary_option_type = 'CE'
         
-        # Calculate realistic premium
-        option_premium = calculate_realistic_premium(
-            nifty_price, atm_strike, primary_option_type, nifty_expiry_days, 'index'
+        # Premium, IV and Greeks (snapshot LTP/IV when available)
+        contract = price_option_contract(
+            chain, 'NIFTY', nifty_price, atm_strike, primary_option_type,
+            expiry_dates['nifty'], nifty_expiry_days, 'index', vol_regimes.get('NIFTY')
         )
+        option_premium = contract['premium']
         
-        # Calculate realistic target premium
-        target_premium, gain_pct = calculate_realistic_target(
-            option_premium, nifty_spot_data['target_pct'], primary_option_type, nifty_expiry_days
+        # Contract value with the spot at its target
+        target_premium, gain_pct = calculate_target_premium(
+            option_premium, nifty_spot_data['spot_target'], atm_strike, primary_option_type, nifty_expiry_days,
+            contract['IV %'] / 100
         )
         
         # Create fallback indicators
@@ -718,8 +1032,9 @@ def generate_fno_opportunities():
             'Premium (LTP)': option_premium,
             'Target Premium': target_premium,
             'Option Gain %': gain_pct,
-            'Days to Expiry': nifty_expiry_days,
+            'Days to Expiry': round(nifty_expiry_days, 2),
             'Expiry Date': expiry_dates['nifty'].strftime('%d-%b-%Y'),
+            **option_analytics_columns(contract),
             'Selection Reason': nifty_spot_data['reasoning'],
             'Technical Bias': nifty_analysis['bias'],
             'Bias Strength': nifty_analysis['strength'],
@@ -732,11 +1047,9 @@ def generate_fno_opportunities():
         # === BANKNIFTY OPTIONS ===
         banknifty_price = index_data['BANKNIFTY']
         banknifty_analysis = index_data['BANKNIFTY_ANALYSIS']
-        banknifty_expiry_days = (expiry_dates['banknifty'] - datetime.now()).days
+        banknifty_expiry_days = days_until_expiry(expiry_dates['banknifty'])
         
-        banknifty_spot_data = calculate_spot_targets_with_reasoning(
-            banknifty_price, banknifty_analysis, 'index', banknifty_price
-        )
+        banknifty_spot_data = spot_targets['BANKNIFTY']
         
         # BANKNIFTY: Show ONLY 1 best opportunity
         banknifty_strikes = get_correct_strike_prices(banknifty_price, 'index')
@@ -747,14 +1060,17 @@ def generate_fno_opportunities():
         else:
             primary_option_type = 'CE'
         
-        # Calculate realistic premium
-        option_premium = calculate_realistic_premium(
-            banknifty_price, atm_strike, primary_option_type, banknifty_expiry_days, 'index'
+        # Premium, IV and Greeks (snapshot LTP/IV when available)
+        contract = price_option_contract(
+            chain, 'BANKNIFTY', banknifty_price, atm_strike, primary_option_type,
+            expiry_dates['banknifty'], banknifty_expiry_days, 'index', vol_regimes.get('BANKNIFTY')
         )
+        option_premium = contract['premium']
         
-        # Calculate realistic target premium
-        target_premium, gain_pct = calculate_realistic_target(
-            option_premium, banknifty_spot_data['target_pct'], primary_option_type, banknifty_expiry_days
+        # Contract value with the spot at its target
+        target_premium, gain_pct = calculate_target_premium(
+            option_premium, banknifty_spot_data['spot_target'], atm_strike, primary_option_type, banknifty_expiry_days,
+            contract['IV %'] / 100
         )
         
         # Fallback tracking
@@ -777,8 +1093,9 @@ def generate_fno_opportunities():
             'Premium (LTP)': option_premium,
             'Target Premium': target_premium,
             'Option Gain %': gain_pct,
-            'Days to Expiry': banknifty_expiry_days,
+            'Days to Expiry': round(banknifty_expiry_days, 2),
             'Expiry Date': expiry_dates['banknifty'].strftime('%d-%b-%Y'),
+            **option_analytics_columns(contract),
             'Selection Reason': banknifty_spot_data['reasoning'],
             'Technical Bias': banknifty_analysis['bias'],
             'Bias Strength': banknifty_analysis['strength'],
@@ -789,7 +1106,7 @@ def generate_fno_opportunities():
         })
         
         # === STOCK OPTIONS ===
-        stock_expiry_days = (expiry_dates['stocks'] - datetime.now()).days
+        stock_expiry_days = days_until_expiry(expiry_dates['stocks'])
         
         # Process top 8 stocks with strong bias
         processed_stocks = 0
@@ -806,9 +1123,7 @@ def generate_fno_opportunities():
                 stock_info['rsi'] < 35 or stock_info['rsi'] > 65):
                 
                 # Get spot analysis
-                spot_data = calculate_spot_targets_with_reasoning(
-                    stock_price, bias_analysis, 'stock', stock_price
-                )
+                spot_data = spot_targets[stock]
                 
                 # Get best strike
                 stock_strikes = get_correct_strike_prices(stock_price, 'stock')
@@ -820,14 +1135,17 @@ def generate_fno_opportunities():
                 else:
                     option_type = 'CE'
                 
-                # Calculate realistic premium for stock option
-                option_premium = calculate_realistic_premium(
-                    stock_price, best_strike, option_type, stock_expiry_days, 'stock'
+                # Premium, IV and Greeks for the stock option (snapshot LTP/IV when available)
+                contract = price_option_contract(
+                    chain, stock, stock_price, best_strike, option_type,
+                    expiry_dates['stocks'], stock_expiry_days, 'stock', vol_regimes.get(stock)
                 )
+                option_premium = contract['premium']
                 
-                # Calculate realistic target premium
-                target_premium, gain_pct = calculate_realistic_target(
-                    option_premium, spot_data['target_pct'], option_type, stock_expiry_days
+                # Contract value with the spot at its target
+                target_premium, gain_pct = calculate_target_premium(
+                    option_premium, spot_data['spot_target'], best_strike, option_type, stock_expiry_days,
+                    contract['IV %'] / 100
                 )
                 
                 # Check gain potential (realistic range)
@@ -855,8 +1173,9 @@ def generate_fno_opportunities():
                         'Premium (LTP)': option_premium,
                         'Target Premium': target_premium,
                         'Option Gain %': gain_pct,
-                        'Days to Expiry': stock_expiry_days,
+                        'Days to Expiry': round(stock_expiry_days, 2),
                         'Expiry Date': expiry_dates['stocks'].strftime('%d-%b-%Y'),
+                        **option_analytics_columns(contract),
                         'Selection Reason': spot_data['reasoning'],
                         'Technical Bias': bias_analysis['bias'],
                         'RSI Level': stock_info['rsi'],
@@ -869,20 +1188,47 @@ def generate_fno_opportunities():
                     processed_stocks += 1
         
         # Convert to DataFrame and sort
-        df = pd.DataFrame(recommendations)
+        df = add_vol_regime_columns(pd.DataFrame(recommendations), vol_regimes)
+        if simulation_paths:
+            df = add_simulated_outcomes(df, hist_vols, simulation_paths, workers=simulation_workers)
         if not df.empty:
             # Sort: Indices first, then by bias strength
             df['Sort_Order'] = df['Underlying'].apply(lambda x: 0 if x in ['NIFTY', 'BANKNIFTY'] else 1)
             df = df.sort_values(['Sort_Order', 'Bias Strength', 'Option Gain %'], ascending=[True, False, False])
             df = df.drop('Sort_Order', axis=1)
         
+        if progress_callback:
+            progress_callback(1.0, f"✅ Generated {len(df)} F&O opportunities")
+        
         return df
         
     except Exception as e:
         # Emergency fallback
-        st.error(f"Error in F&O generation: {e}")
+        print(f"Error in F&O generation: {e}")
+        if progress_callback:
+            progress_callback(1.0, f"❌ Error in F&O generation: {e}")
         return pd.DataFrame()
 
+def recommendation_scenarios(df, spot_shocks_pct=SPOT_SHOCKS_PCT, vol_shifts=VOL_SHIFTS, day_steps=DAY_STEPS):
+    """Spot move x days left x vol shift P&L table for each recommendation, in row order
+
+    Contracts are priced at their IV % and entry premium; tables are cached
+    per contract and market-data bucket (option_scenarios.ScenarioGridCache).
+    """
+    if df.empty:
+        return []
+    contracts = pd.DataFrame({
+        'underlying': df['Underlying'],
+        'strike': df['Strike'].astype(float),
+        'option_type': df['Option Type'],
+        'expiry': df['Expiry Date'],
+        'spot': df['Current Spot'].astype(float),
+        'days_to_expiry': df['Days to Expiry'].astype(float),
+        'vol': df['IV %'].astype(float) / 100,
+        'premium': df['Premium (LTP)'].astype(float)
+    })
+    return get_scenario_cache().get_many(contracts, spot_shocks_pct, vol_shifts, day_steps)
+
 def get_options_summary(df):
     """Enhanced options summary with fallback tracking"""
     if df.empty:
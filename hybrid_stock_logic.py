@@ -1,8 +1,8 @@
 
-import yfinance as yf
 import pandas as pd
 import datetime
 import streamlit as st
+from market_data_provider import get_market_data
 
 def get_indian_recos():
     symbols = pd.read_csv("https://archives.nseindia.com/content/indices/ind_nifty500list.csv")["Symbol"].tolist()
@@ -11,7 +11,7 @@ def get_indian_recos():
     for symbol in symbols:
         symbol_ns = symbol + ".NS"
         try:
-            data = yf.download(symbol_ns, period="6mo", interval="1d", progress=False)
+            data = get_market_data().history(symbol_ns, period="6mo", interval="1d")
             if data.empty:
                 print("No data for", symbol)
                 continue
@@ -55,7 +55,7 @@ def get_us_recos():
     print("Total stocks being checked (US):", len(symbols))
     for symbol in symbols:
         try:
-            data = yf.download(symbol, period="6mo", interval="1d", progress=False)
+            data = get_market_data().history(symbol, period="6mo", interval="1d")
             if data.empty:
                 print("No data for", symbol)
                 continue
@@ -1,10 +1,8 @@
 # indian_stock_logic.py - ENHANCED WITH TECHNICAL REASONING
-import streamlit as st
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
 import numpy as np
-import time
+from price_cache import get_price_cache
 
 def calculate_rsi(data, window=14):
     """Calculate RSI indicator with fallback tracking"""
@@ -180,6 +178,51 @@ def get_expanded_nse_universe():
         "DIXON.NS", "SYMPHONY.NS", "IRCTC.NS", "BEL.NS", "HAL.NS"
     ]
 
+def get_nse_stock_sector(symbol):
+    """Sector mapping for the NSE universe (symbol with or without .NS)"""
+    sector_mapping = {
+        # Large Cap - Core Holdings
+        'RELIANCE': 'Energy', 'TCS': 'IT', 'HDFCBANK': 'Banking', 'INFY': 'IT', 'ICICIBANK': 'Banking',
+        'KOTAKBANK': 'Banking', 'SBIN': 'Banking', 'BHARTIARTL': 'Telecom', 'ASIANPAINT': 'Consumer',
+        'ITC': 'FMCG', 'AXISBANK': 'Banking', 'LT': 'Infrastructure', 'SUNPHARMA': 'Pharma',
+        'TITAN': 'Consumer', 'WIPRO': 'IT', 'MARUTI': 'Auto', 'BAJFINANCE': 'Financial Services',
+        'TATASTEEL': 'Metals', 'ONGC': 'Energy', 'COALINDIA': 'Metals',
+
+        # Banking & Financial Services
+        'HDFCLIFE': 'Financial Services', 'ICICIGI': 'Financial Services', 'SBILIFE': 'Financial Services',
+        'BAJAJFINSV': 'Financial Services', 'INDUSINDBK': 'Banking', 'BANDHANBNK': 'Banking',
+        'FEDERALBNK': 'Banking', 'IDFCFIRSTB': 'Banking', 'PNB': 'Banking', 'CANBK': 'Banking',
+
+        # Technology & IT Services
+        'HCLTECH': 'IT', 'TECHM': 'IT', 'LTIM': 'IT', 'MPHASIS': 'IT', 'PERSISTENT': 'IT',
+
+        # Pharmaceuticals & Healthcare
+        'DRREDDY': 'Pharma', 'CIPLA': 'Pharma', 'APOLLOHOSP': 'Healthcare', 'FORTIS': 'Healthcare',
+        'BIOCON': 'Pharma', 'DIVISLAB': 'Pharma', 'GLENMARK': 'Pharma', 'AUROPHARMA': 'Pharma', 'LUPIN': 'Pharma',
+
+        # Consumer Goods & FMCG
+        'HINDUNILVR': 'FMCG', 'NESTLEIND': 'FMCG', 'BRITANNIA': 'FMCG', 'DABUR': 'FMCG', 'MARICO': 'FMCG',
+        'GODREJCP': 'FMCG', 'COLPAL': 'FMCG', 'UBL': 'FMCG', 'TATACONSUM': 'FMCG',
+
+        # Automobiles & Auto Ancillaries
+        'M&M': 'Auto', 'BAJAJ-AUTO': 'Auto', 'HEROMOTOCO': 'Auto', 'TATAMOTORS': 'Auto', 'EICHERMOT': 'Auto',
+        'APOLLOTYRE': 'Auto', 'MRF': 'Auto', 'MOTHERSON': 'Auto', 'BOSCHLTD': 'Auto',
+
+        # Oil, Gas & Energy
+        'BPCL': 'Energy', 'IOC': 'Energy', 'HINDPETRO': 'Energy', 'GAIL': 'Energy', 'NTPC': 'Power',
+        'POWERGRID': 'Power', 'ADANIPOWER': 'Power', 'TATAPOWER': 'Power',
+
+        # Metals & Mining
+        'HINDALCO': 'Metals', 'VEDL': 'Metals', 'JSWSTEEL': 'Metals', 'SAIL': 'Metals', 'NMDC': 'Metals',
+        'JINDALSTEL': 'Metals', 'HINDZINC': 'Metals', 'WELCORP': 'Metals',
+
+        # Additional Quality Stocks
+        'PIDILITIND': 'Chemicals', 'BERGEPAINT': 'Consumer', 'HAVELLS': 'Consumer Durables',
+        'VOLTAS': 'Consumer Durables', 'DIXON': 'Consumer Durables', 'SYMPHONY': 'Consumer Durables',
+        'IRCTC': 'Travel', 'BEL': 'Defense', 'HAL': 'Defense'
+    }
+    return sector_mapping.get(symbol.replace('.NS', ''), 'Other')
+
 def calculate_dynamic_targets(data, current_price):
     """Calculate dynamic targets with fallback tracking"""
     try:
@@ -307,207 +350,227 @@ def calculate_dynamic_targets(data, current_price):
             }
         }
 
-def get_indian_recommendations(min_price=25, max_rsi=70, min_volume=50000, batch_size=50):
-    """ENHANCED: Get Indian stock recommendations with technical reasoning"""
+def analyze_indian_symbol(symbol, min_price, max_rsi, min_volume):
+    """Analyze one symbol; returns (passed_filters, recommendation dict or None)"""
+    passed = False
     
-    try:
-        symbols = get_expanded_nse_universe()
-        recommendations = []
+    # Fetch data
+    data = get_price_cache().get_history(symbol, "3mo")
+    
+    if len(data) < 30:
+        return False, None
+    
+    # Calculate indicators with fallback tracking
+    data['RSI'], rsi_is_fallback = calculate_rsi(data)
+    data['EMA20'] = data['Close'].ewm(span=20).mean()
+    data['EMA50'] = data['Close'].ewm(span=50).mean()
+    data['SMA20'] = data['Close'].rolling(20).mean()
+    
+    # MACD
+    exp1 = data['Close'].ewm(span=12).mean()
+    exp2 = data['Close'].ewm(span=26).mean()
+    data['MACD'] = exp1 - exp2
+    data['MACD_Signal'] = data['MACD'].ewm(span=9).mean()
+    
+    latest = data.iloc[-1]
+    current_price = latest['Close']
+    rsi = latest['RSI']
+    
+    # Volume handling with fallback tracking
+    avg_volume = data['Volume'].tail(10).mean() if 'Volume' in data.columns else min_volume
+    volume_is_fallback = 'Volume' not in data.columns
+    
+    # Apply filters
+    if (current_price >= min_price and 
+        rsi <= max_rsi and
+        not pd.isna(rsi) and 
+        not pd.isna(current_price) and
+        avg_volume >= min_volume * 0.3):
+        
+        passed = True
+        
+        # Analyze technical patterns
+        pattern_analysis = analyze_technical_patterns(data, symbol)
+        
+        # Calculate dynamic targets
+        target_data = calculate_dynamic_targets(data, current_price)
+        
+        # Technical score calculation
+        technical_score = 0
+        score_components = []
+        
+        # Trend alignment
+        if latest['Close'] > latest['EMA20']:
+            technical_score += 1
+            score_components.append("Above EMA20")
+        if latest['EMA20'] > latest['EMA50']:
+            technical_score += 1
+            score_components.append("EMA Bullish")
+        
+        # RSI conditions
+        if 25 <= rsi <= 70:
+            technical_score += 1
+            score_components.append("Good RSI")
+        
+        # MACD signal
+        if latest['MACD'] > latest['MACD_Signal']:
+            technical_score += 1
+            score_components.append("MACD+")
+        
+        # Volume confirmation
+        if target_data['volume_surge'] and not target_data['fallback_flags'].get('volume', False):
+            technical_score += 1
+            score_components.append("Volume+")
+        
+        # Include stocks with 2+ conditions
+        if technical_score >= 2:
+            
+            # Risk rating
+            if target_data['volatility'] > 0.35:
+                risk_rating = 'High'
+            elif target_data['volatility'] > 0.25:
+                risk_rating = 'Medium'
+            else:
+                risk_rating = 'Low'
+            
+            # Create fallback indicators
+            fallback_indicators = []
+            if rsi_is_fallback:
+                fallback_indicators.append("RSI*")
+            if target_data['fallback_flags'].get('volume', False):
+                fallback_indicators.append("Vol*")
+            if target_data['fallback_flags'].get('volatility', False):
+                fallback_indicators.append("Volatility*")
+            if target_data['fallback_flags'].get('complete_fallback', False):
+                fallback_indicators.append("Targets*")
+                
+            fallback_note = " (" + ", ".join(fallback_indicators) + ")" if fallback_indicators else ""
+            
+            return passed, {
+                'Date': datetime.now().strftime('%Y-%m-%d'),
+                'Stock': symbol.replace('.NS', ''),
+                'LTP': round(current_price, 2),
+                'RSI': round(rsi, 1),
+                'Target': round(target_data['target'], 2),
+                '% Gain': round(target_data['target_pct'], 1),
+                'Est.Days': target_data['estimated_days'],
+                'Stop Loss': round(target_data['stop_loss'], 2),
+                'SL %': round(target_data['sl_pct'], 1),
+                'Risk:Reward': f"1:{target_data['risk_reward_ratio']}",
+                'Selection Reason': pattern_analysis['all_reasons'],
+                'Primary Pattern': pattern_analysis['primary_reason'],
+                'Volume': int(avg_volume),
+                'Risk': risk_rating,
+                'Tech Score': f"{technical_score}/5",
+                'Volatility': f"{target_data['volatility']:.1%}",
+                'Data Quality': f"Real Data{fallback_note}" if not fallback_indicators else f"Mixed Data{fallback_note}",
+                'Status': 'Active'
+            }
+    
+    return passed, None
+
+def rank_indian_recommendations(recommendations, top_n=20):
+    """Sort candidates the way the final scan table is sorted and keep the top N"""
+    df = pd.DataFrame(recommendations)
+    if not df.empty:
+        df = df.sort_values(['Tech Score', '% Gain'], ascending=[False, False])
+        df = df.head(top_n)
+    return df
+
+# Symbols per grouped price download; the scan reports progress and checks for cancellation between chunks
+PREFETCH_CHUNK_SIZE = 25
+
+def scan_indian_stocks(min_price=25, max_rsi=70, min_volume=50000, batch_size=50, chunk_size=PREFETCH_CHUNK_SIZE):
+    """Generator that yields one event per analyzed symbol
+    
+    Events are dicts with 'done', 'total', 'symbol', 'passed' (symbol passed the
+    price/RSI/volume filters) and 'candidate' (recommendation dict or None).
+    A first event with done=0 announces the total before any data is fetched;
+    events with symbol None and 'fetching' (chunk size) precede each grouped
+    download of chunk_size symbols, so a consumer that stops there never
+    starts that download.
+    """
+    symbols = get_expanded_nse_universe()
+    total_symbols = min(len(symbols), batch_size)
+    
+    yield {'done': 0, 'total': total_symbols, 'symbol': None, 'passed': False, 'candidate': None}
+    
+    for start in range(0, total_symbols, chunk_size):
+        chunk = symbols[start:min(start + chunk_size, total_symbols)]
+        yield {'done': start, 'total': total_symbols, 'symbol': None, 'passed': False, 'candidate': None,
+               'fetching': len(chunk)}
         
-        # Show progress
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        # One grouped download per chunk; the per-symbol analysis below reads the cache
+        get_price_cache().prefetch(chunk, "3mo")
         
-        total_symbols = min(len(symbols), batch_size)
+        for i, symbol in enumerate(chunk, start):
+            try:
+                passed, candidate = analyze_indian_symbol(symbol, min_price, max_rsi, min_volume)
+            except Exception as e:
+                passed, candidate = False, None
+            
+            yield {'done': i + 1, 'total': total_symbols, 'symbol': symbol, 'passed': passed, 'candidate': candidate}
+
+def get_indian_recommendations(min_price=25, max_rsi=70, min_volume=50000, batch_size=50, progress_callback=None,
+                               results_callback=None, results_every=10, cancel_event=None):
+    """ENHANCED: Get Indian stock recommendations with technical reasoning
+
+    progress_callback(fraction, message) is called as the scan advances so
+    callers (dashboard, scan daemon) can render progress their own way.
+    results_callback(top_df) receives the current ranked top 20 every
+    results_every symbols (when new candidates came in) for a live table.
+    Setting cancel_event (a threading.Event) stops the scan before the next
+    symbol is analyzed or the next chunk of prices is downloaded; the
+    candidates found so far are returned.
+    """
+    
+    try:
+        recommendations = []
         successful_fetches = 0
+        total_symbols = 0
+        new_since_update = False
         
-        status_text.text(f"Starting enhanced scan of {total_symbols} Indian stocks...")
-        
-        for i, symbol in enumerate(symbols[:total_symbols]):
-            try:
-                progress_bar.progress((i + 1) / total_symbols)
-                status_text.text(f"Analyzing {symbol.replace('.NS', '')}... ({i+1}/{total_symbols})")
-                
-                time.sleep(0.1)
-                
-                # Fetch data
-                stock = yf.Ticker(symbol)
-                data = stock.history(period="3mo", interval="1d")
-                
-                if len(data) < 30:
-                    continue
-                
-                # Calculate indicators with fallback tracking
-                data['RSI'], rsi_is_fallback = calculate_rsi(data)
-                data['EMA20'] = data['Close'].ewm(span=20).mean()
-                data['EMA50'] = data['Close'].ewm(span=50).mean()
-                data['SMA20'] = data['Close'].rolling(20).mean()
-                
-                # MACD
-                exp1 = data['Close'].ewm(span=12).mean()
-                exp2 = data['Close'].ewm(span=26).mean()
-                data['MACD'] = exp1 - exp2
-                data['MACD_Signal'] = data['MACD'].ewm(span=9).mean()
-                
-                latest = data.iloc[-1]
-                current_price = latest['Close']
-                rsi = latest['RSI']
+        for event in scan_indian_stocks(min_price, max_rsi, min_volume, batch_size):
+            total_symbols = event['total']
+            
+            if event['symbol'] is None:
+                if progress_callback and event.get('fetching'):
+                    progress_callback(event['done'] / total_symbols, f"Fetching prices for {event['fetching']} stocks... ({event['done']}/{total_symbols})")
+                elif progress_callback:
+                    progress_callback(0.0, f"Starting enhanced scan of {total_symbols} Indian stocks...")
+            else:
+                if event['passed']:
+                    successful_fetches += 1
+                if event['candidate'] is not None:
+                    recommendations.append(event['candidate'])
+                    new_since_update = True
                 
-                # Volume handling with fallback tracking
-                avg_volume = data['Volume'].tail(10).mean() if 'Volume' in data.columns else min_volume
-                volume_is_fallback = 'Volume' not in data.columns
+                if progress_callback:
+                    progress_callback(event['done'] / total_symbols, f"Analyzing {event['symbol'].replace('.NS', '')}... ({event['done']}/{total_symbols})")
                 
-                # Apply filters
-                if (current_price >= min_price and 
-                    rsi <= max_rsi and
-                    not pd.isna(rsi) and 
-                    not pd.isna(current_price) and
-                    avg_volume >= min_volume * 0.3):
-                    
-                    successful_fetches += 1
-                    
-                    # Analyze technical patterns
-                    pattern_analysis = analyze_technical_patterns(data, symbol)
-                    
-                    # Calculate dynamic targets
-                    target_data = calculate_dynamic_targets(data, current_price)
-                    
-                    # Technical score calculation
-                    technical_score = 0
-                    score_components = []
-                    
-                    # Trend alignment
-                    if latest['Close'] > latest['EMA20']:
-                        technical_score += 1
-                        score_components.append("Above EMA20")
-                    if latest['EMA20'] > latest['EMA50']:
-                        technical_score += 1
-                        score_components.append("EMA Bullish")
-                    
-                    # RSI conditions
-                    if 25 <= rsi <= 70:
-                        technical_score += 1
-                        score_components.append("Good RSI")
-                    
-                    # MACD signal
-                    if latest['MACD'] > latest['MACD_Signal']:
-                        technical_score += 1
-                        score_components.append("MACD+")
-                    
-                    # Volume confirmation
-                    if target_data['volume_surge'] and not target_data['fallback_flags'].get('volume', False):
-                        technical_score += 1
-                        score_components.append("Volume+")
-                    
-                    # Include stocks with 2+ conditions
-                    if technical_score >= 2:
-                        
-                        # Risk rating
-                        if target_data['volatility'] > 0.35:
-                            risk_rating = 'High'
-                        elif target_data['volatility'] > 0.25:
-                            risk_rating = 'Medium'
-                        else:
-                            risk_rating = 'Low'
-                        
-                        # Create fallback indicators
-                        fallback_indicators = []
-                        if rsi_is_fallback:
-                            fallback_indicators.append("RSI*")
-                        if target_data['fallback_flags'].get('volume', False):
-                            fallback_indicators.append("Vol*")
-                        if target_data['fallback_flags'].get('volatility', False):
-                            fallback_indicators.append("Volatility*")
-                        if target_data['fallback_flags'].get('complete_fallback', False):
-                            fallback_indicators.append("Targets*")
-                            
-                        fallback_note = " (" + ", ".join(fallback_indicators) + ")" if fallback_indicators else ""
-                        
-                        recommendations.append({
-                            'Date': datetime.now().strftime('%Y-%m-%d'),
-                            'Stock': symbol.replace('.NS', ''),
-                            'LTP': round(current_price, 2),
-                            'RSI': round(rsi, 1),
-                            'Target': round(target_data['target'], 2),
-                            '% Gain': round(target_data['target_pct'], 1),
-                            'Est.Days': target_data['estimated_days'],
-                            'Stop Loss': round(target_data['stop_loss'], 2),
-                            'SL %': round(target_data['sl_pct'], 1),
-                            'Risk:Reward': f"1:{target_data['risk_reward_ratio']}",
-                            'Selection Reason': pattern_analysis['all_reasons'],
-                            'Primary Pattern': pattern_analysis['primary_reason'],
-                            'Volume': int(avg_volume),
-                            'Risk': risk_rating,
-                            'Tech Score': f"{technical_score}/5",
-                            'Volatility': f"{target_data['volatility']:.1%}",
-                            'Data Quality': f"Real Data{fallback_note}" if not fallback_indicators else f"Mixed Data{fallback_note}",
-                            'Status': 'Active'
-                        })
+                if results_callback and new_since_update and (event['done'] % results_every == 0 or event['done'] == total_symbols):
+                    results_callback(rank_indian_recommendations(recommendations))
+                    new_since_update = False
             
-            except Exception as e:
-                continue
+            # Checked after every symbol and before every chunk download
+            if cancel_event is not None and cancel_event.is_set():
+                if progress_callback:
+                    progress_callback(event['done'] / total_symbols, f"⏹️ Scan cancelled after {event['done']} of {total_symbols} symbols")
+                return rank_indian_recommendations(recommendations)
         
-        progress_bar.empty()
-        status_text.empty()
-        
-        # Display scan statistics
+        # Report scan statistics
         if successful_fetches > 0:
-            st.info(f"✅ Successfully analyzed {successful_fetches} stocks out of {total_symbols} attempted")
+            scan_summary = f"✅ Successfully analyzed {successful_fetches} stocks out of {total_symbols} attempted"
         else:
-            st.warning(f"⚠️ Could not fetch data for any stocks. This might be due to market hours or API limits.")
+            scan_summary = f"⚠️ Could not fetch data for any stocks. This might be due to market hours or API limits."
         
-        # Sort by pattern strength and technical score
-        df = pd.DataFrame(recommendations)
-        if not df.empty:
-            df = df.sort_values(['Tech Score', '% Gain'], ascending=[False, False])
-            df = df.head(20)
+        if progress_callback:
+            progress_callback(1.0, scan_summary)
         
-        return df
+        return rank_indian_recommendations(recommendations)
         
     except Exception as e:
-        st.error(f"Error in get_indian_recommendations: {str(e)}")
+        print(f"Error in get_indian_recommendations: {str(e)}")
+        if progress_callback:
+            progress_callback(1.0, f"❌ Error in get_indian_recommendations: {str(e)}")
         return pd.DataFrame()
-
-def get_indian_market_overview():
-    """Get Indian market overview with error handling"""
-    try:
-        # Fetch Nifty data
-        nifty = yf.download("^NSEI", period="1d", interval="5m")
-        sensex = yf.download("^BSESN", period="1d", interval="5m")
-        
-        overview = {}
-        
-        if not nifty.empty:
-            nifty_close = nifty['Close'].iloc[-1]
-            nifty_open = nifty['Open'].iloc[0]
-            nifty_change = nifty_close - nifty_open
-            nifty_pct = (nifty_change / nifty_open) * 100
-            
-            overview['nifty'] = {
-                'price': round(nifty_close, 2),
-                'change': round(nifty_change, 2),
-                'change_pct': round(nifty_pct, 2)
-            }
-        
-        if not sensex.empty:
-            sensex_close = sensex['Close'].iloc[-1]
-            sensex_open = sensex['Open'].iloc[0]
-            sensex_change = sensex_close - sensex_open
-            sensex_pct = (sensex_change / sensex_open) * 100
-            
-            overview['sensex'] = {
-                'price': round(sensex_close, 2),
-                'change': round(sensex_change, 2),
-                'change_pct': round(sensex_pct, 2)
-            }
-        
-        overview['last_updated'] = datetime.now().strftime('%H:%M:%S')
-        return overview
-        
-    except Exception as e:
-        return {
-            'nifty': {'price': 22000, 'change': 0, 'change_pct': 0},
-            'sensex': {'price': 73000, 'change': 0, 'change_pct': 0},
-            'last_updated': 'Market data unavailable*',
-            'error': str(e)
-        }
@@ -0,0 +1,84 @@
+# lazy_modules.py - IMPORT TAB MODULES ONLY WHEN A TAB ACTUALLY USES THEM
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+
+class LazyModuleRegistry:
+    """Registry of dashboard modules that are imported on first use and timed"""
+
+    def __init__(self):
+        self._modules = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, module_name, budget_ms=500):
+        """Register a module under a short name with an import-time budget"""
+        self._modules[name] = {
+            'module_name': module_name,
+            'budget_ms': budget_ms,
+            'module': None,
+            'import_ms': None,
+            'error': None
+        }
+
+    def is_available(self, name):
+        """Check the module can be imported without importing it"""
+        entry = self._modules.get(name)
+        if entry is None:
+            return False
+        if entry['module'] is not None:
+            return True
+        if entry['error'] is not None:
+            return False
+        try:
+            return importlib.util.find_spec(entry['module_name']) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def is_loaded(self, name):
+        """True once the module has been imported"""
+        entry = self._modules.get(name)
+        return entry is not None and entry['module'] is not None
+
+    def load(self, name):
+        """Import the module (first call only) and return it; None if the import failed"""
+        entry = self._modules[name]
+        if entry['module'] is not None:
+            return entry['module']
+
+        with self._lock:
+            if entry['module'] is None and entry['error'] is None:
+                already_imported = entry['module_name'] in sys.modules
+                start = time.perf_counter()
+                try:
+                    entry['module'] = importlib.import_module(entry['module_name'])
+                except Exception as e:
+                    entry['error'] = str(e)
+                # Only a real import is charged against the budget
+                entry['import_ms'] = 0.0 if already_imported else round((time.perf_counter() - start) * 1000, 1)
+
+        return entry['module']
+
+    def get(self, name, attribute):
+        """Return an attribute of a registered module, importing it if needed"""
+        module = self.load(name)
+        if module is None:
+            raise ImportError(f"{self._modules[name]['module_name']} failed to import: {self._modules[name]['error']}")
+        return getattr(module, attribute)
+
+    def import_report(self):
+        """Import timings against each module's budget"""
+        report = []
+        for name, entry in self._modules.items():
+            import_ms = entry['import_ms']
+            report.append({
+                'Module': name,
+                'File': f"{entry['module_name']}.py",
+                'Status': 'Failed' if entry['error'] else ('Loaded' if entry['module'] is not None else 'Not loaded'),
+                'Import ms': import_ms,
+                'Budget ms': entry['budget_ms'],
+                'Over Budget': bool(import_ms is not None and import_ms > entry['budget_ms']),
+                'Error': entry['error'] or ''
+            })
+        return report
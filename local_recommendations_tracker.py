@@ -1,13 +1,14 @@
 import sqlite3
 import pandas as pd
 from datetime import datetime
-import yfinance as yf
 import os
+from data_paths import get_data_dir
+from market_data_provider import get_market_data
 
 class LocalRecommendationsTracker:
     def __init__(self):
-        # HARDCODED PATH - Your Downloads/DASHBOARD FILES directory
-        self.db_directory = r"C:\Users\kamal\Downloads\DASHBOARD FILES"
+        # Downloads/DASHBOARD FILES on Windows; DASHBOARD_DATA_DIR overrides (data_paths.py)
+        self.db_directory = get_data_dir()
         self.db_path = os.path.join(self.db_directory, "recommendations_tracker.db")
         
         # Ensure directory exists
@@ -151,8 +152,7 @@ class LocalRecommendationsTracker:
                 ticker_symbol = f"{symbol}.NS" if market == "Indian" else symbol
                 
                 # Fetch current price
-                stock = yf.Ticker(ticker_symbol)
-                data = stock.history(period="1d")
+                data = get_market_data().history(ticker_symbol, period="1d")
                 
                 if not data.empty:
                     new_current_price = float(data['Close'].iloc[-1])
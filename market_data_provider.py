@@ -0,0 +1,255 @@
+# market_data_provider.py - LIVE, RECORDING AND REPLAY BACKENDS FOR PRICE BARS AND NEWS FEEDS
+import os
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+# Calendar days covered by the yfinance periods the scanners request
+PERIOD_DAYS = {'1d': 1, '5d': 7, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366}
+
+# Backend selection for processes that can't be configured in code (dashboard, scan daemon):
+#   MARKET_DATA_MODE      live (default), record (live + save fixtures) or replay (fixtures only)
+#   MARKET_DATA_FIXTURES  fixture directory (default: fixtures/ next to this module)
+#   MARKET_DATA_LATENCY_MS, MARKET_DATA_FAILURE_RATE, MARKET_DATA_SEED  replay latency and failures
+# The bundled fixtures/ holds a year of daily bars for NIFTY, BANKNIFTY, five F&O stocks, AAPL and
+# MSFT plus one Economic Times feed; test_replay_smoke.py runs the scans on them
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+FeedResponse = namedtuple('FeedResponse', ['status_code', 'headers', 'content'])
+
+class MarketDataError(ConnectionError):
+    """A market-data request failed (injected by the replay backend, or no fixture recorded)"""
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session(pool_size=10):
+    """Process-wide requests.Session with a keep-alive connection pool for feed fetches"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            })
+            _http_session = session
+        return _http_session
+
+def read_with_deadline(response, deadline, chunk_size=16384):
+    """Read a streamed response body, giving up once the monotonic deadline passes"""
+    # read1() returns whatever has arrived, so a trickling server can't keep one read open
+    read_chunk = getattr(response.raw, 'read1', None) or response.raw.read
+    chunks = []
+    while True:
+        if time.monotonic() > deadline:
+            response.close()
+            raise TimeoutError("feed download exceeded its deadline")
+        chunk = read_chunk(chunk_size, decode_content=True)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+def trim_to_period(data, period):
+    """Copy of daily bars cut down to a yfinance period, counted back from the last bar"""
+    if data.empty:
+        return data.copy()
+    if period.endswith('d'):
+        return data.tail(int(period[:-1])).copy()
+    start = data.index[-1] - pd.Timedelta(days=PERIOD_DAYS[period])
+    return data[data.index > start].copy()
+
+class LiveMarketData:
+    """yfinance for bars, the shared HTTP session for feeds
+
+    yfinance is imported on first use so the dashboard can start without it.
+    """
+
+    def history(self, symbol, period="1mo", interval="1d"):
+        """Bars for one symbol (empty DataFrame if unavailable)"""
+        import yfinance as yf
+        return yf.Ticker(symbol).history(period=period, interval=interval)
+
+    def download(self, symbols, period="1mo", interval="1d"):
+        """Dict symbol -> bars from one grouped request; symbols it drops come back empty"""
+        import yfinance as yf
+        try:
+            data = yf.download(symbols, period=period, interval=interval, group_by='ticker',
+                               auto_adjust=True, threads=True, progress=False)
+        except Exception as e:
+            print(f"Error in grouped price download: {e}")
+            data = pd.DataFrame()
+
+        frames = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                frame = data[symbol] if symbol in data.columns.get_level_values(0) else pd.DataFrame()
+            else:
+                frame = data if len(symbols) == 1 else pd.DataFrame()
+            frames[symbol] = frame.dropna(how='all')
+        return frames
+
+    def fetch_feed(self, url, source, headers=None, connect_timeout=3.05, deadline_seconds=8):
+        """Conditional GET of a feed within a hard deadline; content is None on 304 Not Modified"""
+        deadline = time.monotonic() + deadline_seconds
+        response = get_http_session().get(url, headers=headers or {}, timeout=(connect_timeout, deadline_seconds),
+                                          stream=True)
+        with response:
+            if response.status_code == 304:
+                return FeedResponse(response.status_code, response.headers, None)
+            content = read_with_deadline(response, deadline)
+        return FeedResponse(response.status_code, response.headers, content)
+
+def _fixture_name(key):
+    # Filesystem-safe fixture name for a symbol or feed source ('^NSEI' -> '_NSEI')
+    return re.sub(r'[^A-Za-z0-9._-]', '_', key)
+
+class RecordingMarketData(LiveMarketData):
+    """Live backend that also writes every bar series and feed body it fetches as replay fixtures
+
+    Bars are merged into the symbol's fixture, so a longer history recorded
+    earlier is kept. Bar dates are stored without their timezone.
+    """
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR):
+        self.fixture_dir = fixture_dir
+        os.makedirs(os.path.join(fixture_dir, "bars"), exist_ok=True)
+        os.makedirs(os.path.join(fixture_dir, "feeds"), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def history(self, symbol, period="1mo", interval="1d"):
+        data = super().history(symbol, period, interval)
+        self._save_bars(symbol, data)
+        return data
+
+    def download(self, symbols, period="1mo", interval="1d"):
+        frames = super().download(symbols, period, interval)
+        for symbol, data in frames.items():
+            self._save_bars(symbol, data)
+        return frames
+
+    def fetch_feed(self, url, source, headers=None, connect_timeout=3.05, deadline_seconds=8):
+        # Validators are dropped so every fetch returns a body to record (never a 304)
+        response = super().fetch_feed(url, source, None, connect_timeout, deadline_seconds)
+        if response.status_code == 200:
+            with open(os.path.join(self.fixture_dir, "feeds", _fixture_name(source) + ".xml"), 'wb') as f:
+                f.write(response.content)
+        return response
+
+    def _save_bars(self, symbol, data):
+        if data.empty:
+            return
+        data = data.copy()
+        if getattr(data.index, 'tz', None) is not None:
+            data.index = data.index.tz_localize(None)
+        path = os.path.join(self.fixture_dir, "bars", _fixture_name(symbol) + ".csv")
+        with self._lock:
+            if os.path.exists(path):
+                recorded = pd.read_csv(path, index_col=0, parse_dates=True)
+                data = pd.concat([recorded, data])
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+            data.to_csv(path)
+
+class ReplayMarketData:
+    """Recorded fixtures only: bars/<symbol>.csv and feeds/<source>.xml under fixture_dir
+
+    Periods count back from the last recorded bar, so a replay returns the
+    same bars whenever it runs. Each request sleeps latency_seconds and fails
+    with probability failure_rate (MarketDataError; a grouped download loses
+    each symbol independently, like yfinance dropping tickers) from a seeded
+    generator, so a run's failures repeat with the same seed and call order.
+    """
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR, latency_seconds=0.0, failure_rate=0.0, seed=None):
+        self.fixture_dir = fixture_dir
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._bars = {}  # symbol -> recorded bars
+        self._lock = threading.Lock()
+
+    def history(self, symbol, period="1mo", interval="1d"):
+        self._wait()
+        if self._fails():
+            raise MarketDataError(f"injected failure for {symbol}")
+        return trim_to_period(self._recorded_bars(symbol), period)
+
+    def download(self, symbols, period="1mo", interval="1d"):
+        self._wait()
+        return {
+            symbol: pd.DataFrame() if self._fails() else trim_to_period(self._recorded_bars(symbol), period)
+            for symbol in symbols
+        }
+
+    def fetch_feed(self, url, source, headers=None, connect_timeout=3.05, deadline_seconds=8):
+        self._wait()
+        if self._fails():
+            raise MarketDataError(f"injected failure for {source}")
+        path = os.path.join(self.fixture_dir, "feeds", _fixture_name(source) + ".xml")
+        if not os.path.exists(path):
+            return FeedResponse(404, {}, b'')
+        with open(path, 'rb') as f:
+            return FeedResponse(200, {}, f.read())
+
+    def _recorded_bars(self, symbol):
+        with self._lock:
+            if symbol not in self._bars:
+                path = os.path.join(self.fixture_dir, "bars", _fixture_name(symbol) + ".csv")
+                self._bars[symbol] = pd.read_csv(path, index_col=0, parse_dates=True) if os.path.exists(path) \
+                    else pd.DataFrame()
+            return self._bars[symbol]
+
+    def _wait(self):
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+    def _fails(self):
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+def market_data_from_environment(environ=None):
+    """Backend chosen by the MARKET_DATA_* environment variables (live when unset)"""
+    environ = os.environ if environ is None else environ
+    mode = environ.get('MARKET_DATA_MODE', 'live').lower()
+    fixture_dir = environ.get('MARKET_DATA_FIXTURES') or DEFAULT_FIXTURE_DIR
+    if mode == 'replay':
+        seed = environ.get('MARKET_DATA_SEED')
+        return ReplayMarketData(
+            fixture_dir,
+            latency_seconds=float(environ.get('MARKET_DATA_LATENCY_MS', 0)) / 1000,
+            failure_rate=float(environ.get('MARKET_DATA_FAILURE_RATE', 0)),
+            seed=int(seed) if seed else None
+        )
+    if mode == 'record':
+        return RecordingMarketData(fixture_dir)
+    if mode != 'live':
+        print(f"Unknown MARKET_DATA_MODE {mode!r}, using live market data")
+    return LiveMarketData()
+
+_market_data = None
+_market_data_lock = threading.Lock()
+
+def get_market_data():
+    """Process-wide market-data backend (from the environment unless set_market_data was called)"""
+    global _market_data
+    with _market_data_lock:
+        if _market_data is None:
+            _market_data = market_data_from_environment()
+        return _market_data
+
+def set_market_data(provider):
+    """Swap the process-wide backend, e.g. to a ReplayMarketData for a benchmark run"""
+    global _market_data
+    with _market_data_lock:
+        _market_data = provider
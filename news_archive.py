@@ -0,0 +1,507 @@
+# news_archive.py - APPEND-ONLY NEWS ARCHIVE (SQLITE + FTS5) WITH A BACKGROUND INGESTER
+import sqlite3
+import hashlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+import pytz
+
+from data_paths import get_data_dir
+from news_dedup import NearDuplicateIndex
+from news_entities import get_entity_index
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Sentiment is kept as impact counts per 15-minute bucket, updated as items are archived
+SENTIMENT_BUCKET_SECONDS = 900
+
+def sentiment_label(high_ratio, medium_ratio):
+    """Dashboard sentiment from the share of high / medium impact news"""
+    if high_ratio > 0.25:
+        return 'High Volatility - Major Events'
+    if high_ratio > 0.15 or medium_ratio > 0.4:
+        return 'Moderate Volatility - Active News Flow'
+    if medium_ratio > 0.2:
+        return 'Cautious - Normal Activity'
+    return 'Stable - Quiet News Environment'
+
+def sentiment_bucket(timestamp):
+    """Start of the sentiment bucket holding a timestamp"""
+    return int(timestamp // SENTIMENT_BUCKET_SECONDS) * SENTIMENT_BUCKET_SECONDS
+
+def summarize_sentiment(total, high, medium):
+    """Counts, ratios and label for one window"""
+    high_ratio = high / total if total else 0
+    medium_ratio = medium / total if total else 0
+    return {
+        'total_news': total,
+        'high_impact_news': high,
+        'medium_impact_news': medium,
+        'high_ratio': round(high_ratio, 4),
+        'medium_ratio': round(medium_ratio, 4),
+        'sentiment': sentiment_label(high_ratio, medium_ratio) if total else 'Unknown - No Data'
+    }
+
+def news_item_key(item):
+    """Archive key of a news item: feed GUID, else link, else a hash of source + title"""
+    key = item.get('guid') or item.get('link')
+    if key:
+        return key
+    return 'sha1:' + hashlib.sha1(f"{item.get('source', '')}|{item.get('title', '')}".encode('utf-8')).hexdigest()
+
+def fts_query(keywords):
+    """Quote each search word so user input can't break FTS5 syntax (words are ANDed)"""
+    words = [word for word in (keywords or '').replace('"', ' ').split() if word]
+    return ' '.join(f'"{word}"' for word in words)
+
+def load_entity_index():
+    """Ticker index for tagging, or None when the scan modules can't be imported"""
+    try:
+        return get_entity_index()
+    except ImportError as e:
+        print(f"Entity tagging unavailable: {e}")
+        return None
+
+def news_impact_level(high_count, medium_count):
+    """Strongest impact among a symbol's news items"""
+    if high_count:
+        return 'High'
+    if medium_count:
+        return 'Medium'
+    return 'Low'
+
+class NewsArchive:
+    """Append-only news store keyed by GUID/link, searchable with FTS5"""
+
+    def __init__(self, db_directory=None):
+        # Same directory as the recommendations tracker database by default
+        self.db_directory = db_directory or get_data_dir()
+        self.db_path = os.path.join(self.db_directory, "news_archive.db")
+        self._write_lock = threading.Lock()
+
+        # Ensure directory exists
+        os.makedirs(self.db_directory, exist_ok=True)
+
+        # Initialize database
+        self.init_database()
+
+    def init_database(self):
+        """Initialize the SQLite database with the news table and its FTS5 index"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS news_items (
+                item_key TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                summary TEXT,
+                link TEXT,
+                source TEXT,
+                published_str TEXT,
+                published_ts REAL NOT NULL,
+                has_published_date INTEGER DEFAULT 1,
+                first_seen_at TEXT NOT NULL,
+                market_impact TEXT,
+                impact_type TEXT,
+                category TEXT,
+                also_reported_by TEXT
+            )
+        ''')
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_published ON news_items (published_ts)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_source ON news_items (source, published_ts)")
+
+        # External-content FTS index over title + summary, filled by trigger (rows are never updated)
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+                title, summary, content='news_items', content_rowid='rowid'
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sentiment_buckets (
+                bucket_start INTEGER PRIMARY KEY,
+                total_count INTEGER NOT NULL DEFAULT 0,
+                high_count INTEGER NOT NULL DEFAULT 0,
+                medium_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+
+        # Tickers linked to each item (one row per item and symbol) for per-symbol news lookups
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS news_entities (
+                item_key TEXT NOT NULL,
+                market TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                sector TEXT,
+                published_ts REAL NOT NULL,
+                market_impact TEXT,
+                PRIMARY KEY (item_key, market, symbol)
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_entities_symbol ON news_entities (market, symbol, published_ts)")
+
+        # Archives created before the sentiment table: build the buckets once from the stored items
+        if cursor.execute("SELECT 1 FROM sentiment_buckets LIMIT 1").fetchone() is None:
+            cursor.execute(f'''
+                INSERT INTO sentiment_buckets (bucket_start, total_count, high_count, medium_count)
+                SELECT CAST(published_ts / {SENTIMENT_BUCKET_SECONDS} AS INTEGER) * {SENTIMENT_BUCKET_SECONDS},
+                       COUNT(*), SUM(market_impact = 'High'), SUM(market_impact = 'Medium')
+                FROM news_items GROUP BY 1
+            ''')
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS news_items_fts_insert AFTER INSERT ON news_items BEGIN
+                INSERT INTO news_fts (rowid, title, summary) VALUES (new.rowid, new.title, new.summary);
+            END
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def add_items(self, news_items, dedup_hours=48, entity_index=None):
+        """Append unseen items; returns how many were added
+
+        Items whose key is already archived, or that near-duplicate an item
+        archived in the last dedup_hours, are skipped. Added items are tagged
+        with the tickers and sectors they mention.
+        """
+        if not news_items:
+            return 0
+
+        entity_index = entity_index or load_entity_index()
+
+        first_seen_at = datetime.now(IST).strftime('%Y-%m-%d %H:%M:%S')
+        added = 0
+        bucket_counts = {}  # bucket start -> [total, high, medium] of the items added
+
+        with self._write_lock:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            dedup_index = NearDuplicateIndex()
+            since_ts = time.time() - dedup_hours * 3600
+            for item_key, title, summary in cursor.execute(
+                "SELECT item_key, title, summary FROM news_items WHERE published_ts >= ?", (since_ts,)
+            ).fetchall():
+                dedup_index.add(item_key, title, summary)
+
+            for item in news_items:
+                item_key = news_item_key(item)
+                if dedup_index.add(item_key, item.get('title', ''), item.get('summary', '')) is not None:
+                    continue
+
+                published_date = item.get('published_date')
+                published_ts = published_date.timestamp() if published_date else item.get('sort_timestamp', time.time())
+                cursor.execute('''
+                    INSERT OR IGNORE INTO news_items
+                    (item_key, title, summary, link, source, published_str, published_ts, has_published_date,
+                     first_seen_at, market_impact, impact_type, category, also_reported_by)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    item_key,
+                    item.get('title', ''),
+                    item.get('summary', ''),
+                    item.get('link', ''),
+                    item.get('source', ''),
+                    item.get('published_str', ''),
+                    published_ts,
+                    1 if published_date else 0,
+                    first_seen_at,
+                    item.get('market_impact'),
+                    item.get('impact_type'),
+                    item.get('category'),
+                    json.dumps(item.get('also_reported_by') or [])
+                ))
+                if cursor.rowcount:
+                    added += 1
+                    if entity_index is not None:
+                        cursor.executemany('''
+                            INSERT OR IGNORE INTO news_entities
+                            (item_key, market, symbol, sector, published_ts, market_impact)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', [
+                            (item_key, entity['market'], entity['symbol'], entity['sector'], published_ts, item.get('market_impact'))
+                            for entity in entity_index.tag(item.get('title', ''), item.get('summary', ''))
+                        ])
+                    counts = bucket_counts.setdefault(sentiment_bucket(published_ts), [0, 0, 0])
+                    counts[0] += 1
+                    counts[1] += item.get('market_impact') == 'High'
+                    counts[2] += item.get('market_impact') == 'Medium'
+
+            cursor.executemany('''
+                INSERT INTO sentiment_buckets (bucket_start, total_count, high_count, medium_count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (bucket_start) DO UPDATE SET
+                    total_count = total_count + excluded.total_count,
+                    high_count = high_count + excluded.high_count,
+                    medium_count = medium_count + excluded.medium_count
+            ''', [(bucket, *counts) for bucket, counts in bucket_counts.items()])
+
+            conn.commit()
+            conn.close()
+
+        return added
+
+    def query_news(self, start=None, end=None, sources=None, categories=None, impacts=None,
+                   keywords=None, limit=200):
+        """Archived news, newest first
+
+        start/end are datetimes (naive ones are taken as IST); sources, categories
+        and impacts are lists of allowed values; keywords is a full-text search
+        over title and summary.
+        """
+        clauses = []
+        params = []
+
+        if start is not None:
+            clauses.append("n.published_ts >= ?")
+            params.append(self._to_timestamp(start))
+        if end is not None:
+            clauses.append("n.published_ts < ?")
+            params.append(self._to_timestamp(end))
+        for column, values in (('n.source', sources), ('n.category', categories), ('n.market_impact', impacts)):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+
+        columns = "n.*, (SELECT GROUP_CONCAT(e.symbol, ', ') FROM news_entities e WHERE e.item_key = n.item_key) AS tickers"
+        match = fts_query(keywords)
+        if match:
+            sql = f"SELECT {columns} FROM news_fts JOIN news_items n ON n.rowid = news_fts.rowid WHERE news_fts MATCH ?"
+            params.insert(0, match)
+            if clauses:
+                sql += " AND " + " AND ".join(clauses)
+        else:
+            sql = f"SELECT {columns} FROM news_items n"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+
+        sql += " ORDER BY n.published_ts DESC LIMIT ?"
+        params.append(int(limit))
+
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(sql, params).fetchall()
+        conn.close()
+
+        return [self._row_to_item(row) for row in rows]
+
+    def get_recent_news(self, hours=48, limit=200):
+        """Latest archived news from the last `hours` hours"""
+        return self.query_news(start=datetime.now(IST) - timedelta(hours=hours), limit=limit)
+
+    def get_sentiment(self, window_hours=48, end=None):
+        """News sentiment over the window ending at `end` (default now), from the bucket counts"""
+        end_ts = self._to_timestamp(end) if end is not None else time.time()
+        conn = sqlite3.connect(self.db_path)
+        total, high, medium = conn.execute('''
+            SELECT COALESCE(SUM(total_count), 0), COALESCE(SUM(high_count), 0), COALESCE(SUM(medium_count), 0)
+            FROM sentiment_buckets WHERE bucket_start >= ? AND bucket_start <= ?
+        ''', (sentiment_bucket(end_ts - window_hours * 3600), sentiment_bucket(end_ts))).fetchone()
+        conn.close()
+
+        sentiment = summarize_sentiment(total, high, medium)
+        sentiment['window_hours'] = window_hours
+        sentiment['window_end'] = datetime.fromtimestamp(end_ts, IST)
+        return sentiment
+
+    def get_sentiment_series(self, window_hours=48, step_hours=1, points=48, end=None):
+        """Rolling sentiment: one window_hours window ending every step_hours, oldest first"""
+        end_ts = self._to_timestamp(end) if end is not None else time.time()
+        first_end_ts = end_ts - (points - 1) * step_hours * 3600
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+            SELECT bucket_start, total_count, high_count, medium_count FROM sentiment_buckets
+            WHERE bucket_start >= ? AND bucket_start <= ? ORDER BY bucket_start
+        ''', (sentiment_bucket(first_end_ts - window_hours * 3600), sentiment_bucket(end_ts))).fetchall()
+        conn.close()
+
+        # Prefix sums over the buckets: each window is a difference of two prefixes
+        starts = [row[0] for row in rows]
+        prefix = [(0, 0, 0)]
+        for _, total, high, medium in rows:
+            last = prefix[-1]
+            prefix.append((last[0] + total, last[1] + high, last[2] + medium))
+
+        series = []
+        for point in range(points):
+            window_end_ts = first_end_ts + point * step_hours * 3600
+            lo = bisect_left(starts, sentiment_bucket(window_end_ts - window_hours * 3600))
+            hi = bisect_left(starts, sentiment_bucket(window_end_ts) + 1)
+            total, high, medium = (prefix[hi][i] - prefix[lo][i] for i in range(3))
+            sentiment = summarize_sentiment(total, high, medium)
+            sentiment['window_end'] = datetime.fromtimestamp(window_end_ts, IST)
+            series.append(sentiment)
+        return series
+
+    def get_symbol_news_stats(self, market, symbols, hours=168):
+        """Recent news count and strongest impact per symbol, from one grouped query
+
+        Returns {symbol: {'count', 'high', 'medium', 'impact', 'latest'}} for the
+        symbols that have news in the last `hours` hours.
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(f'''
+            SELECT symbol, COUNT(*), SUM(market_impact = 'High'), SUM(market_impact = 'Medium'), MAX(published_ts)
+            FROM news_entities
+            WHERE market = ? AND published_ts >= ? AND symbol IN ({', '.join('?' for _ in symbols)})
+            GROUP BY symbol
+        ''', [market, time.time() - hours * 3600, *symbols]).fetchall()
+        conn.close()
+
+        return {
+            symbol: {
+                'count': count,
+                'high': high,
+                'medium': medium,
+                'impact': news_impact_level(high, medium),
+                'latest': datetime.fromtimestamp(latest, IST).strftime('%d-%m %H:%M')
+            }
+            for symbol, count, high, medium, latest in rows
+        }
+
+    def get_sources(self):
+        """Distinct sources in the archive"""
+        conn = sqlite3.connect(self.db_path)
+        sources = [row[0] for row in conn.execute("SELECT DISTINCT source FROM news_items ORDER BY source")]
+        conn.close()
+        return sources
+
+    def get_archive_info(self):
+        """Archive size and time span"""
+        conn = sqlite3.connect(self.db_path)
+        total, oldest, newest = conn.execute(
+            "SELECT COUNT(*), MIN(published_ts), MAX(published_ts) FROM news_items"
+        ).fetchone()
+        conn.close()
+
+        def fmt(ts):
+            return datetime.fromtimestamp(ts, IST).strftime('%d-%m-%Y %H:%M IST') if ts else None
+
+        return {
+            'db_path': self.db_path,
+            'total_items': total,
+            'oldest': fmt(oldest),
+            'newest': fmt(newest),
+            'db_size_mb': round(os.path.getsize(self.db_path) / (1024 * 1024), 2) if os.path.exists(self.db_path) else 0
+        }
+
+    @staticmethod
+    def _to_timestamp(value):
+        if isinstance(value, (int, float)):
+            return float(value)
+        if value.tzinfo is None:
+            value = IST.localize(value)
+        return value.timestamp()
+
+    @staticmethod
+    def _row_to_item(row):
+        published = datetime.fromtimestamp(row['published_ts'], IST)
+        return {
+            'guid': row['item_key'],
+            'title': row['title'],
+            'summary': row['summary'],
+            'link': row['link'],
+            'source': row['source'],
+            'published_str': row['published_str'],
+            'published_date': published if row['has_published_date'] else None,
+            'date': published.strftime('%d-%m-%Y'),
+            'time': published.strftime('%H:%M IST'),
+            'sort_timestamp': row['published_ts'],
+            'first_seen_at': row['first_seen_at'],
+            'market_impact': row['market_impact'],
+            'impact_type': row['impact_type'],
+            'category': row['category'],
+            'also_reported_by': json.loads(row['also_reported_by'] or '[]'),
+            'tickers': row['tickers'] or ''
+        }
+
+class NewsIngester:
+    """Background thread that fetches all feeds and appends unseen items to the archive"""
+
+    def __init__(self, archive=None, interval_seconds=300):
+        self.archive = archive or NewsArchive()
+        self.interval_seconds = interval_seconds
+        self.is_running = False
+        self.ingest_thread = None
+        self._stop_event = threading.Event()
+        self._run_lock = threading.Lock()
+        self.last_run_at = None
+        self.last_added = 0
+        self.last_error = None
+
+    def run_once(self):
+        """Fetch every source once and archive the new items; returns how many were added"""
+        # Imported here so the archive can be read without loading the feed stack
+        from news_logic import collect_latest_news
+
+        with self._run_lock:
+            try:
+                news_items, _ = collect_latest_news()
+                self.last_added = self.archive.add_items(news_items)
+                self.last_error = None
+            except Exception as e:
+                print(f"Error during news ingest: {e}")
+                self.last_added = 0
+                self.last_error = str(e)
+            self.last_run_at = datetime.now(IST)
+            return self.last_added
+
+    def start(self):
+        """Start the ingest loop (first run immediately)"""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self._stop_event.clear()
+        self.ingest_thread = threading.Thread(target=self._run_loop, daemon=True, name='news-ingester')
+        self.ingest_thread.start()
+
+    def stop(self):
+        """Stop the ingest loop"""
+        self.is_running = False
+        self._stop_event.set()
+
+    def _run_loop(self):
+        while self.is_running:
+            self.run_once()
+            self._stop_event.wait(self.interval_seconds)
+
+    def get_status(self):
+        """Ingester status for display"""
+        next_run = self.last_run_at + timedelta(seconds=self.interval_seconds) if self.is_running and self.last_run_at else None
+        return {
+            'is_running': self.is_running,
+            'last_run': self.last_run_at.strftime('%H:%M:%S IST') if self.last_run_at else None,
+            'next_run': next_run.strftime('%H:%M:%S IST') if next_run else None,
+            'last_added': self.last_added,
+            'last_error': self.last_error
+        }
+
+if __name__ == "__main__":
+    import sys
+
+    # "python news_archive.py once" ingests once; "python news_archive.py search rbi repo" searches
+    if len(sys.argv) > 1 and sys.argv[1] == 'once':
+        print(f"Added {NewsIngester().run_once()} new items")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'search':
+        for item in NewsArchive().query_news(keywords=' '.join(sys.argv[2:]), limit=20):
+            print(f"{item['date']} {item['time']} [{item['source']}] {item['title']}")
+    else:
+        ingester = NewsIngester()
+        print("Starting news ingester...")
+        ingester.start()
+        try:
+            while True:
+                time.sleep(10)
+        except KeyboardInterrupt:
+            print("Stopping news ingester...")
+            ingester.stop()
@@ -0,0 +1,104 @@
+# news_dates.py - FEED DATE PARSING WITH PER-SOURCE FORMAT LEARNING
+import calendar
+import email.utils
+import threading
+from datetime import datetime
+from functools import lru_cache
+
+import pytz
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Common date formats in RSS feeds, tried in this order until a source's format is known
+DATE_FORMATS = [
+    '%a, %d %b %Y %H:%M:%S %z',
+    '%a, %d %b %Y %H:%M:%S GMT',
+    '%a, %d %b %Y %H:%M:%S +0000',
+    '%a, %d %b %Y %H:%M:%S IST',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%d %b %Y %H:%M:%S',
+    '%a, %d %b %Y %H:%M:%S'
+]
+
+def normalize_published(published_str):
+    """Spell out the zone names strptime can't read (IST, bare GMT) as offsets"""
+    clean_published = published_str.strip()
+    if 'IST' in clean_published:
+        clean_published = clean_published.replace('IST', '+0530')
+    elif 'GMT' in clean_published and '+' not in clean_published:
+        clean_published = clean_published.replace('GMT', '+0000')
+    return clean_published
+
+class PublishedDateParser:
+    """Feed dates to IST datetimes, one strptime attempt per entry in the common case
+
+    feedparser's structured *_parsed tuple (already UTC) is used when present.
+    Otherwise the format that last worked for the entry's source is tried
+    first, and the full format list only on a miss.
+    """
+
+    def __init__(self, date_formats=None):
+        self.date_formats = date_formats or DATE_FORMATS
+        self._source_formats = {}  # source -> format that last parsed its dates
+        self._lock = threading.Lock()
+
+    def parse(self, published_str, source=None, parsed_tuple=None):
+        """IST datetime for a feed date, or None"""
+        if parsed_tuple:
+            try:
+                return datetime.fromtimestamp(calendar.timegm(parsed_tuple), tz=pytz.UTC).astimezone(IST)
+            except (TypeError, ValueError, OverflowError):
+                pass
+
+        if not published_str:
+            return None
+
+        clean_published = normalize_published(published_str)
+
+        learned_format = self._source_formats.get(source)
+        if learned_format is not None:
+            parsed_date = self._try_format(clean_published, learned_format)
+            if parsed_date is not None:
+                return parsed_date
+
+        for fmt in self.date_formats:
+            if fmt == learned_format:
+                continue
+            parsed_date = self._try_format(clean_published, fmt)
+            if parsed_date is not None:
+                if source is not None:
+                    with self._lock:
+                        self._source_formats[source] = fmt
+                return parsed_date
+
+        # Fallback using email utils
+        parsed_tuple = email.utils.parsedate_tz(published_str)
+        if parsed_tuple:
+            try:
+                return datetime.fromtimestamp(email.utils.mktime_tz(parsed_tuple), tz=pytz.UTC).astimezone(IST)
+            except (ValueError, OverflowError):
+                pass
+
+        return None
+
+    def get_source_formats(self):
+        """Learned format per source"""
+        with self._lock:
+            return dict(self._source_formats)
+
+    @staticmethod
+    def _try_format(clean_published, fmt):
+        try:
+            parsed_date = datetime.strptime(clean_published, fmt)
+        except ValueError:
+            return None
+        if parsed_date.tzinfo is None:
+            parsed_date = pytz.UTC.localize(parsed_date)
+        return parsed_date.astimezone(IST)
+
+@lru_cache(maxsize=1)
+def get_date_parser():
+    """Process-wide parser, so learned source formats survive across refreshes"""
+    return PublishedDateParser()
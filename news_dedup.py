@@ -0,0 +1,144 @@
+# news_dedup.py - NEAR-DUPLICATE NEWS DETECTION WITH MINHASH + LSH
+import re
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_MAX_HASH = _MERSENNE_PRIME
+_WORD_RE = re.compile(r'\b\w+\b')
+
+def tokenize(text):
+    """Lower-cased word tokens"""
+    return _WORD_RE.findall((text or '').lower())
+
+def news_shingles(title, summary, summary_words=40):
+    """Shingle set for an item: title words plus word bigrams from the start of the summary"""
+    title_tokens = tokenize(title)
+    summary_tokens = tokenize(summary)[:summary_words]
+    shingles = {f"t:{token}" for token in title_tokens}
+    shingles.update(f"s:{a} {b}" for a, b in zip(summary_tokens, summary_tokens[1:]))
+    return frozenset(shingles)
+
+def jaccard(a, b):
+    """Jaccard similarity of two sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class MinHasher:
+    """MinHash signatures from num_perm universal hash functions (vectorized with numpy)"""
+
+    def __init__(self, num_perm=64, seed=42):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # (a*x + b) mod p with a, b, x < p = 2**31 - 1: below 2**62, so no uint64 overflow
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingles):
+        """MinHash signature (uint64 array of length num_perm)"""
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) % _MERSENNE_PRIME for shingle in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+@lru_cache(maxsize=None)
+def shared_hasher(num_perm=64):
+    """One hasher per signature size, so cached signatures carry over between indexes"""
+    return MinHasher(num_perm)
+
+class _LSHTable:
+    """Banded LSH buckets over MinHash signatures"""
+
+    def __init__(self, num_perm, bands):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets = [{} for _ in range(bands)]
+
+    def keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def candidates(self, keys):
+        found = []
+        seen = set()
+        for band, key in enumerate(keys):
+            for item_id in self._buckets[band].get(key, ()):
+                if item_id not in seen:
+                    seen.add(item_id)
+                    found.append(item_id)
+        return found
+
+    def insert(self, keys, item_id):
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(item_id)
+
+class NearDuplicateIndex:
+    """Incremental LSH index: add() answers "is this a near-duplicate of something already kept?"
+
+    Candidates come from two LSH tables - title words (2-row bands, so titles
+    sharing ~40% of their words collide almost surely) and title + summary
+    shingles. They are confirmed with the title rule the dashboard has always
+    used (more than 60% shared title words, word counts within 3) or a shingle
+    Jaccard of at least `threshold`.
+    """
+
+    def __init__(self, num_perm=64, title_bands=32, content_bands=16, threshold=0.7, hasher=None):
+        self.hasher = hasher or shared_hasher(num_perm)
+        self.threshold = threshold
+        self._title_lsh = _LSHTable(self.hasher.num_perm, title_bands)
+        self._content_lsh = _LSHTable(self.hasher.num_perm, content_bands)
+        self._items = {}  # item id -> (title tokens, shingles)
+
+    def __len__(self):
+        return len(self._items)
+
+    def find_duplicate(self, title, summary=''):
+        """Id of a kept item this one near-duplicates, or None"""
+        return self._match(*self._prepare(title, summary))
+
+    def add(self, item_id, title, summary=''):
+        """Index an item unless it near-duplicates a kept one; returns the duplicate's id or None"""
+        title_tokens, shingles, title_keys, content_keys = self._prepare(title, summary)
+        duplicate_of = self._match(title_tokens, shingles, title_keys, content_keys)
+        if duplicate_of is not None:
+            return duplicate_of
+
+        self._items[item_id] = (title_tokens, shingles)
+        self._title_lsh.insert(title_keys, item_id)
+        self._content_lsh.insert(content_keys, item_id)
+        return None
+
+    def _prepare(self, title, summary):
+        title_tokens, shingles, title_signature, content_signature = _cached_features(
+            self.hasher, title or '', summary or ''
+        )
+        return title_tokens, shingles, self._title_lsh.keys(title_signature), self._content_lsh.keys(content_signature)
+
+    def _match(self, title_tokens, shingles, title_keys, content_keys):
+        for candidate_id in self._title_lsh.candidates(title_keys):
+            if _same_title(title_tokens, self._items[candidate_id][0]):
+                return candidate_id
+        for candidate_id in self._content_lsh.candidates(content_keys):
+            if jaccard(shingles, self._items[candidate_id][1]) >= self.threshold:
+                return candidate_id
+        return None
+
+def _same_title(title_words, seen_words):
+    """The original title rule: >60% of words shared and similar length"""
+    return (len(title_words & seen_words) > len(title_words) * 0.6 and
+            abs(len(title_words) - len(seen_words)) < 3)
+
+@lru_cache(maxsize=4096)
+def _cached_features(hasher, title, summary):
+    # Refreshes see the same headlines again; tokens and signatures are reused
+    title_tokens = frozenset(tokenize(title))
+    shingles = news_shingles(title, summary)
+    return title_tokens, shingles, hasher.signature(title_tokens), hasher.signature(shingles)
@@ -0,0 +1,171 @@
+# news_entities.py - LINK NEWS HEADLINES TO THE TICKERS THE SCANNERS RANK
+import re
+from functools import lru_cache
+
+# Company names as they appear in headlines (matched case-insensitively, whole words)
+NSE_COMPANY_ALIASES = {
+    'RELIANCE': ['reliance industries', 'reliance', 'ril', 'reliance jio', 'reliance retail'], 'TCS': ['tata consultancy'],
+    'HDFCBANK': ['hdfc bank'], 'INFY': ['infosys'], 'ICICIBANK': ['icici bank'],
+    'KOTAKBANK': ['kotak mahindra bank', 'kotak bank'], 'SBIN': ['state bank of india'],
+    'BHARTIARTL': ['bharti airtel', 'airtel'], 'ASIANPAINT': ['asian paints'], 'AXISBANK': ['axis bank'],
+    'LT': ['larsen & toubro', 'larsen and toubro', 'l&t'], 'SUNPHARMA': ['sun pharma', 'sun pharmaceutical'],
+    'TITAN': ['titan company', 'titan'], 'WIPRO': ['wipro'], 'MARUTI': ['maruti suzuki', 'maruti'],
+    'BAJFINANCE': ['bajaj finance'], 'TATASTEEL': ['tata steel'], 'COALINDIA': ['coal india'],
+    'HDFCLIFE': ['hdfc life'], 'ICICIGI': ['icici lombard'], 'SBILIFE': ['sbi life'],
+    'BAJAJFINSV': ['bajaj finserv'], 'INDUSINDBK': ['indusind bank', 'indusind'], 'BANDHANBNK': ['bandhan bank'],
+    'FEDERALBNK': ['federal bank'], 'IDFCFIRSTB': ['idfc first bank', 'idfc first'],
+    'PNB': ['punjab national bank'], 'CANBK': ['canara bank'], 'HCLTECH': ['hcl technologies', 'hcltech', 'hcl tech'],
+    'TECHM': ['tech mahindra'], 'LTIM': ['ltimindtree'], 'MPHASIS': ['mphasis'], 'PERSISTENT': ['persistent systems'],
+    'DRREDDY': ['dr reddy', 'dr reddys'], 'CIPLA': ['cipla'], 'APOLLOHOSP': ['apollo hospitals'],
+    'FORTIS': ['fortis healthcare'], 'BIOCON': ['biocon'], 'DIVISLAB': ["divi's laboratories", "divi's labs", "divi's lab"],
+    'GLENMARK': ['glenmark'], 'AUROPHARMA': ['aurobindo pharma'], 'LUPIN': ['lupin'],
+    'HINDUNILVR': ['hindustan unilever', 'hul'], 'NESTLEIND': ['nestle india'], 'BRITANNIA': ['britannia'],
+    'DABUR': ['dabur'], 'MARICO': ['marico'], 'GODREJCP': ['godrej consumer'], 'COLPAL': ['colgate-palmolive', 'colgate'],
+    'UBL': ['united breweries'], 'TATACONSUM': ['tata consumer'], 'M&M': ['mahindra & mahindra', 'mahindra and mahindra'],
+    'BAJAJ-AUTO': ['bajaj auto'], 'HEROMOTOCO': ['hero motocorp'], 'TATAMOTORS': ['tata motors'],
+    'EICHERMOT': ['eicher motors', 'royal enfield'], 'APOLLOTYRE': ['apollo tyres'], 'MRF': ['mrf'],
+    'MOTHERSON': ['samvardhana motherson', 'motherson'], 'BOSCHLTD': ['bosch'], 'BPCL': ['bharat petroleum'],
+    'IOC': ['indian oil'], 'HINDPETRO': ['hindustan petroleum'], 'GAIL': ['gail'], 'NTPC': ['ntpc'],
+    'POWERGRID': ['power grid'], 'ADANIPOWER': ['adani power'], 'TATAPOWER': ['tata power'],
+    'HINDALCO': ['hindalco'], 'VEDL': ['vedanta'], 'JSWSTEEL': ['jsw steel'], 'SAIL': ['steel authority of india'],
+    'NMDC': ['nmdc'], 'JINDALSTEL': ['jindal steel'], 'HINDZINC': ['hindustan zinc'], 'WELCORP': ['welspun corp'],
+    'PIDILITIND': ['pidilite'], 'BERGEPAINT': ['berger paints'], 'HAVELLS': ['havells'], 'VOLTAS': ['voltas'],
+    'DIXON': ['dixon technologies'], 'SYMPHONY': ['symphony ltd'], 'IRCTC': ['irctc'],
+    'BEL': ['bharat electronics'], 'HAL': ['hindustan aeronautics']
+}
+
+US_COMPANY_ALIASES = {
+    'AAPL': ['apple'], 'MSFT': ['microsoft'], 'GOOGL': ['alphabet', 'google'], 'AMZN': ['amazon'],
+    'TSLA': ['tesla'], 'META': ['meta platforms', 'facebook'], 'NVDA': ['nvidia'], 'NFLX': ['netflix'],
+    'ADBE': ['adobe'], 'CRM': ['salesforce'], 'ORCL': ['oracle'], 'INTC': ['intel'], 'QCOM': ['qualcomm'],
+    'AVGO': ['broadcom'], 'CSCO': ['cisco'], 'IBM': ['ibm'], 'INTU': ['intuit'], 'NOW': ['servicenow'],
+    'WDAY': ['workday'], 'SNOW': ['snowflake'], 'CRWD': ['crowdstrike'], 'ZS': ['zscaler'],
+    'JPM': ['jpmorgan', 'jp morgan'], 'BAC': ['bank of america'], 'WFC': ['wells fargo'], 'GS': ['goldman sachs'],
+    'MS': ['morgan stanley'], 'C': ['citigroup', 'citi'], 'AXP': ['american express'], 'V': ['visa'],
+    'MA': ['mastercard'], 'SCHW': ['charles schwab'], 'BLK': ['blackrock'], 'JNJ': ['johnson & johnson'],
+    'PFE': ['pfizer'], 'UNH': ['unitedhealth'], 'ABBV': ['abbvie'], 'MRNA': ['moderna'], 'AMGN': ['amgen'],
+    'GILD': ['gilead'], 'XOM': ['exxon', 'exxonmobil'], 'CVX': ['chevron'], 'COP': ['conocophillips'],
+    'SLB': ['schlumberger'], 'OXY': ['occidental petroleum'], 'HAL': ['halliburton'], 'WMT': ['walmart'],
+    'HD': ['home depot'], 'COST': ['costco'], 'TGT': ['target corp'], 'PG': ['procter & gamble', 'procter and gamble'],
+    'KO': ['coca-cola', 'coca cola'], 'PEP': ['pepsico'], 'MCD': ["mcdonald's", 'mcdonalds'], 'SBUX': ['starbucks'],
+    'NKE': ['nike'], 'DIS': ['disney'], 'F': ['ford motor'], 'GM': ['general motors'], 'CAT': ['caterpillar'],
+    'GE': ['general electric'], 'HON': ['honeywell'], 'UPS': ['united parcel service'], 'FDX': ['fedex'],
+    'BA': ['boeing'], 'LMT': ['lockheed martin'], 'RTX': ['raytheon'], 'NOC': ['northrop grumman'],
+    'GD': ['general dynamics'], 'DE': ['john deere', 'deere'], 'NEM': ['newmont'], 'FCX': ['freeport-mcmoran'],
+    'DOW': ['dow inc'], 'NUE': ['nucor']
+}
+
+# Tickers that are also everyday words or common acronyms; they only match through their company names
+AMBIGUOUS_TICKERS = {
+    'IT', 'ALL', 'NOW', 'LOW', 'CAT', 'SO', 'ES', 'CE', 'DD', 'DE', 'GD', 'MA', 'MS', 'PG', 'HD',
+    'KO', 'V', 'C', 'F', 'GE', 'GM', 'BA', 'CI', 'EW', 'PH', 'CF', 'IOC', 'BEL', 'UPS', 'DOW', 'META',
+    'SNOW', 'COST', 'ALGN', 'TITAN', 'DIXON', 'LUPIN'
+}
+_MIN_TICKER_LENGTH = 3
+
+# Aliases that are also everyday words ("visa rules", "apple prices", "power grid failure").
+# They match followed by a company suffix ("Apple Inc", "Visa shares"), or capitalized in a
+# headline that has a company/finance word ("Apple unveils...", "Titan Q2 profit")
+WORD_ALIASES = {
+    'reliance', 'power grid', 'indian oil', 'titan', 'apple', 'amazon', 'alphabet', 'oracle',
+    'intel', 'adobe', 'visa', 'workday', 'snowflake', 'caterpillar', 'chevron'
+}
+COMPANY_SUFFIXES = ('inc', 'corp', 'ltd', 'limited', 'group', 'shares', 'stock')
+COMPANY_CONTEXT_WORDS = {
+    'shares', 'share', 'stock', 'stocks', 'profit', 'profits', 'loss', 'revenue', 'earnings', 'results',
+    'quarter', 'q1', 'q2', 'q3', 'q4', 'dividend', 'buyback', 'ceo', 'cfo', 'unveils', 'launches', 'announces',
+    'reports', 'acquires', 'acquisition', 'merger', 'deal', 'stake', 'valuation', 'ipo', 'sales', 'guidance',
+    'investors', 'analysts', 'upgrade', 'downgrade', 'approval', 'usfda'
+}
+
+# Word tokens; keeps tickers like M&M, L&T and BAJAJ-AUTO in one piece
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+(?:['&-][A-Za-z0-9]+)*")
+
+def _tokens(text):
+    # Possessives match the bare name: "Dr Reddy's" -> dr reddy
+    return [token[:-2] if token.lower().endswith("'s") else token for token in _TOKEN_RE.findall(text or '')]
+
+class EntityIndex:
+    """Alias index: one left-to-right pass over a headline's tokens finds every linked ticker
+
+    Company names are keyed by their lower-cased token tuples (longest match
+    wins at each position). WORD_ALIASES match with a COMPANY_SUFFIXES word
+    after them, or bare when capitalized and the text has one of
+    COMPANY_CONTEXT_WORDS; bare tickers match only when written in capitals.
+    A bare ticker listed in several markets (HAL) links to the first market in
+    ticker_market_priority - the feeds are Indian.
+    """
+
+    def __init__(self, entities, ticker_market_priority=('Indian', 'US')):
+        # entities: iterable of (market, symbol, sector, name aliases)
+        self._sectors = {}
+        self._names = {}    # lower-cased token tuple -> set of (market, symbol)
+        self._word_names = {}  # bare WORD_ALIASES token tuple -> set of (market, symbol)
+        self._tickers = {}  # ticker as written -> set of (market, symbol)
+        for market, symbol, sector, aliases in entities:
+            entity = (market, symbol)
+            self._sectors[entity] = sector
+            for alias in aliases:
+                key = tuple(token.lower() for token in _tokens(alias))
+                if not key:
+                    continue
+                if alias in WORD_ALIASES:
+                    self._word_names.setdefault(key, set()).add(entity)
+                    for suffix in COMPANY_SUFFIXES:
+                        self._names.setdefault(key + (suffix,), set()).add(entity)
+                else:
+                    self._names.setdefault(key, set()).add(entity)
+            if len(symbol) >= _MIN_TICKER_LENGTH and symbol not in AMBIGUOUS_TICKERS:
+                self._tickers.setdefault(symbol, set()).add(entity)
+        for ticker, entities in self._tickers.items():
+            if len(entities) > 1:
+                market = min(entities, key=lambda entity: ticker_market_priority.index(entity[0]))[0]
+                self._tickers[ticker] = {entity for entity in entities if entity[0] == market}
+        self._max_words = max((len(key) for key in self._names), default=1)
+
+    def match(self, text):
+        """Set of (market, symbol) mentioned in the text"""
+        tokens = _tokens(text)
+        lowered = [token.lower() for token in tokens]
+        has_context = not COMPANY_CONTEXT_WORDS.isdisjoint(lowered)
+        found = set()
+        position = 0
+        while position < len(tokens):
+            matched_words = 0
+            for length in range(min(self._max_words, len(tokens) - position), 0, -1):
+                key = tuple(lowered[position:position + length])
+                entities = self._names.get(key)
+                capitalized = all(token[0].isupper() for token in tokens[position:position + length])
+                if not entities and has_context and capitalized:
+                    entities = self._word_names.get(key)
+                if entities:
+                    found.update(entities)
+                    matched_words = length
+                    break
+            if not matched_words:
+                found.update(self._tickers.get(tokens[position], ()))
+                matched_words = 1
+            position += matched_words
+        return found
+
+    def tag(self, title, summary=''):
+        """Linked entities of a news item as dicts with market, symbol and sector"""
+        return [
+            {'market': market, 'symbol': symbol, 'sector': self._sectors[(market, symbol)]}
+            for market, symbol in sorted(self.match(f"{title} {summary}"))
+        ]
+
+@lru_cache(maxsize=1)
+def get_entity_index():
+    """Index over the Indian and US scan universes, built once per process"""
+    # Imported here so loading the news archive doesn't load the scan modules (pandas, price cache)
+    from indian_stock_logic import get_expanded_nse_universe, get_nse_stock_sector
+    from us_stock_logic import get_expanded_sp500_universe, get_stock_sector
+
+    entities = []
+    for symbol in get_expanded_nse_universe():
+        base = symbol.replace('.NS', '')
+        entities.append(('Indian', base, get_nse_stock_sector(base), NSE_COMPANY_ALIASES.get(base, [])))
+    for symbol in get_expanded_sp500_universe():
+        entities.append(('US', symbol, get_stock_sector(symbol), US_COMPANY_ALIASES.get(symbol, [])))
+    return EntityIndex(entities)
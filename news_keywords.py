@@ -0,0 +1,125 @@
+# news_keywords.py - ONE-PASS KEYWORD CLASSIFIER FOR NEWS IMPACT AND CATEGORY
+import re
+from functools import lru_cache
+
+# Impact tiers, checked in this order (first tier with a match wins)
+MARKET_KEYWORDS = {
+    'high_impact': [
+        'interest rate', 'rbi policy', 'budget', 'gdp', 'inflation',
+        'repo rate', 'reverse repo', 'fiscal deficit', 'war', 'pandemic',
+        'lockdown', 'vaccine', 'election', 'government policy', 'fed', 'fomc',
+        'geopolitics', 'trade war', 'sanctions', 'crude oil', 'natural disaster'
+    ],
+    'medium_impact': [
+        'corporate earnings', 'ipo', 'merger', 'acquisition', 'dividend',
+        'bonus', 'split', 'fii', 'dii', 'foreign investment',
+        'currency', 'rupee', 'dollar', 'quarterly results', 'exports', 'imports'
+    ],
+    'sector_specific': [
+        'banking', 'pharma', 'it', 'auto', 'steel', 'cement',
+        'energy', 'fmcg', 'telecom', 'real estate','defense','infrastructure',
+        'manufacturing','retail','healthcare', 'metal', 'chemicals'
+    ]
+}
+
+# News categories, checked in this order (first category with a match wins)
+CATEGORY_KEYWORDS = [
+    ('Policy/Central Bank', ['rbi', 'interest rate', 'policy', 'budget', 'fed', 'fomc']),
+    ('Corporate Earnings', ['earnings', 'results', 'profit', 'revenue', 'quarterly']),
+    ('IPO/Listings', ['ipo', 'listing', 'issue', 'offer']),
+    ('FII/DII Activity', ['fii', 'dii', 'investment', 'inflow', 'outflow']),
+    ('Commodities', ['crude', 'oil', 'commodity', 'gold', 'silver']),
+    ('Currency', ['rupee', 'dollar', 'currency', 'forex']),
+    ('Market Movement', ['nifty', 'sensex', 'index', 'market']),
+    ('Geopolitics', ['geopolitic', 'war', 'trade', 'sanction', 'china', 'usa'])
+]
+
+IMPACT_TYPES = {'high_impact': ('High', 'Policy/Macro'), 'medium_impact': ('Medium', 'Corporate/Markets')}
+
+# Keywords of 4+ letters also match simple inflections (sanction -> sanctions,
+# geopolitic -> geopolitical); short ones ('fii', 'ipo', 'oil') only an added plural s (FIIs, IPOs)
+_INFLECTIONS = r'(?:s|es|al|ed|ing)?'
+_SHORT_INFLECTIONS = r's?'
+_MIN_STEM_LENGTH = 4
+
+# Keywords that are also everyday words only count when written in capitals ("IT", not "it")
+ACRONYM_KEYWORDS = {'it'}
+
+class KeywordClassifier:
+    """All keyword tables compiled into one word-boundary regex; classify() is a single scan"""
+
+    def __init__(self, market_keywords=None, category_keywords=None):
+        self.market_keywords = market_keywords or MARKET_KEYWORDS
+        self.category_keywords = category_keywords or CATEGORY_KEYWORDS
+
+        # keyword -> best impact rank (tier, position) and category ranks
+        self._impact_rank = {}
+        for tier_index, tier in enumerate(('high_impact', 'medium_impact', 'sector_specific')):
+            for position, keyword in enumerate(self.market_keywords.get(tier, [])):
+                self._impact_rank.setdefault(keyword, (tier_index, position, tier, keyword))
+        self._category_rank = {}
+        for category_index, (category, keywords) in enumerate(self.category_keywords):
+            for keyword in keywords:
+                self._category_rank.setdefault(keyword, category_index)
+
+        keywords = sorted(set(self._impact_rank) | set(self._category_rank), key=len, reverse=True)
+        self._pattern = re.compile(
+            r'\b(' + '|'.join(self._keyword_regex(keyword) for keyword in keywords) + r')\b'
+        )
+        self._keyword_patterns = {keyword: re.compile(r'^' + self._keyword_regex(keyword) + r'$') for keyword in keywords}
+        self._resolved = {keyword: keyword for keyword in keywords}
+
+        # A matched phrase also counts for the keywords inside it ('foreign investment' -> 'investment')
+        self._implied = {
+            keyword: [other for other in keywords if re.search(r'\b' + self._keyword_regex(other) + r'\b', keyword)]
+            for keyword in keywords
+        }
+
+    @staticmethod
+    def _keyword_regex(keyword):
+        escaped = re.escape(keyword)
+        return escaped + (_INFLECTIONS if len(keyword) >= _MIN_STEM_LENGTH else _SHORT_INFLECTIONS)
+
+    def match_keywords(self, text):
+        """Set of table keywords found in the text"""
+        text = text or ''
+        lowered = text.lower()
+        # Lower-casing can change length for some non-ASCII text; then spans can't be mapped back
+        same_spans = len(lowered) == len(text)
+        matched = set()
+        for match in self._pattern.finditer(lowered):
+            keyword = self._resolve(match.group(1))
+            if keyword in ACRONYM_KEYWORDS and not (same_spans and text[match.start(1):match.end(1)].isupper()):
+                continue
+            if keyword:
+                matched.update(self._implied[keyword])
+        return matched
+
+    def _resolve(self, matched_text):
+        # Map the matched text (possibly inflected) back to its keyword, longest first
+        keyword = self._resolved.get(matched_text)
+        if keyword is None:
+            keyword = next((kw for kw, pattern in self._keyword_patterns.items() if pattern.match(matched_text)), None)
+            self._resolved[matched_text] = keyword
+        return keyword
+
+    def classify(self, title, summary=''):
+        """(impact, impact type, category) from one scan of title + summary"""
+        matched = self.match_keywords(f"{title} {summary}")
+
+        impact_hits = [self._impact_rank[keyword] for keyword in matched if keyword in self._impact_rank]
+        if impact_hits:
+            _, _, tier, keyword = min(impact_hits)
+            impact, impact_type = IMPACT_TYPES.get(tier, ('Medium', f'Sector: {keyword.title()}'))
+        else:
+            impact, impact_type = 'Low', 'General'
+
+        category_hits = [self._category_rank[keyword] for keyword in matched if keyword in self._category_rank]
+        category = self.category_keywords[min(category_hits)][0] if category_hits else 'General Business'
+
+        return impact, impact_type, category
+
+@lru_cache(maxsize=1)
+def get_keyword_classifier():
+    """Classifier for the default tables, compiled once per process"""
+    return KeywordClassifier()
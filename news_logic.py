@@ -1,5 +1,4 @@
 # news_logic.py - FIXED WITH WORKING CLICKABLE LINKS
-import requests
 from datetime import datetime, timedelta
 import pandas as pd
 from typing import List, Dict, Tuple
@@ -7,27 +6,40 @@ import streamlit as st
 import feedparser
 import re
 import pytz
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from feed_cache import FeedCache
+from market_data_provider import get_market_data
+from news_archive import NewsArchive
+from news_dedup import NearDuplicateIndex
+from news_keywords import MARKET_KEYWORDS, get_keyword_classifier
+from news_dates import get_date_parser
+
+# Feed fetch limits: a slow source is dropped, it no longer holds up the refresh
+FEED_CONNECT_TIMEOUT_SECONDS = 3.05
+FEED_SOURCE_DEADLINE_SECONDS = 8
+NEWS_REFRESH_BUDGET_SECONDS = 12
+
+# Dedup is an LSH lookup per item, so the refresh keeps far more than the old 25
+MAX_ENTRIES_PER_FEED = 40
+MAX_NEWS_ITEMS = 200
+
+_feed_cache = None
+_feed_cache_lock = threading.Lock()
+
+def get_feed_cache():
+    """Process-wide feed cache (validators and bodies on disk, parsed entries in memory)"""
+    global _feed_cache
+    with _feed_cache_lock:
+        if _feed_cache is None:
+            _feed_cache = FeedCache()
+        return _feed_cache
 
 class NewsAnalyzer:
     def __init__(self):
-        self.market_keywords = {
-            'high_impact': [
-                'interest rate', 'rbi policy', 'budget', 'gdp', 'inflation',
-                'repo rate', 'reverse repo', 'fiscal deficit', 'war', 'pandemic',
-                'lockdown', 'vaccine', 'election', 'government policy', 'fed', 'fomc',
-                'geopolitics', 'trade war', 'sanctions', 'crude oil', 'natural disaster'
-            ],
-            'medium_impact': [
-                'corporate earnings', 'ipo', 'merger', 'acquisition', 'dividend',
-                'bonus', 'split', 'fii', 'dii', 'foreign investment',
-                'currency', 'rupee', 'dollar', 'quarterly results', 'exports', 'imports'
-            ],
-            'sector_specific': [
-                'banking', 'pharma', 'it', 'auto', 'steel', 'cement',
-                'energy', 'fmcg', 'telecom', 'real estate','defense','infrastructure',
-                'manufacturing','retail','healthcare', 'metal', 'chemicals'
-            ]
-        }
+        self.market_keywords = MARKET_KEYWORDS
+        self.keyword_classifier = get_keyword_classifier()
+        self.date_parser = get_date_parser()
         
         self.news_sources = {
             'economic_times': 'https://economictimes.indiatimes.com/rssfeedstopstories.cms',
@@ -43,58 +55,9 @@ class NewsAnalyzer:
         ist = pytz.timezone('Asia/Kolkata')
         return datetime.now(ist)
     
-    def parse_published_date(self, published_str):
+    def parse_published_date(self, published_str, source=None, parsed_tuple=None):
         """Parse various date formats and convert to IST"""
-        if not published_str:
-            return None
-            
-        # Common date formats in RSS feeds
-        date_formats = [
-            '%a, %d %b %Y %H:%M:%S %z',
-            '%a, %d %b %Y %H:%M:%S GMT',
-            '%a, %d %b %Y %H:%M:%S +0000',
-            '%a, %d %b %Y %H:%M:%S IST',
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S%z',
-            '%Y-%m-%dT%H:%M:%SZ',
-            '%d %b %Y %H:%M:%S',
-            '%a, %d %b %Y %H:%M:%S'
-        ]
-        
-        for fmt in date_formats:
-            try:
-                clean_published = published_str.strip()
-                
-                # Handle timezone cases
-                if 'IST' in clean_published:
-                    clean_published = clean_published.replace('IST', '+0530')
-                elif 'GMT' in clean_published and '+' not in clean_published:
-                    clean_published = clean_published.replace('GMT', '+0000')
-                
-                parsed_date = datetime.strptime(clean_published, fmt)
-                
-                if parsed_date.tzinfo is None:
-                    parsed_date = pytz.UTC.localize(parsed_date)
-                
-                ist_date = parsed_date.astimezone(pytz.timezone('Asia/Kolkata'))
-                return ist_date
-                
-            except ValueError:
-                continue
-        
-        # Fallback using email utils
-        try:
-            import email.utils
-            parsed_tuple = email.utils.parsedate_tz(published_str)
-            if parsed_tuple:
-                timestamp = email.utils.mktime_tz(parsed_tuple)
-                utc_date = datetime.fromtimestamp(timestamp, tz=pytz.UTC)
-                ist_date = utc_date.astimezone(pytz.timezone('Asia/Kolkata'))
-                return ist_date
-        except:
-            pass
-                
-        return None
+        return self.date_parser.parse(published_str, source, parsed_tuple)
     
     def is_recent_news(self, published_date):
         """Check if news is from last 48 hours"""
@@ -146,212 +109,243 @@ class NewsAnalyzer:
             'sort_timestamp': published_date.timestamp()
         }
     
-    def fetch_rss_news(self, url: str, source: str) -> List[Dict]:
+    def fetch_feed_content(self, url: str, source: str, deadline_seconds: float = FEED_SOURCE_DEADLINE_SECONDS):
+        """Conditionally download a feed within a hard per-source deadline (None on 304)"""
+        feed_cache = get_feed_cache()
+        response = get_market_data().fetch_feed(
+            url, source, feed_cache.conditional_headers(source), FEED_CONNECT_TIMEOUT_SECONDS, deadline_seconds
+        )
+        if response.status_code == 304:
+            feed_cache.mark_not_modified(source)
+            return None
+        content = response.content
+        
+        if response.status_code == 200:
+            feed_cache.save_feed(
+                source, url, response.headers.get('ETag'), response.headers.get('Last-Modified'), content
+            )
+        return content
+    
+    def fetch_rss_news(self, url: str, source: str, deadline_seconds: float = FEED_SOURCE_DEADLINE_SECONDS) -> List[Dict]:
         """Fetch news from RSS feeds with proper link handling"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
+            feed_cache = get_feed_cache()
+            content = self.fetch_feed_content(url, source, deadline_seconds)
             
-            try:
-                response = requests.get(url, headers=headers, timeout=15)
-                feed = feedparser.parse(response.content)
-            except:
-                feed = feedparser.parse(url)
+            if content is None:
+                # 304 Not Modified: reuse the items parsed from the unchanged feed
+                cached_items = feed_cache.get_source_items(source)
+                if cached_items is not None:
+                    return self.finalize_news_items(cached_items)
+                # First refresh since a restart: parse the stored body once
+                content = feed_cache.load_body(source)
+                if content is None:
+                    return []
+            
+            feed = feedparser.parse(content)
             
             if not feed.entries:
                 print(f"No entries found for {source}")
                 return []
                 
-            news_items = []
+            parsed_items = []
+            entry_keys = []
             
-            for entry in feed.entries[:15]:
+            for entry in feed.entries[:MAX_ENTRIES_PER_FEED]:
                 try:
-                    # Get and parse published date
+                    # Get published date string
                     published_str = (entry.get('published') or 
                                    entry.get('pubDate') or 
                                    entry.get('updated') or '')
                     
-                    published_date = self.parse_published_date(published_str)
-                    
-                    if published_date and not self.is_recent_news(published_date):
-                        continue
-                    
-                    # Get title and clean it
-                    title = self.clean_html(entry.get('title', 'No Title'))
-                    
-                    if len(title) < 10:
-                        continue
-                    
-                    # Get summary/description
-                    summary = (entry.get('summary') or 
-                              entry.get('description') or '')
-                    
-                    summary = self.clean_html(summary)[:400]
-                    
-                    # FIXED: Get proper link
-                    link = entry.get('link', '')
+                    # GUID (feedparser's 'id'), falling back to the link
+                    entry_key = entry.get('id') or entry.get('link') or entry.get('title', '')
+                    fingerprint = feed_cache.entry_fingerprint(
+                        entry.get('title', ''), entry.get('summary') or entry.get('description') or '',
+                        entry.get('link', ''), published_str
+                    )
                     
-                    # Clean and validate link
-                    if link:
-                        # Ensure proper protocol
-                        if not link.startswith(('http://', 'https://')):
-                            if link.startswith('//'):
-                                link = 'https:' + link
-                            elif link.startswith('/'):
-                                # Relative link - add domain based on source
-                                if 'economictimes' in url:
-                                    link = 'https://economictimes.indiatimes.com' + link
-                                elif 'business-standard' in url:
-                                    link = 'https://www.business-standard.com' + link
-                                elif 'moneycontrol' in url:
-                                    link = 'https://www.moneycontrol.com' + link
-                                elif 'livemint' in url:
-                                    link = 'https://www.livemint.com' + link
-                                elif 'financialexpress' in url:
-                                    link = 'https://www.financialexpress.com' + link
-                                else:
-                                    link = ''
-                            else:
-                                link = 'https://' + link
-                        
-                        # Validate link format
-                        if not any(domain in link for domain in ['economictimes', 'business-standard', 'moneycontrol', 'livemint', 'financialexpress', 'reuters']):
-                            # If link doesn't contain expected domains, it might be malformed
-                            pass  # Keep the link as is, let browser handle it
+                    item = feed_cache.get_entry(entry_key, fingerprint)
+                    if item is None:
+                        item = self.parse_news_entry(entry, url, source, published_str)
+                        if item is None:
+                            continue
+                        item['guid'] = entry_key
+                        feed_cache.put_entry(entry_key, fingerprint, item)
                     
-                    # Format date and time
-                    date_info = self.format_news_date_time(published_date)
-                    
-                    news_items.append({
-                        'title': title,
-                        'summary': summary if summary else "Click link to read full article...",
-                        'link': link,  # Store the actual link
-                        'published_str': published_str,
-                        'published_date': published_date,
-                        'source': source.replace('_', ' ').title(),
-                        'date': date_info['date'],
-                        'time': date_info['time'],
-                        'relative_time': date_info['relative_time'],
-                        'sort_timestamp': date_info['sort_timestamp']
-                    })
+                    parsed_items.append(item)
+                    entry_keys.append(entry_key)
                     
                 except Exception as e:
                     print(f"Error processing entry from {source}: {e}")
                     continue
             
-            return news_items
+            feed_cache.set_source_entries(source, entry_keys)
+            return self.finalize_news_items(parsed_items)
             
         except Exception as e:
             print(f"Error fetching from {source}: {e}")
             return []
     
-    def analyze_market_impact(self, title: str, summary: str) -> Tuple[str, str]:
-        """Analyze the potential market impact of news"""
-        text = (title + " " + summary).lower()
+    def parse_news_entry(self, entry, url: str, source: str, published_str: str):
+        """Parse and score one feed entry (None if it is not a usable headline)"""
+        published_date = self.parse_published_date(
+            published_str, source, entry.get('published_parsed') or entry.get('updated_parsed')
+        )
+        
+        # Get title and clean it
+        title = self.clean_html(entry.get('title', 'No Title'))
+        
+        if len(title) < 10:
+            return None
+        
+        # Get summary/description
+        summary = (entry.get('summary') or 
+                  entry.get('description') or '')
+        
+        summary = self.clean_html(summary)[:400]
         
-        # Check for high impact keywords
-        for keyword in self.market_keywords['high_impact']:
-            if keyword in text:
-                return 'High', 'Policy/Macro'
+        # FIXED: Get proper link
+        link = entry.get('link', '')
+        
+        # Clean and validate link
+        if link:
+            # Ensure proper protocol
+            if not link.startswith(('http://', 'https://')):
+                if link.startswith('//'):
+                    link = 'https:' + link
+                elif link.startswith('/'):
+                    # Relative link - add domain based on source
+                    if 'economictimes' in url:
+                        link = 'https://economictimes.indiatimes.com' + link
+                    elif 'business-standard' in url:
+                        link = 'https://www.business-standard.com' + link
+                    elif 'moneycontrol' in url:
+                        link = 'https://www.moneycontrol.com' + link
+                    elif 'livemint' in url:
+                        link = 'https://www.livemint.com' + link
+                    elif 'financialexpress' in url:
+                        link = 'https://www.financialexpress.com' + link
+                    else:
+                        link = ''
+                else:
+                    link = 'https://' + link
+            
+            # Validate link format
+            if not any(domain in link for domain in ['economictimes', 'business-standard', 'moneycontrol', 'livemint', 'financialexpress', 'reuters']):
+                # If link doesn't contain expected domains, it might be malformed
+                pass  # Keep the link as is, let browser handle it
         
-        # Check for medium impact keywords
-        for keyword in self.market_keywords['medium_impact']:
-            if keyword in text:
-                return 'Medium', 'Corporate/Markets'
+        # Analyze impact and categorize
+        impact, impact_type, category = self.classify_news(title, summary)
         
-        # Check for sector specific
-        for keyword in self.market_keywords['sector_specific']:
-            if keyword in text:
-                return 'Medium', f'Sector: {keyword.title()}'
+        return {
+            'title': title,
+            'summary': summary if summary else "Click link to read full article...",
+            'link': link,  # Store the actual link
+            'published_str': published_str,
+            'published_date': published_date,
+            'source': source.replace('_', ' ').title(),
+            'market_impact': impact,
+            'impact_type': impact_type,
+            'category': category
+        }
+    
+    def finalize_news_items(self, parsed_items: List[Dict]) -> List[Dict]:
+        """Apply the 48h window and current relative times to parsed items (returns copies)"""
+        news_items = []
+        for item in parsed_items:
+            if item['published_date'] and not self.is_recent_news(item['published_date']):
+                continue
+            
+            # Format date and time
+            news_items.append(dict(item, **self.format_news_date_time(item['published_date'])))
         
-        return 'Low', 'General'
+        return news_items
+    
+    def classify_news(self, title: str, summary: str) -> Tuple[str, str, str]:
+        """Impact, impact type and category from one word-boundary keyword scan"""
+        return self.keyword_classifier.classify(title, summary)
+    
+    def analyze_market_impact(self, title: str, summary: str) -> Tuple[str, str]:
+        """Analyze the potential market impact of news"""
+        impact, impact_type, _ = self.classify_news(title, summary)
+        return impact, impact_type
     
     def categorize_news(self, title: str, summary: str) -> str:
         """Categorize news into different buckets"""
-        text = (title + " " + summary).lower()
-        
-        if any(keyword in text for keyword in ['rbi', 'interest rate', 'policy', 'budget', 'fed', 'fomc']):
-            return 'Policy/Central Bank'
-        elif any(keyword in text for keyword in ['earnings', 'results', 'profit', 'revenue', 'quarterly']):
-            return 'Corporate Earnings'
-        elif any(keyword in text for keyword in ['ipo', 'listing', 'issue', 'offer']):
-            return 'IPO/Listings'
-        elif any(keyword in text for keyword in ['fii', 'dii', 'investment', 'inflow', 'outflow']):
-            return 'FII/DII Activity'
-        elif any(keyword in text for keyword in ['crude', 'oil', 'commodity', 'gold', 'silver']):
-            return 'Commodities'
-        elif any(keyword in text for keyword in ['rupee', 'dollar', 'currency', 'forex']):
-            return 'Currency'
-        elif any(keyword in text for keyword in ['nifty', 'sensex', 'index', 'market']):
-            return 'Market Movement'
-        elif any(keyword in text for keyword in ['geopolitic', 'war', 'trade', 'sanction', 'china', 'usa']):
-            return 'Geopolitics'
-        else:
-            return 'General Business'
+        return self.classify_news(title, summary)[2]
 
-def get_latest_news() -> List[Dict]:
-    """Get latest market news with working links"""
+def collect_latest_news(budget_seconds: float = NEWS_REFRESH_BUDGET_SECONDS, progress_callback=None) -> Tuple[List[Dict], int]:
+    """Fetch, merge and de-duplicate all sources; returns (unique news, sources processed)
+
+    All sources are fetched concurrently; sources still running when the
+    refresh budget runs out are skipped for this refresh. progress_callback(message)
+    is called as sources complete. No Streamlit calls, so the news ingester
+    thread can use it too.
+    """
     analyzer = NewsAnalyzer()
     all_news = []
     
-    progress_text = st.empty()
-    
     sources_processed = 0
     total_sources = len(analyzer.news_sources)
+    if progress_callback:
+        progress_callback(f"Fetching latest news from {total_sources} sources...")
     
-    for source_name, url in analyzer.news_sources.items():
-        try:
-            progress_text.text(f"Fetching latest news from {source_name}... ({sources_processed + 1}/{total_sources})")
-            news_items = analyzer.fetch_rss_news(url, source_name)
-            
-            for item in news_items:
-                # Analyze impact and categorize
-                impact, impact_type = analyzer.analyze_market_impact(
-                    item['title'], item['summary']
-                )
-                category = analyzer.categorize_news(item['title'], item['summary'])
-                
-                item.update({
-                    'market_impact': impact,
-                    'impact_type': impact_type,
-                    'category': category
-                })
+    executor = ThreadPoolExecutor(max_workers=total_sources, thread_name_prefix='rss-fetch')
+    futures = {
+        executor.submit(analyzer.fetch_rss_news, url, source_name): source_name
+        for source_name, url in analyzer.news_sources.items()
+    }
+    
+    try:
+        for future in as_completed(futures, timeout=budget_seconds):
+            source_name = futures[future]
+            try:
+                # Items arrive already scored (scores are cached per entry)
+                all_news.extend(future.result())
                 
-                all_news.append(item)
-            
-            sources_processed += 1
+                sources_processed += 1
+                if progress_callback:
+                    progress_callback(f"Fetched {source_name} ({sources_processed}/{total_sources})")
                 
-        except Exception as e:
-            print(f"Error processing {source_name}: {e}")
-            sources_processed += 1
-            continue
-    
-    progress_text.empty()
+            except Exception as e:
+                print(f"Error processing {source_name}: {e}")
+                continue
+    except FuturesTimeoutError:
+        skipped = [futures[f] for f in futures if not f.done()]
+        print(f"News refresh budget of {budget_seconds}s exceeded - skipped: {', '.join(skipped)}")
+    finally:
+        # Stragglers finish (or hit their own deadline) in the background
+        executor.shutdown(wait=False)
     
     # Sort by published date (most recent first)
     all_news.sort(key=lambda x: x.get('sort_timestamp', 0), reverse=True)
     
-    # Remove duplicates based on title similarity
+    # Remove near-duplicates (same story from several sources); the newest copy is kept
+    dedup_index = NearDuplicateIndex()
     unique_news = []
-    seen_titles = set()
     
     for news in all_news:
-        title_normalized = news['title'].lower().strip()
-        title_words = set(re.findall(r'\b\w+\b', title_normalized))
-        
-        # Check for duplicates
-        is_duplicate = False
-        for seen_title in seen_titles:
-            seen_words = set(re.findall(r'\b\w+\b', seen_title))
-            if (len(title_words.intersection(seen_words)) > len(title_words) * 0.6 and
-                abs(len(title_words) - len(seen_words)) < 3):
-                is_duplicate = True
-                break
+        if len(unique_news) >= MAX_NEWS_ITEMS:
+            break
         
-        if not is_duplicate and len(unique_news) < 25:
+        duplicate_of = dedup_index.add(len(unique_news), news['title'], news['summary'])
+        if duplicate_of is None:
             unique_news.append(news)
-            seen_titles.add(title_normalized)
+        else:
+            kept = unique_news[duplicate_of]
+            also_reported_by = kept.setdefault('also_reported_by', [])
+            if news['source'] != kept['source'] and news['source'] not in also_reported_by:
+                also_reported_by.append(news['source'])
+    
+    return unique_news, sources_processed
+
+def get_latest_news(budget_seconds: float = NEWS_REFRESH_BUDGET_SECONDS) -> List[Dict]:
+    """Get latest market news with working links"""
+    progress_text = st.empty()
+    unique_news, sources_processed = collect_latest_news(budget_seconds, progress_callback=progress_text.text)
+    progress_text.empty()
     
     if len(unique_news) == 0:
         st.warning("No recent news found. This could be due to network issues or weekend/holiday period.")
@@ -360,12 +354,13 @@ def get_latest_news() -> List[Dict]:
     
     return unique_news
 
-def get_market_sentiment() -> Dict:
-    """Get market sentiment analysis"""
+def get_market_sentiment(window_hours: int = 48, archive=None) -> Dict:
+    """Get market sentiment analysis from the news archive (no feed fetch)"""
     try:
-        news_data = get_latest_news()
+        archive = archive or NewsArchive()
+        sentiment = archive.get_sentiment(window_hours)
         
-        if not news_data:
+        if not sentiment['total_news']:
             return {
                 'sentiment': 'Unknown - No Data',
                 'high_impact_news': 0,
@@ -373,33 +368,13 @@ def get_market_sentiment() -> Dict:
                 'last_updated': 'No data available'
             }
         
-        high_impact_count = len([n for n in news_data if n['market_impact'] == 'High'])
-        medium_impact_count = len([n for n in news_data if n['market_impact'] == 'Medium'])
-        total_news = len(news_data)
-        
-        # Sentiment calculation
-        impact_ratio = high_impact_count / total_news if total_news > 0 else 0
-        medium_ratio = medium_impact_count / total_news if total_news > 0 else 0
-        
-        if impact_ratio > 0.25:
-            sentiment = 'High Volatility - Major Events'
-        elif impact_ratio > 0.15 or medium_ratio > 0.4:
-            sentiment = 'Moderate Volatility - Active News Flow'
-        elif medium_ratio > 0.2:
-            sentiment = 'Cautious - Normal Activity'
-        else:
-            sentiment = 'Stable - Quiet News Environment'
-        
-        ist_time = pytz.timezone('Asia/Kolkata')
-        current_time = datetime.now(ist_time)
-        
         return {
-            'sentiment': sentiment,
-            'high_impact_news': high_impact_count,
-            'medium_impact_news': medium_impact_count,
-            'total_news': total_news,
-            'sources_checked': len(analyzer.news_sources),
-            'last_updated': current_time.strftime('%d-%m-%Y %H:%M:%S IST')
+            'sentiment': sentiment['sentiment'],
+            'high_impact_news': sentiment['high_impact_news'],
+            'medium_impact_news': sentiment['medium_impact_news'],
+            'total_news': sentiment['total_news'],
+            'sources_checked': len(NewsAnalyzer().news_sources),
+            'last_updated': sentiment['window_end'].strftime('%d-%m-%Y %H:%M:%S IST')
         }
     except Exception as e:
         print(f"Error getting market sentiment: {e}")
@@ -0,0 +1,156 @@
+# option_chain.py - LOCAL OPTION CHAIN SNAPSHOT WITH IMPLIED VOLATILITY AND GREEKS
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_paths import get_data_dir
+from options_pricing import RISK_FREE_RATE, DAYS_PER_YEAR, black_scholes_greeks, implied_volatility
+
+# Snapshot CSV, one row per contract:
+#   underlying,expiry,strike,option_type,ltp[,underlying_price][,snapshot_time]
+#   NIFTY,2025-07-31,24800,CE,142.5,24815.3,2025-07-28 15:25:00
+# underlying_price (spot when the snapshot was taken) is optional; the
+# scanner's spot is used when it is missing.
+CHAIN_SNAPSHOT_FILE = "option_chain_snapshot.csv"
+REQUIRED_COLUMNS = ['underlying', 'expiry', 'strike', 'option_type', 'ltp']
+
+# NSE options expire at the close
+EXPIRY_HOUR = 15
+EXPIRY_MINUTE = 30
+
+# Snapshot rows price a contract only at its own expiry (a day either way for
+# holiday-shifted dates) and only while the quote is recent
+EXPIRY_TOLERANCE_DAYS = 1
+CHAIN_MAX_AGE_HOURS = 24
+
+_snapshot_cache = {}  # path -> (mtime, chain DataFrame)
+_snapshot_lock = threading.Lock()
+
+def default_chain_path(db_directory=None):
+    """Snapshot location (same directory as the recommendations tracker database by default)"""
+    return os.path.join(db_directory or get_data_dir(), CHAIN_SNAPSHOT_FILE)
+
+def load_chain_snapshot(path=None):
+    """Snapshot contracts as a normalized DataFrame (empty if the file is missing or unreadable)
+
+    quoted_at is each row's snapshot_time, else the file's modification
+    time. Parsed once per file version (modification time).
+    """
+    path = path or default_chain_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+    with _snapshot_lock:
+        cached = _snapshot_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    try:
+        chain = pd.read_csv(path)
+        chain.columns = [column.strip().lower() for column in chain.columns]
+        missing = [column for column in REQUIRED_COLUMNS if column not in chain.columns]
+        if missing:
+            raise ValueError(f"missing columns {missing}")
+        chain['underlying'] = chain['underlying'].astype(str).str.strip().str.upper()
+        chain['option_type'] = chain['option_type'].astype(str).str.strip().str.upper()
+        chain['expiry'] = pd.to_datetime(chain['expiry']).dt.normalize()
+        chain['strike'] = pd.to_numeric(chain['strike'], errors='coerce')
+        chain['ltp'] = pd.to_numeric(chain['ltp'], errors='coerce')
+        quoted_at = pd.to_datetime(chain['snapshot_time'], errors='coerce') if 'snapshot_time' in chain.columns \
+            else pd.Series(pd.NaT, index=chain.index)
+        chain['quoted_at'] = quoted_at.fillna(pd.Timestamp(datetime.fromtimestamp(mtime)))
+        chain = chain.dropna(subset=['strike', 'ltp'])
+        chain = chain[chain['option_type'].isin(['CE', 'PE'])].reset_index(drop=True)
+    except Exception as e:
+        print(f"Error reading option chain snapshot {path}: {e}")
+        chain = pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+    with _snapshot_lock:
+        _snapshot_cache[path] = (mtime, chain)
+    return chain
+
+def fresh_quotes(chain, max_age_hours=CHAIN_MAX_AGE_HOURS, now=None):
+    """Snapshot rows quoted within max_age_hours (older rows are dropped so pricing falls back to the model)"""
+    if chain.empty or 'quoted_at' not in chain.columns:
+        return chain
+    cutoff = pd.Timestamp(now or datetime.now()) - pd.Timedelta(hours=max_age_hours)
+    fresh = chain[chain['quoted_at'] >= cutoff].reset_index(drop=True)
+    if len(fresh) < len(chain):
+        print(f"Option chain snapshot: ignoring {len(chain) - len(fresh)} quotes older than {max_age_hours}h")
+    return fresh
+
+def add_iv_and_greeks(chain, spots=None, as_of=None, rate=RISK_FREE_RATE):
+    """Chain with iv, delta, gamma, vega and theta columns, solved for all contracts at once
+
+    spots maps underlying -> spot and fills rows without underlying_price;
+    as_of defaults to the snapshot_time column, else now.
+    """
+    chain = chain.copy()
+    if chain.empty:
+        for column in ('spot', 'years', 'iv', 'delta', 'gamma', 'vega', 'theta'):
+            chain[column] = pd.Series(dtype=float)
+        return chain
+
+    spot = chain['underlying'].map(spots or {}).astype(float)
+    if 'underlying_price' in chain.columns:
+        spot = pd.to_numeric(chain['underlying_price'], errors='coerce').fillna(spot)
+    chain['spot'] = spot
+
+    if as_of is not None:
+        valued_at = pd.Series(pd.Timestamp(as_of), index=chain.index)
+    elif 'snapshot_time' in chain.columns:
+        valued_at = pd.to_datetime(chain['snapshot_time'], errors='coerce').fillna(pd.Timestamp(datetime.now()))
+    else:
+        valued_at = pd.Series(pd.Timestamp(datetime.now()), index=chain.index)
+    expires_at = chain['expiry'] + pd.Timedelta(hours=EXPIRY_HOUR, minutes=EXPIRY_MINUTE)
+    chain['years'] = ((expires_at - valued_at).dt.total_seconds() / (DAYS_PER_YEAR * 86400)).clip(lower=0)
+
+    spot_values = chain['spot'].to_numpy(dtype=float)
+    strikes = chain['strike'].to_numpy(dtype=float)
+    years = chain['years'].to_numpy(dtype=float)
+    is_call = (chain['option_type'] == 'CE').to_numpy()
+
+    iv = implied_volatility(chain['ltp'].to_numpy(dtype=float), spot_values, strikes, years, is_call, rate)
+    greeks = black_scholes_greeks(spot_values, strikes, years, np.nan_to_num(iv), is_call, rate)
+    chain['iv'] = iv
+    for name, values in greeks.items():
+        chain[name] = np.where(np.isnan(iv), np.nan, values)
+    return chain
+
+def matching_expiry(rows, expiry, tolerance_days=EXPIRY_TOLERANCE_DAYS):
+    """Listed snapshot expiry closest to the requested one if within tolerance_days, else None"""
+    if rows.empty:
+        return None
+    target = pd.Timestamp(expiry).normalize()
+    nearest = min(rows['expiry'].unique(), key=lambda candidate: abs(pd.Timestamp(candidate) - target))
+    return nearest if abs(pd.Timestamp(nearest) - target) <= pd.Timedelta(days=tolerance_days) else None
+
+def lookup_contract(chain, underlying, strike, option_type, expiry):
+    """Snapshot row (dict) for a contract at the requested expiry (matching_expiry), or None"""
+    if chain.empty:
+        return None
+    rows = chain[(chain['underlying'] == underlying) & (chain['option_type'] == option_type) &
+                 (chain['strike'] == float(strike))]
+    listed_expiry = matching_expiry(rows, expiry)
+    if listed_expiry is None:
+        return None
+    rows = rows[rows['expiry'] == listed_expiry]
+    return rows.iloc[0].to_dict()
+
+def atm_implied_vol(chain, underlying, spot, expiry):
+    """Mean CE/PE implied volatility at the strike nearest spot for the requested expiry, or None"""
+    if chain.empty or 'iv' not in chain.columns:
+        return None
+    rows = chain[(chain['underlying'] == underlying) & chain['iv'].notna()]
+    listed_expiry = matching_expiry(rows, expiry)
+    if listed_expiry is None:
+        return None
+    rows = rows[rows['expiry'] == listed_expiry]
+    atm_strike = rows['strike'].iloc[(rows['strike'] - spot).abs().argmin()]
+    iv = rows.loc[rows['strike'] == atm_strike, 'iv'].mean()
+    return float(iv) if pd.notna(iv) else None
@@ -0,0 +1,137 @@
+# option_scenarios.py - SPOT x TIME x VOLATILITY P&L SCENARIO GRIDS FOR OPTION CONTRACTS
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from options_pricing import RISK_FREE_RATE, black_scholes_price, years_to_expiry
+from scan_cache import market_data_as_of
+
+# Default grid: spot moves (% of current spot), vol shifts (vol points) and days-remaining steps to expiry
+SPOT_SHOCKS_PCT = (-10.0, -7.5, -5.0, -2.5, 0.0, 2.5, 5.0, 7.5, 10.0)
+VOL_SHIFTS = (-5.0, -2.5, 0.0, 2.5, 5.0)
+DAY_STEPS = 6
+
+# Shifted volatilities never go below this
+MIN_SCENARIO_VOL = 0.01
+
+def days_remaining_grid(days_to_expiry, steps=DAY_STEPS):
+    """(N, steps) days left per contract (to 0.1 day), from today's days to expiry down to expiry (0)"""
+    days = np.maximum(np.asarray(days_to_expiry, dtype=float), 0.0)
+    return np.round(days[:, None] * np.linspace(1.0, 0.0, steps)[None, :], 1)
+
+def scenario_grids(spots, strikes, is_call, days_to_expiry, vols, entry_premiums, spot_shocks_pct=SPOT_SHOCKS_PCT,
+                   vol_shifts=VOL_SHIFTS, day_steps=DAY_STEPS, rate=RISK_FREE_RATE):
+    """Value and P&L of every contract over a days-remaining x vol x spot grid, in one broadcast pricing call
+
+    Every argument up to entry_premiums has shape (N,); vols are annualized
+    and vol_shifts are in vol points. Returns spot (N, S), days_remaining
+    (N, D), vol (N, V) and value, pnl (value - entry premium) and pnl_pct
+    arrays of shape (N, D, V, S).
+    """
+    spots = np.asarray(spots, dtype=float)
+    entry_premiums = np.asarray(entry_premiums, dtype=float)
+    scenario_spots = spots[:, None] * (1 + np.asarray(spot_shocks_pct, dtype=float)[None, :] / 100)
+    days_remaining = days_remaining_grid(days_to_expiry, day_steps)
+    scenario_vols = np.maximum(np.asarray(vols, dtype=float)[:, None] + np.asarray(vol_shifts, dtype=float)[None, :] / 100,
+                               MIN_SCENARIO_VOL)
+
+    value = black_scholes_price(
+        scenario_spots[:, None, None, :], np.asarray(strikes, dtype=float)[:, None, None, None],
+        years_to_expiry(days_remaining)[:, :, None, None], scenario_vols[:, None, :, None],
+        np.asarray(is_call, dtype=bool)[:, None, None, None], rate
+    )
+    pnl = value - entry_premiums[:, None, None, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pnl_pct = np.where(entry_premiums[:, None, None, None] > 0, pnl / entry_premiums[:, None, None, None] * 100, np.nan)
+    return {
+        'spot': scenario_spots,
+        'days_remaining': days_remaining,
+        'vol': scenario_vols,
+        'value': value,
+        'pnl': pnl,
+        'pnl_pct': pnl_pct
+    }
+
+def scenario_frame(grids, index, spot_shocks_pct=SPOT_SHOCKS_PCT, vol_shifts=VOL_SHIFTS):
+    """Long-format scenario table for one contract of a scenario_grids result (one row per grid cell)"""
+    days, vols, spots = grids['days_remaining'].shape[1], grids['vol'].shape[1], grids['spot'].shape[1]
+    day_axis, vol_axis, spot_axis = np.meshgrid(np.arange(days), np.arange(vols), np.arange(spots), indexing='ij')
+    day_axis, vol_axis, spot_axis = day_axis.ravel(), vol_axis.ravel(), spot_axis.ravel()
+    return pd.DataFrame({
+        'Days Left': grids['days_remaining'][index, day_axis],
+        'Vol Shift': np.asarray(vol_shifts, dtype=float)[vol_axis],
+        'IV %': np.round(grids['vol'][index, vol_axis] * 100, 1),
+        'Spot Move %': np.asarray(spot_shocks_pct, dtype=float)[spot_axis],
+        'Spot': np.round(grids['spot'][index, spot_axis], 2),
+        'Option Value': np.round(grids['value'][index].ravel(), 2),
+        'P&L': np.round(grids['pnl'][index].ravel(), 2),
+        'P&L %': np.round(grids['pnl_pct'][index].ravel(), 1)
+    })
+
+class ScenarioGridCache:
+    """Scenario tables per contract for one market-data bucket (scan_cache.market_data_as_of)
+
+    A contract is keyed by its identity and pricing inputs, so re-rendering
+    the same recommendations costs a dictionary lookup; contracts the cache
+    hasn't seen are priced together in one scenario_grids call.
+    """
+
+    def __init__(self, max_contracts=2000):
+        self.max_contracts = max_contracts
+        self._frames = OrderedDict()  # contract key -> scenario DataFrame
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, contracts, spot_shocks_pct=SPOT_SHOCKS_PCT, vol_shifts=VOL_SHIFTS, day_steps=DAY_STEPS):
+        """List of scenario tables, one per contract
+
+        contracts is a DataFrame with underlying, strike, option_type (CE/PE),
+        expiry, spot, days_to_expiry, vol and premium columns.
+        """
+        grid_spec = (tuple(spot_shocks_pct), tuple(vol_shifts), day_steps)
+        as_of = market_data_as_of()
+        keys = [
+            (row.underlying, float(row.strike), row.option_type, str(row.expiry), float(row.spot),
+             round(float(row.days_to_expiry), 2), round(float(row.vol), 6), float(row.premium), grid_spec, as_of)
+            for row in contracts.itertuples(index=False)
+        ]
+
+        frames, missing = {}, []
+        with self._lock:
+            for position, key in enumerate(keys):
+                if key in self._frames:
+                    self._frames.move_to_end(key)
+                    frames[position] = self._frames[key]
+                    self.hits += 1
+                else:
+                    missing.append(position)
+
+        if missing:
+            batch = contracts.iloc[missing]
+            grids = scenario_grids(
+                batch['spot'], batch['strike'], batch['option_type'] == 'CE', batch['days_to_expiry'],
+                batch['vol'], batch['premium'], spot_shocks_pct, vol_shifts, day_steps
+            )
+            with self._lock:
+                for index, position in enumerate(missing):
+                    frames[position] = scenario_frame(grids, index, spot_shocks_pct, vol_shifts)
+                    self._frames[keys[position]] = frames[position]
+                    self._frames.move_to_end(keys[position])
+                while len(self._frames) > self.max_contracts:
+                    self._frames.popitem(last=False)
+                self.misses += len(missing)
+        return [frames[position] for position in range(len(keys))]
+
+    def stats(self):
+        """Cache counters for display"""
+        with self._lock:
+            return {'contracts': len(self._frames), 'hits': self.hits, 'misses': self.misses}
+
+@lru_cache(maxsize=1)
+def get_scenario_cache():
+    """Process-wide scenario cache"""
+    return ScenarioGridCache()
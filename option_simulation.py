@@ -0,0 +1,139 @@
+# option_simulation.py - MONTE CARLO PAYOFF SIMULATION FOR OPTION RECOMMENDATIONS
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from options_pricing import RISK_FREE_RATE, DAYS_PER_YEAR, black_scholes_price
+
+# Realized volatility: daily close-to-close log returns over the last 20 sessions
+HISTORICAL_VOL_WINDOW = 20
+TRADING_DAYS_PER_YEAR = 252
+
+# Paths per batch are sized so one batch holds about this many path x contract cells
+CHUNK_CELLS = 1_000_000
+PNL_PERCENTILES = (5, 25, 50, 75, 95)
+
+def historical_volatility(closes, window=HISTORICAL_VOL_WINDOW):
+    """Annualized volatility of the last window daily log returns, or None with fewer than 5 returns"""
+    closes = np.asarray(closes, dtype=float)
+    closes = closes[np.isfinite(closes) & (closes > 0)]
+    returns = np.diff(np.log(closes))[-window:]
+    if len(returns) < 5:
+        return None
+    vol = float(np.std(returns, ddof=1) * math.sqrt(TRADING_DAYS_PER_YEAR))
+    return vol if vol > 0 else None
+
+def _simulate_chunk(task):
+    # One batch of paths for every contract; module-level so worker processes can unpickle it.
+    # Each contract's time to expiry is split into steps (whole steps of at most a day,
+    # step_years each); contracts arrive sorted by step count (most first), so each step
+    # only the leading columns still before expiry are advanced.
+    (seed_sequence, n_paths, spots, strikes, is_call, steps, step_years, entry_premiums, spot_targets, spot_stops,
+     path_vols, pricing_vols, drift, rate) = task
+    rng = np.random.default_rng(seed_sequence)
+    step_drift = ((drift - 0.5 * path_vols * path_vols) * step_years).astype(np.float32)
+    step_vol = (path_vols * np.sqrt(step_years)).astype(np.float32)
+    # Barriers as log-moves from spot; the target is the upper one for a bullish setup
+    target_is_up = spot_targets >= spots
+    upper = np.log(np.maximum(spot_targets, spot_stops) / spots).astype(np.float32)
+    lower = np.log(np.minimum(spot_targets, spot_stops) / spots).astype(np.float32)
+
+    shape = (n_paths, len(spots))
+    log_move = np.zeros(shape, dtype=np.float32)
+    exit_move = np.zeros(shape, dtype=np.float32)
+    exit_step = np.broadcast_to(steps, shape).copy()
+    hit_upper = np.zeros(shape, dtype=bool)
+    hit_lower = np.zeros(shape, dtype=bool)
+    alive = np.ones(shape, dtype=bool)
+
+    for step in range(1, int(steps[0]) + 1):
+        live = int(np.searchsorted(-steps, -step, side='right'))  # columns with steps >= step
+        moves = log_move[:, :live]
+        moves += step_drift[:live] + step_vol[:live] * rng.standard_normal((n_paths, live), dtype=np.float32)
+        still = alive[:, :live]
+        reached_upper = still & (moves >= upper[:live])
+        reached_lower = still & (moves <= lower[:live])
+        exiting = reached_upper | reached_lower | (still & (step >= steps[:live]))
+
+        np.copyto(exit_move[:, :live], moves, where=exiting)
+        np.copyto(exit_step[:, :live], step, where=exiting)
+        hit_upper[:, :live] |= reached_upper
+        hit_lower[:, :live] |= reached_lower
+        still &= ~exiting
+
+    # Reprice each contract where its path left: at the barrier step with the time left, else at expiry
+    exit_spot = spots * np.exp(exit_move.astype(float))
+    remaining_years = np.maximum(steps - exit_step, 0) * step_years
+    exit_value = black_scholes_price(exit_spot, strikes, remaining_years, pricing_vols, is_call, rate)
+    pnl = (exit_value - entry_premiums).astype(np.float32)
+    hit_target = np.where(target_is_up, hit_upper, hit_lower)
+    hit_stop = np.where(target_is_up, hit_lower, hit_upper)
+    return hit_target.sum(axis=0), hit_stop.sum(axis=0), pnl
+
+def simulate_option_outcomes(spots, strikes, is_call, days_to_expiry, entry_premiums, spot_targets, spot_stops,
+                             path_vols, pricing_vols=None, n_paths=100_000, seed=None, chunk_paths=None,
+                             workers=1, drift=0.0, rate=RISK_FREE_RATE, percentiles=PNL_PERCENTILES):
+    """Distribution of outcomes for a batch of long option positions held to target, stop or expiry
+
+    Every argument but the settings is a (C,) array, one entry per contract;
+    days_to_expiry may be fractional (an expiry-day contract has hours left).
+    Underlying paths (GBM at path_vols, e.g. historical volatility) step at
+    most a day at a time until the spot crosses its target or stop, or the
+    contract expires, and the option is repriced there at pricing_vols
+    (implied volatility; defaults to path_vols). Contracts already expired
+    get NaN results. Paths are drawn in batches of chunk_paths so memory stays
+    bounded, and each batch has its own child of seed, so results do not
+    depend on workers (> 1 spreads the batches over processes).
+
+    Returns target_probability, stop_probability, expected_pnl and
+    expected_return as (C,) arrays and pnl_percentiles as (C, P).
+    """
+    spots = np.asarray(spots, dtype=float)
+    contracts = len(spots)
+    strikes = np.broadcast_to(np.asarray(strikes, dtype=float), (contracts,))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), (contracts,))
+    days = np.maximum(np.broadcast_to(np.asarray(days_to_expiry, dtype=float), (contracts,)), 0.0)
+    steps = np.ceil(days).astype(int)
+    step_years = np.where(steps > 0, days / np.maximum(steps, 1), 0.0) / DAYS_PER_YEAR
+    entry_premiums = np.broadcast_to(np.asarray(entry_premiums, dtype=float), (contracts,))
+    spot_targets = np.broadcast_to(np.asarray(spot_targets, dtype=float), (contracts,))
+    spot_stops = np.broadcast_to(np.asarray(spot_stops, dtype=float), (contracts,))
+    path_vols = np.broadcast_to(np.asarray(path_vols, dtype=float), (contracts,))
+    pricing_vols = path_vols if pricing_vols is None else np.broadcast_to(np.asarray(pricing_vols, dtype=float), (contracts,))
+
+    # Longest-dated contracts first (see _simulate_chunk); results are put back in input order
+    order = np.argsort(-steps, kind='stable')
+    restore = np.argsort(order)
+    contract_arrays = [array[order] for array in (spots, strikes, is_call, steps, step_years, entry_premiums,
+                                                  spot_targets, spot_stops, path_vols, pricing_vols)]
+
+    chunk_paths = chunk_paths or max(1, CHUNK_CELLS // max(contracts, 1))
+    batch_sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    tasks = [
+        (seed_sequence, size, *contract_arrays, drift, rate)
+        for seed_sequence, size in zip(seeds, batch_sizes)
+    ]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_simulate_chunk, tasks))
+    else:
+        results = [_simulate_chunk(task) for task in tasks]
+
+    target_hits = sum(result[0] for result in results)[restore]
+    stop_hits = sum(result[1] for result in results)[restore]
+    pnl = np.concatenate([result[2] for result in results], axis=0)[:, restore]
+
+    expired = steps == 0
+    expected_pnl = np.where(expired, np.nan, pnl.mean(axis=0, dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected_return = np.where(entry_premiums > 0, expected_pnl / entry_premiums, np.nan)
+    return {
+        'target_probability': np.where(expired, np.nan, target_hits / n_paths),
+        'stop_probability': np.where(expired, np.nan, stop_hits / n_paths),
+        'expected_pnl': expected_pnl,
+        'expected_return': expected_return,
+        'pnl_percentiles': np.where(expired[:, None], np.nan, np.percentile(pnl, percentiles, axis=0).T)
+    }
@@ -0,0 +1,159 @@
+# option_strategies.py - MULTI-LEG OPTION STRATEGY SEARCH OVER A PRICED STRIKE LADDER
+import numpy as np
+
+from options_pricing import norm_cdf
+
+MAX_LEGS = 4
+CE, PE = 0, 1
+
+STRATEGY_TYPES = ['Vertical Spread', 'Straddle', 'Strangle', 'Iron Condor']
+
+# Legs priced below this are not worth trading (same floor as the single-option premium engine)
+MIN_LEG_PREMIUM = 0.05
+
+def _legs(names, *leg_columns):
+    # Pack (strike index, CE/PE, quantity) leg columns into padded (N, MAX_LEGS) arrays
+    count = len(names)
+    strike_index = np.zeros((count, MAX_LEGS), dtype=int)
+    option_type = np.zeros((count, MAX_LEGS), dtype=int)
+    quantity = np.zeros((count, MAX_LEGS))
+    for leg, (strikes, types, quantities) in enumerate(leg_columns):
+        strike_index[:, leg] = strikes
+        option_type[:, leg] = types
+        quantity[:, leg] = quantities
+    return {'name': np.asarray(names, dtype=object), 'strike_index': strike_index,
+            'option_type': option_type, 'quantity': quantity}
+
+def enumerate_strategies(n_strikes, strategy_types=None):
+    """Every strategy of the requested types over an n_strikes ladder, as padded leg arrays
+
+    Returns name (N,) and strike_index, option_type (0 = CE, 1 = PE) and
+    quantity (+1 long, -1 short, 0 unused) arrays of shape (N, MAX_LEGS).
+    """
+    strategy_types = strategy_types or STRATEGY_TYPES
+    strikes = np.arange(n_strikes)
+    blocks = []
+
+    if 'Vertical Spread' in strategy_types:
+        # Long leg at i, short leg at j (i != j), same option type
+        long_index, short_index = np.meshgrid(strikes, strikes, indexing='ij')
+        pairs = long_index != short_index
+        long_index, short_index = long_index[pairs], short_index[pairs]
+        lower_long = long_index < short_index
+        for option_type, lower_name, upper_name in ((CE, 'Bull Call Spread', 'Bear Call Spread'),
+                                                    (PE, 'Bull Put Spread', 'Bear Put Spread')):
+            names = np.where(lower_long, lower_name, upper_name)
+            blocks.append(_legs(names, (long_index, option_type, 1), (short_index, option_type, -1)))
+
+    if 'Straddle' in strategy_types:
+        for side, name in ((1, 'Long Straddle'), (-1, 'Short Straddle')):
+            blocks.append(_legs([name] * n_strikes, (strikes, CE, side), (strikes, PE, side)))
+
+    if 'Strangle' in strategy_types:
+        put_index, call_index = np.triu_indices(n_strikes, k=1)
+        for side, name in ((1, 'Long Strangle'), (-1, 'Short Strangle')):
+            blocks.append(_legs([name] * len(put_index), (put_index, PE, side), (call_index, CE, side)))
+
+    if 'Iron Condor' in strategy_types and n_strikes >= 4:
+        # Long put < short put < short call < long call
+        grid = np.stack(np.meshgrid(strikes, strikes, strikes, strikes, indexing='ij'), axis=-1).reshape(-1, 4)
+        grid = grid[(grid[:, 0] < grid[:, 1]) & (grid[:, 1] < grid[:, 2]) & (grid[:, 2] < grid[:, 3])]
+        blocks.append(_legs(['Iron Condor'] * len(grid), (grid[:, 0], PE, 1), (grid[:, 1], PE, -1),
+                            (grid[:, 2], CE, -1), (grid[:, 3], CE, 1)))
+
+    if not blocks:
+        return _legs([])
+    return {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+
+def lognormal_cdf(x, forward, sigma_t):
+    """P(spot at expiry <= x) for a lognormal terminal spot with mean forward"""
+    x = np.asarray(x, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (np.log(x / forward) + 0.5 * sigma_t * sigma_t) / sigma_t
+    return np.where(x <= 0, 0.0, norm_cdf(z))
+
+def expected_payoffs(strikes, forward, sigma_t):
+    """(S, 2) [CE, PE] expected expiry payoffs (undiscounted) for a lognormal spot with mean forward"""
+    strikes = np.asarray(strikes, dtype=float)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(forward / strikes) + 0.5 * sigma_t * sigma_t) / sigma_t
+    d2 = d1 - sigma_t
+    call = forward * norm_cdf(d1) - strikes * norm_cdf(d2)
+    put = strikes * norm_cdf(-d2) - forward * norm_cdf(-d1)
+    return np.concatenate([call, put], axis=1)
+
+def evaluate_strategies(strategies, strikes, premiums, forward, sigma_t, min_premium=MIN_LEG_PREMIUM):
+    """Per-unit economics of every strategy held to expiry, gathered over all legs at once
+
+    strikes (S,) ascending and premiums (S, 2) [CE, PE] describe the ladder;
+    the spot at expiry is lognormal with mean forward and log-volatility
+    sigma_t. Payoffs are linear in the legs, so expected values come from the
+    per-strike expected payoffs, and profit probability from the breakevens of
+    the piecewise-linear P&L between strikes. Returns (N,) arrays: net_debit
+    (negative for a credit), expected_value, pop (probability of profit),
+    max_loss and max_profit (inf when unbounded), and valid (every leg on a
+    listed strike, no leg priced under min_premium).
+    """
+    strikes = np.asarray(strikes, dtype=float)
+    premiums = np.asarray(premiums, dtype=float)
+    strike_index, option_type, quantity = strategies['strike_index'], strategies['option_type'], strategies['quantity']
+    used = quantity != 0
+
+    leg_premiums = premiums[strike_index, option_type]
+    valid = ~np.any(used & (np.isnan(strikes[strike_index]) | ~(leg_premiums >= min_premium)), axis=1)
+    net_debit = np.sum(quantity * np.nan_to_num(leg_premiums), axis=1)
+    expected_value = np.sum(quantity * np.nan_to_num(expected_payoffs(strikes, forward, sigma_t))[strike_index, option_type],
+                            axis=1) - net_debit
+
+    # P&L at zero and at every strike: the payoff's kinks
+    points = np.concatenate([[0.0], strikes[np.isfinite(strikes)]])
+    intrinsic = np.maximum(np.stack([points[:, None] - strikes, strikes - points[:, None]], axis=2), 0.0)
+    intrinsic = np.nan_to_num(intrinsic)
+    pnl = sum(quantity[:, leg] * intrinsic[:, strike_index[:, leg], option_type[:, leg]]
+              for leg in range(MAX_LEGS)) - net_debit
+    upside_slope = np.sum(quantity * (option_type == CE), axis=1)
+
+    # Profitable share of each segment between kinks: whole segments from the kink CDFs,
+    # segments with a breakeven (sign change) one by one
+    cdf_points = lognormal_cdf(points, forward, sigma_t)
+    low, high = pnl[:-1], pnl[1:]
+    pop = np.diff(cdf_points) @ ((low > 0) & (high > 0))
+    segments, columns = np.nonzero((low > 0) != (high > 0))
+    a, b = low[segments, columns], high[segments, columns]
+    crossing = points[segments] + a / (a - b) * (points[segments + 1] - points[segments])
+    cdf_crossing = lognormal_cdf(crossing, forward, sigma_t)
+    partial = np.where(a > 0, cdf_crossing - cdf_points[segments], cdf_points[segments + 1] - cdf_crossing)
+    pop += np.bincount(columns, partial, minlength=len(pop))
+
+    # Open segment above the last strike
+    last = pnl[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        breakeven = points[-1] - last / upside_slope
+    cdf_breakeven = lognormal_cdf(np.where(upside_slope != 0, breakeven, points[-1]), forward, sigma_t)
+    pop += np.where(last > 0, np.where(upside_slope < 0, cdf_breakeven, 1.0) - cdf_points[-1],
+                    np.where(upside_slope > 0, 1.0 - cdf_breakeven, 0.0))
+
+    max_loss = np.where(upside_slope < 0, np.inf, np.maximum(-pnl.min(axis=0), 0.0))
+    max_profit = np.where(upside_slope > 0, np.inf, np.maximum(pnl.max(axis=0), 0.0))
+    return {
+        'net_debit': net_debit,
+        'expected_value': expected_value,
+        'pop': pop,
+        'max_loss': max_loss,
+        'max_profit': max_profit,
+        'valid': valid
+    }
+
+def strategy_margin(strategies, max_loss, spot, naked_margin_rate):
+    """Approximate margin per unit: the max loss for defined-risk positions, else a share of spot per naked short call"""
+    naked_calls = -np.sum(strategies['quantity'] * (strategies['option_type'] == CE), axis=1)
+    return np.where(np.isfinite(max_loss), max_loss, naked_margin_rate * spot * np.maximum(naked_calls, 1))
+
+def describe_legs(strategies, index, strikes):
+    """Human-readable legs of one strategy, e.g. 'B 24800 CE / S 25000 CE'"""
+    legs = []
+    for strike_index, option_type, quantity in zip(strategies['strike_index'][index], strategies['option_type'][index],
+                                                   strategies['quantity'][index]):
+        if quantity:
+            legs.append(f"{'B' if quantity > 0 else 'S'} {strikes[strike_index]:g} {'CE' if option_type == CE else 'PE'}")
+    return ' / '.join(legs)
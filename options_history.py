@@ -0,0 +1,261 @@
+# options_history.py - DAILY OPTION CHAIN SNAPSHOTS AND ATM IMPLIED VOLATILITY HISTORY
+import glob
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data_paths import get_data_dir
+from option_chain import load_chain_snapshot, add_iv_and_greeks, atm_implied_vol
+
+# Dated snapshot files picked up from the snapshot directory, e.g. option_chain_2025-07-28.csv
+SNAPSHOT_FILE_PATTERN = "option_chain_*.csv"
+_FILE_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+# IV rank/percentile look back one year and need a month of observations
+REGIME_LOOKBACK_DAYS = 365
+MIN_REGIME_OBSERVATIONS = 20
+
+# Stored ATM IV older than this is not used to price options
+STORED_IV_MAX_AGE_DAYS = 7
+
+class OptionsHistoryStore:
+    """Daily option-chain snapshots and ATM IV per underlying in SQLite
+
+    Both tables are keyed (underlying, date, ...) without rowids, so a range
+    of days for an underlying is one clustered index read.
+    """
+
+    def __init__(self, db_directory=None):
+        # Same directory as the recommendations tracker database by default
+        self.db_directory = db_directory or get_data_dir()
+        self.db_path = os.path.join(self.db_directory, "options_history.db")
+
+        # Ensure directory exists
+        os.makedirs(self.db_directory, exist_ok=True)
+
+        # Initialize database
+        self.init_database()
+
+    def init_database(self):
+        """Initialize the SQLite database with snapshot, ATM IV and imported-file tables"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chain_snapshots (
+                underlying TEXT NOT NULL,
+                snapshot_date TEXT NOT NULL,
+                expiry TEXT NOT NULL,
+                strike REAL NOT NULL,
+                option_type TEXT NOT NULL,
+                ltp REAL,
+                spot REAL,
+                iv REAL,
+                PRIMARY KEY (underlying, snapshot_date, expiry, strike, option_type)
+            ) WITHOUT ROWID
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS atm_iv (
+                underlying TEXT NOT NULL,
+                trade_date TEXT NOT NULL,
+                atm_iv REAL,
+                realized_vol REAL,
+                spot REAL,
+                PRIMARY KEY (underlying, trade_date)
+            ) WITHOUT ROWID
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS imported_files (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def save_chain(self, chain, snapshot_date, realized_vols=None):
+        """Store a priced chain (option_chain.add_iv_and_greeks output) and its ATM IV per underlying
+
+        The day's rows replace any earlier snapshot of the same contracts;
+        realized_vols maps underlying -> historical volatility for the IV history.
+        """
+        if chain.empty:
+            return 0
+        day = pd.Timestamp(snapshot_date).strftime('%Y-%m-%d')
+        rows = [
+            (row.underlying, day, pd.Timestamp(row.expiry).strftime('%Y-%m-%d'), float(row.strike), row.option_type,
+             float(row.ltp), _optional_float(row.spot), _optional_float(row.iv))
+            for row in chain.itertuples(index=False)
+        ]
+
+        iv_rows = []
+        for underlying, contracts in chain.groupby('underlying'):
+            spot = contracts['spot'].dropna()
+            if spot.empty:
+                continue
+            spot = float(spot.iloc[0])
+            iv = atm_implied_vol(contracts, underlying, spot, contracts['expiry'].min())
+            if iv is not None:
+                iv_rows.append((underlying, day, iv, _optional_float((realized_vols or {}).get(underlying)), spot))
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO chain_snapshots
+            (underlying, snapshot_date, expiry, strike, option_type, ltp, spot, iv)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        cursor.executemany('''
+            INSERT INTO atm_iv (underlying, trade_date, atm_iv, realized_vol, spot)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (underlying, trade_date) DO UPDATE SET
+                atm_iv = excluded.atm_iv,
+                realized_vol = COALESCE(excluded.realized_vol, atm_iv.realized_vol),
+                spot = excluded.spot
+        ''', iv_rows)
+        conn.commit()
+        conn.close()
+        return len(rows)
+
+    def import_snapshot_files(self, directory=None, pattern=SNAPSHOT_FILE_PATTERN):
+        """Load new or changed snapshot CSVs from a directory; returns the number of files imported
+
+        A file's date comes from its name (YYYY-MM-DD), else its snapshot_time
+        column, else its modification time. Rows need underlying_price to solve IV.
+        """
+        directory = directory or self.db_directory
+        paths = sorted(glob.glob(os.path.join(directory, pattern)))
+        if not paths:
+            return 0
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT path, mtime FROM imported_files")
+        imported = dict(cursor.fetchall())
+        conn.close()
+
+        count = 0
+        for path in paths:
+            mtime = os.path.getmtime(path)
+            if imported.get(path) == mtime:
+                continue
+            chain = load_chain_snapshot(path)
+            if chain.empty:
+                continue
+            name_date = _FILE_DATE_RE.search(os.path.basename(path))
+            snapshot_times = pd.to_datetime(chain['snapshot_time'], errors='coerce') if 'snapshot_time' in chain.columns \
+                else pd.Series(dtype='datetime64[ns]')
+            if name_date:
+                snapshot_date = pd.Timestamp(name_date.group(1))
+            elif snapshot_times.notna().any():
+                snapshot_date = snapshot_times.max()
+            else:
+                snapshot_date = pd.Timestamp(datetime.fromtimestamp(mtime))
+            # Valued at the snapshot_time column when present, else at that day's close
+            as_of = None
+            if snapshot_times.isna().all():
+                as_of = snapshot_date.normalize() + pd.Timedelta(hours=15, minutes=30)
+            self.save_chain(add_iv_and_greeks(chain, as_of=as_of), snapshot_date)
+
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("INSERT OR REPLACE INTO imported_files (path, mtime) VALUES (?, ?)", (path, mtime))
+            conn.commit()
+            conn.close()
+            count += 1
+        return count
+
+    def get_iv_history(self, underlying, start=None, end=None):
+        """ATM IV, realized vol and spot per day for an underlying (one index range read)"""
+        start, end = _date_range(start, end)
+        conn = sqlite3.connect(self.db_path)
+        df = pd.read_sql_query('''
+            SELECT trade_date, atm_iv, realized_vol, spot FROM atm_iv
+            WHERE underlying = ? AND trade_date BETWEEN ? AND ?
+            ORDER BY trade_date
+        ''', conn, params=(underlying, start, end))
+        conn.close()
+        return df
+
+    def get_chain(self, underlying, snapshot_date):
+        """Stored snapshot of an underlying's chain on a day"""
+        conn = sqlite3.connect(self.db_path)
+        df = pd.read_sql_query('''
+            SELECT underlying, snapshot_date, expiry, strike, option_type, ltp, spot, iv FROM chain_snapshots
+            WHERE underlying = ? AND snapshot_date = ?
+            ORDER BY expiry, strike, option_type
+        ''', conn, params=(underlying, pd.Timestamp(snapshot_date).strftime('%Y-%m-%d')))
+        conn.close()
+        return df
+
+    def get_vol_regimes(self, underlyings, as_of=None, lookback_days=REGIME_LOOKBACK_DAYS):
+        """Dict underlying -> vol regime from one read of the IV history
+
+        Each regime has iv (latest stored ATM IV) and iv_date, iv_rank and
+        iv_percentile (0-100 within the lookback; None with fewer than
+        MIN_REGIME_OBSERVATIONS days), realized_vol and iv_rv_spread (IV minus
+        realized vol, vol points). Underlyings without history are left out.
+        """
+        underlyings = list(underlyings)
+        if not underlyings:
+            return {}
+        end = pd.Timestamp(as_of or datetime.now())
+        start, end = _date_range(end - timedelta(days=lookback_days), end)
+
+        conn = sqlite3.connect(self.db_path)
+        df = pd.read_sql_query(f'''
+            SELECT underlying, trade_date, atm_iv, realized_vol FROM atm_iv
+            WHERE underlying IN ({','.join('?' * len(underlyings))}) AND trade_date BETWEEN ? AND ?
+            ORDER BY underlying, trade_date
+        ''', conn, params=(*underlyings, start, end))
+        conn.close()
+
+        regimes = {}
+        for underlying, history in df.groupby('underlying'):
+            ivs = history['atm_iv'].dropna().to_numpy(dtype=float)
+            if not len(ivs):
+                continue
+            current = ivs[-1]
+            latest = history.dropna(subset=['atm_iv']).iloc[-1]
+            enough = len(ivs) >= MIN_REGIME_OBSERVATIONS
+            iv_range = ivs.max() - ivs.min()
+            realized = history['realized_vol'].dropna()
+            realized_vol = float(realized.iloc[-1]) if not realized.empty else None
+            regimes[underlying] = {
+                'iv': float(current),
+                'iv_date': latest['trade_date'],
+                'iv_rank': round(float((current - ivs.min()) / iv_range * 100), 1) if enough and iv_range > 0 else None,
+                'iv_percentile': round(float(np.mean(ivs[:-1] < current) * 100), 1) if enough else None,
+                'realized_vol': realized_vol,
+                'iv_rv_spread': round((current - realized_vol) * 100, 1) if realized_vol is not None else None,
+                'observations': len(ivs)
+            }
+        return regimes
+
+def stored_iv(vol_regime, as_of=None, max_age_days=STORED_IV_MAX_AGE_DAYS):
+    """Latest stored ATM IV from a vol regime if it is recent enough to price with, else None"""
+    if not vol_regime:
+        return None
+    age = pd.Timestamp(as_of or datetime.now()).normalize() - pd.Timestamp(vol_regime['iv_date'])
+    return vol_regime['iv'] if age <= pd.Timedelta(days=max_age_days) else None
+
+def _optional_float(value):
+    return float(value) if value is not None and pd.notna(value) else None
+
+def _date_range(start, end):
+    # Inclusive YYYY-MM-DD bounds (defaults: everything up to today)
+    start = pd.Timestamp(start).strftime('%Y-%m-%d') if start is not None else '0000-00-00'
+    end = pd.Timestamp(end or datetime.now()).strftime('%Y-%m-%d')
+    return start, end
+
+@lru_cache(maxsize=1)
+def get_options_history():
+    """Process-wide store in the default dashboard directory"""
+    return OptionsHistoryStore()
@@ -0,0 +1,274 @@
+# options_pricing.py - VECTORIZED BLACK-SCHOLES PRICING FOR WHOLE OPTION CHAINS
+import numpy as np
+
+# Annualized risk-free rate (approx. 91-day T-bill) and day count used for option pricing
+RISK_FREE_RATE = 0.065
+DAYS_PER_YEAR = 365.0
+
+# Volatility assumptions used when no implied volatility is available
+DEFAULT_VOLATILITY = {'nifty': 0.15, 'banknifty': 0.18, 'stock': 0.25}
+
+_SQRT_2 = np.sqrt(2.0)
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+def _erfc(x):
+    # Chebyshev fit of erfc (fractional error < 1.2e-7 everywhere), numpy-only
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    r = t * np.exp(
+        -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806 +
+        t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    )
+    return np.where(x >= 0, r, 2.0 - r)
+
+def norm_cdf(x):
+    """Standard normal CDF (vectorized)"""
+    return 0.5 * _erfc(-np.asarray(x, dtype=float) / _SQRT_2)
+
+def norm_pdf(x):
+    """Standard normal density (vectorized)"""
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+def years_to_expiry(days_to_expiry):
+    """Calendar days to expiry as a year fraction (expired contracts -> 0)"""
+    return np.maximum(np.asarray(days_to_expiry, dtype=float), 0.0) / DAYS_PER_YEAR
+
+def default_volatility(spot_price, underlying_type):
+    """Volatility assumption by underlying (BANKNIFTY trades above 40000)"""
+    if underlying_type == 'index':
+        return DEFAULT_VOLATILITY['banknifty'] if spot_price > 40000 else DEFAULT_VOLATILITY['nifty']
+    return DEFAULT_VOLATILITY['stock']
+
+def bs_d1_d2(spot, strike, years, vol, rate=RISK_FREE_RATE, dividend_yield=0.0):
+    """Black-Scholes d1, d2 and a mask of contracts with time value (sigma*sqrt(T) > 0)"""
+    spot = np.asarray(spot, dtype=float)
+    strike = np.asarray(strike, dtype=float)
+    years = np.maximum(np.asarray(years, dtype=float), 0.0)
+    vol = np.asarray(vol, dtype=float)
+
+    sigma_t = vol * np.sqrt(years)
+    live = sigma_t > 0
+    safe_sigma_t = np.where(live, sigma_t, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * vol * vol) * years) / safe_sigma_t
+    d2 = d1 - sigma_t
+    return d1, d2, live
+
+def black_scholes_price(spot, strike, years, vol, is_call=True, rate=RISK_FREE_RATE, dividend_yield=0.0):
+    """European option prices; every argument may be an array (numpy broadcasting)
+
+    Contracts at expiry or with zero volatility are worth their discounted
+    intrinsic value.
+    """
+    spot = np.asarray(spot, dtype=float)
+    strike = np.asarray(strike, dtype=float)
+    years = np.maximum(np.asarray(years, dtype=float), 0.0)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    d1, d2, live = bs_d1_d2(spot, strike, years, vol, rate, dividend_yield)
+    discounted_spot = spot * np.exp(-dividend_yield * years)
+    discounted_strike = strike * np.exp(-rate * years)
+
+    call = discounted_spot * norm_cdf(d1) - discounted_strike * norm_cdf(d2)
+    put = discounted_strike * norm_cdf(-d2) - discounted_spot * norm_cdf(-d1)
+    price = np.where(is_call, call, put)
+
+    intrinsic = np.where(is_call, discounted_spot - discounted_strike, discounted_strike - discounted_spot)
+    return np.where(live, np.maximum(price, 0.0), np.maximum(intrinsic, 0.0))
+
+def strike_interval(underlying_price, underlying_type):
+    """NSE strike spacing for an underlying"""
+    if underlying_type == 'index':
+        return 100 if underlying_price > 40000 else 50  # BANKNIFTY / NIFTY
+    if underlying_price >= 2000:
+        return 100
+    if underlying_price >= 1000:
+        return 50
+    if underlying_price >= 500:
+        return 20
+    if underlying_price >= 250:
+        return 10
+    return 5
+
+def strike_ladder(underlying_price, underlying_type, width=3):
+    """Strikes from ATM - width to ATM + width intervals (positive strikes only)"""
+    interval = strike_interval(underlying_price, underlying_type)
+    atm_strike = round(underlying_price / interval) * interval
+    strikes = atm_strike + interval * np.arange(-width, width + 1)
+    return strikes[strikes > 0]
+
+def ladder_grid(spots, underlying_types, width=10):
+    """(U, 2*width+1) strike matrix, one ATM-centred ladder per underlying
+
+    Ladders that would reach zero are clipped; those slots are NaN.
+    """
+    grid = np.full((len(spots), 2 * width + 1), np.nan)
+    for row, (spot, underlying_type) in enumerate(zip(spots, underlying_types)):
+        interval = strike_interval(spot, underlying_type)
+        strikes = round(spot / interval) * interval + interval * np.arange(-width, width + 1)
+        grid[row] = np.where(strikes > 0, strikes, np.nan)
+    return grid
+
+def price_option_grid(spots, strikes, years, vols, rate=RISK_FREE_RATE):
+    """Price every strike x expiry x CE/PE of every underlying in one call
+
+    spots and vols have shape (U,), strikes (U, S) and years (E,) or (U, E).
+    Returns an array of shape (U, E, S, 2); the last axis is [CE, PE].
+    """
+    spots = np.asarray(spots, dtype=float)[:, None, None, None]
+    vols = np.asarray(vols, dtype=float)
+    vols = vols[:, None, None, None] if vols.ndim == 1 else vols[:, :, None, None]
+    strikes = np.asarray(strikes, dtype=float)[:, None, :, None]
+    years = np.asarray(years, dtype=float)
+    years = years[None, :, None, None] if years.ndim == 1 else years[:, :, None, None]
+    is_call = np.array([True, False])[None, None, None, :]
+    return black_scholes_price(spots, strikes, years, vols, is_call, rate)
+
+def black_scholes_greeks(spot, strike, years, vol, is_call=True, rate=RISK_FREE_RATE, dividend_yield=0.0):
+    """Delta, gamma, vega (per 1 vol point) and theta (per calendar day), vectorized
+
+    Expired / zero-volatility contracts get delta 1/0 (ITM/OTM) and zero
+    gamma, vega and theta.
+    """
+    spot = np.asarray(spot, dtype=float)
+    strike = np.asarray(strike, dtype=float)
+    years = np.maximum(np.asarray(years, dtype=float), 0.0)
+    vol = np.asarray(vol, dtype=float)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    d1, d2, live = bs_d1_d2(spot, strike, years, vol, rate, dividend_yield)
+    sqrt_t = np.sqrt(years)
+    q_discount = np.exp(-dividend_yield * years)
+    r_discount = np.exp(-rate * years)
+    pdf_d1 = norm_pdf(d1)
+
+    delta = np.where(is_call, q_discount * norm_cdf(d1), -q_discount * norm_cdf(-d1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gamma = q_discount * pdf_d1 / (spot * vol * sqrt_t)
+        decay = -spot * q_discount * pdf_d1 * vol / (2 * sqrt_t)
+    vega = spot * q_discount * pdf_d1 * sqrt_t / 100.0
+    call_theta = decay - rate * strike * r_discount * norm_cdf(d2) + dividend_yield * spot * q_discount * norm_cdf(d1)
+    put_theta = decay + rate * strike * r_discount * norm_cdf(-d2) - dividend_yield * spot * q_discount * norm_cdf(-d1)
+    theta = np.where(is_call, call_theta, put_theta) / DAYS_PER_YEAR
+
+    itm = np.where(is_call, spot > strike, spot < strike)
+    expired_delta = np.where(itm, np.where(is_call, 1.0, -1.0), 0.0)
+    return {
+        'delta': np.where(live, delta, expired_delta),
+        'gamma': np.where(live, gamma, 0.0),
+        'vega': np.where(live, vega, 0.0),
+        'theta': np.where(live, theta, 0.0)
+    }
+
+def implied_volatility(price, spot, strike, years, is_call=True, rate=RISK_FREE_RATE, dividend_yield=0.0,
+                       vol_low=0.005, vol_high=5.0, tolerance=1e-6, max_iterations=60):
+    """Implied volatility for a batch of contracts (NaN where no volatility fits)
+
+    Safeguarded Newton: every contract keeps a [low, high] bracket that the
+    price error narrows each iteration, and a Newton step that leaves the
+    bracket (or has no vega to work with) is replaced by bisection - so each
+    contract converges like Newton near the root and never diverges. Prices
+    outside the no-arbitrage range (below intrinsic, above the upper bound)
+    and expired contracts return NaN.
+    """
+    price, spot, strike, years, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(spot, dtype=float), np.asarray(strike, dtype=float),
+        np.maximum(np.asarray(years, dtype=float), 0.0), np.asarray(is_call, dtype=bool)
+    )
+
+    lower_bound = black_scholes_price(spot, strike, years, vol_low, is_call, rate, dividend_yield)
+    upper_bound = black_scholes_price(spot, strike, years, vol_high, is_call, rate, dividend_yield)
+    solvable = (years > 0) & (price >= lower_bound) & (price <= upper_bound) & np.isfinite(price)
+
+    low = np.full(price.shape, vol_low)
+    high = np.full(price.shape, vol_high)
+    # Brenner-Subrahmanyam ATM approximation as the starting point
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(2 * np.pi / np.where(years > 0, years, 1.0)) * price / spot
+    sigma = np.clip(np.nan_to_num(sigma, nan=0.3), vol_low, vol_high)
+    active = solvable.copy()
+
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+        s, k, t, c, p, v = spot[active], strike[active], years[active], is_call[active], price[active], sigma[active]
+        diff = black_scholes_price(s, k, t, v, c, rate, dividend_yield) - p
+        vega = black_scholes_greeks(s, k, t, v, c, rate, dividend_yield)['vega'] * 100.0
+
+        lo, hi = low[active], high[active]
+        hi = np.where(diff > 0, v, hi)
+        lo = np.where(diff <= 0, v, lo)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            newton = v - diff / vega
+        use_newton = (vega > 1e-10) & (newton > lo) & (newton < hi)
+        next_sigma = np.where(use_newton, newton, 0.5 * (lo + hi))
+
+        done = (np.abs(diff) < tolerance * np.maximum(p, 1.0)) | (hi - lo < tolerance)
+        low[active], high[active] = lo, hi
+        sigma[active] = np.where(done, v, next_sigma)
+        active[active] = ~done
+
+    return np.where(solvable, sigma, np.nan)
+
+def target_hit_probability(spots, spot_targets, spot_stops):
+    """Chance the spot reaches its target before its stop (driftless log-price random walk)"""
+    spots = np.asarray(spots, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probability = np.log(spots / spot_stops) / np.log(np.asarray(spot_targets, dtype=float) / spot_stops)
+    return np.clip(np.nan_to_num(probability, nan=0.5), 0.0, 1.0)
+
+def score_ladder_contracts(spots, strikes, years, vols, spot_targets, spot_stops, horizon_years,
+                           rate=RISK_FREE_RATE):
+    """Expected payoff of every ladder contract against each underlying's spot target and stop
+
+    spots, years, vols, spot_targets and spot_stops have shape (U,), strikes
+    (U, S). Each contract is valued now, with the spot at target and at stop
+    after horizon_years, in one broadcast call. Returns (U, S, 2) arrays
+    ([CE, PE] on the last axis): premium, target_value, stop_value, delta and
+    expected_return (probability-weighted value / premium - 1), plus the (U,)
+    target_probability.
+    """
+    spots = np.asarray(spots, dtype=float)
+    years = np.asarray(years, dtype=float)
+    vols = np.asarray(vols, dtype=float)
+    remaining = np.maximum(years - horizon_years, 0.0)
+
+    scenario_spots = np.stack([spots, np.asarray(spot_targets, dtype=float), np.asarray(spot_stops, dtype=float)], axis=1)
+    scenario_years = np.stack([years, remaining, remaining], axis=1)
+    is_call = np.array([True, False])[None, None, None, :]
+    values = black_scholes_price(
+        scenario_spots[:, :, None, None], np.asarray(strikes, dtype=float)[:, None, :, None],
+        scenario_years[:, :, None, None], vols[:, None, None, None], is_call, rate
+    )
+    premium, target_value, stop_value = values[:, 0], values[:, 1], values[:, 2]
+
+    probability = target_hit_probability(spots, spot_targets, spot_stops)
+    expected_value = probability[:, None, None] * target_value + (1 - probability[:, None, None]) * stop_value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected_return = np.where(premium > 0, expected_value / premium - 1.0, np.nan)
+
+    delta = black_scholes_greeks(
+        spots[:, None, None], np.asarray(strikes, dtype=float)[:, :, None], years[:, None, None],
+        vols[:, None, None], is_call[0], rate
+    )['delta']
+    return {
+        'premium': premium,
+        'target_value': target_value,
+        'stop_value': stop_value,
+        'delta': delta,
+        'expected_return': expected_return,
+        'target_probability': probability
+    }
+
+def top_k_per_row(scores, top_k):
+    """Indices of the top_k finite scores in each row of a (U, N) array, best first
+
+    Returns (row, column) index arrays; rows with fewer finite scores give fewer entries.
+    """
+    scores = np.asarray(scores, dtype=float)
+    ranked = np.argsort(np.where(np.isfinite(scores), -scores, np.inf), axis=1)[:, :top_k]
+    rows = np.repeat(np.arange(scores.shape[0]), ranked.shape[1])
+    columns = ranked.ravel()
+    keep = np.isfinite(scores[rows, columns])
+    return rows[keep], columns[keep]
@@ -0,0 +1,106 @@
+# price_cache.py - PROCESS-WIDE DAILY BAR CACHE WITH GROUPED DOWNLOADS
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import pandas as pd
+
+from market_data_provider import PERIOD_DAYS, get_market_data, trim_to_period
+from scan_cache import market_data_as_of
+
+class PriceBarCache:
+    """Daily OHLCV bars per symbol, shared by every scan in the process
+
+    Bars stay fresh for one market-data bucket (scan_cache.market_data_as_of),
+    so scans inside a bucket reuse each other's downloads: a longer history
+    (the Indian scan's 3mo) also serves shorter requests (F&O's 1mo). Missing
+    symbols are fetched with one grouped download from the market-data
+    backend; symbols it returns nothing for are retried one by one on a small
+    thread pool; symbols still empty after that are remembered for the bucket
+    so later requests don't download them again.
+    """
+
+    def __init__(self, max_symbols=1000, retry_workers=8):
+        self.max_symbols = max_symbols
+        self.retry_workers = retry_workers
+        self._bars = OrderedDict()  # symbol -> (as_of bucket, period days, DataFrame)
+        self._empty = {}  # symbol -> as_of bucket in which it returned no bars
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.downloads = 0
+
+    def get_history(self, symbol, period="1mo"):
+        """Daily bars for one symbol (empty DataFrame if unavailable)"""
+        return self.get_many([symbol], period)[symbol]
+
+    def get_many(self, symbols, period="1mo"):
+        """Dict symbol -> daily bars, downloading only what the cache can't serve"""
+        days = PERIOD_DAYS[period]
+        as_of = market_data_as_of()
+        result, missing = {}, []
+        with self._lock:
+            for symbol in dict.fromkeys(symbols):
+                entry = self._bars.get(symbol)
+                if entry and entry[0] == as_of and entry[1] >= days:
+                    self._bars.move_to_end(symbol)
+                    result[symbol] = trim_to_period(entry[2], period)
+                    self.hits += 1
+                elif self._empty.get(symbol) == as_of:
+                    result[symbol] = pd.DataFrame()
+                    self.hits += 1
+                else:
+                    missing.append(symbol)
+
+        if missing:
+            fetched = self._download(missing, period)
+            with self._lock:
+                # Empty markers from earlier buckets are dropped as the new bucket's arrive
+                self._empty = {symbol: bucket for symbol, bucket in self._empty.items() if bucket == as_of}
+                for symbol, data in fetched.items():
+                    if not data.empty:
+                        self._bars[symbol] = (as_of, days, data)
+                        self._bars.move_to_end(symbol)
+                        self._empty.pop(symbol, None)
+                    else:
+                        self._empty[symbol] = as_of
+                while len(self._bars) > self.max_symbols:
+                    self._bars.popitem(last=False)
+                self.downloads += len(missing)
+            result.update({symbol: data.copy() for symbol, data in fetched.items()})
+        return result
+
+    def prefetch(self, symbols, period="1mo"):
+        """Warm the cache for a batch of symbols in one grouped request"""
+        self.get_many(symbols, period)
+
+    def stats(self):
+        """Cache counters for display"""
+        with self._lock:
+            return {'symbols': len(self._bars), 'empty': len(self._empty), 'hits': self.hits, 'downloads': self.downloads}
+
+    def _download(self, symbols, period):
+        try:
+            fetched = get_market_data().download(symbols, period)
+        except Exception as e:
+            print(f"Error in grouped price download: {e}")
+            fetched = {}
+        fetched = {symbol: fetched.get(symbol, pd.DataFrame()) for symbol in symbols}
+
+        retry = [symbol for symbol, frame in fetched.items() if frame.empty]
+        if retry:
+            with ThreadPoolExecutor(max_workers=min(self.retry_workers, len(retry))) as executor:
+                fetched.update(zip(retry, executor.map(lambda symbol: _fetch_one(symbol, period), retry)))
+        return fetched
+
+def _fetch_one(symbol, period):
+    # Single-symbol fallback for tickers the grouped download dropped
+    try:
+        return get_market_data().history(symbol, period=period, interval="1d")
+    except Exception:
+        return pd.DataFrame()
+
+@lru_cache(maxsize=1)
+def get_price_cache():
+    """Process-wide bar cache"""
+    return PriceBarCache()
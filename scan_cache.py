@@ -0,0 +1,71 @@
+# scan_cache.py - PROCESS-WIDE SCAN RESULT CACHE SHARED BY ALL DASHBOARD SESSIONS
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import json
+
+def market_data_as_of(now=None, bucket_minutes=15):
+    """Market-data freshness bucket; scans inside the same bucket see the same bars"""
+    now = now or datetime.now()
+    bucket_start = now.replace(minute=(now.minute // bucket_minutes) * bucket_minutes, second=0, microsecond=0)
+    return bucket_start.strftime('%Y-%m-%d %H:%M')
+
+def make_scan_cache_key(scan_type, params=None, as_of=None):
+    """Cache key for a scan: (scan type, parameters, market-data as-of time)"""
+    params_key = json.dumps(params or {}, sort_keys=True, default=str)
+    return (scan_type, params_key, as_of or market_data_as_of())
+
+class ScanResultCache:
+    """TTL + LRU result cache (ScanJobManager joins concurrent identical scans onto one job)"""
+
+    def __init__(self, max_entries=32, ttl_seconds=900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return a fresh cached value or None"""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries"""
+        with self._lock:
+            self._put_locked(key, value)
+
+    def stats(self):
+        """Cache counters for display"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_locked(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
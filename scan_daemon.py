@@ -0,0 +1,141 @@
+import schedule
+import time
+import threading
+from datetime import datetime
+import logging
+from scan_runner import run_scan, get_tracker_market
+from scan_results_store import ScanResultsStore
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('scan_daemon.log'),
+        logging.StreamHandler()
+    ]
+)
+
+# Scan times in server local time (IST on the desk machine)
+SCAN_SCHEDULE = {
+    'indian': ["09:45", "12:30", "15:45"],
+    'fno': ["09:50", "12:35", "15:50"],
+    'us': ["19:30", "22:30"]
+}
+
+class ScanDaemon:
+    def __init__(self, scan_schedule=None, scan_params=None, append_to_tracker=True):
+        self.scan_schedule = scan_schedule or SCAN_SCHEDULE
+        self.scan_params = scan_params or {}
+        self.store = ScanResultsStore()
+        self.tracker = None
+        self.is_running = False
+        self.scheduler_thread = None
+        self.last_scan_ids = {}
+
+        if append_to_tracker:
+            try:
+                from local_recommendations_tracker import LocalRecommendationsTracker
+                self.tracker = LocalRecommendationsTracker()
+            except Exception as e:
+                logging.error(f"Recommendations tracker unavailable: {e}")
+
+    def run_scan_now(self, scan_type):
+        """Run one scan, persist it with a scan id and append picks to the tracker"""
+        try:
+            logging.info(f"Starting scheduled {scan_type} scan...")
+
+            last_logged = {'step': -1}
+
+            def log_progress(fraction, message):
+                # Log roughly every 10% instead of every symbol
+                step = int(fraction * 10)
+                if step != last_logged['step'] or fraction >= 1.0:
+                    last_logged['step'] = step
+                    logging.info(f"  [{scan_type} {fraction:.0%}] {message}")
+
+            scan_id, results_df = run_scan(
+                scan_type,
+                self.scan_params.get(scan_type),
+                progress_callback=log_progress,
+                store=self.store,
+                source='daemon'
+            )
+            self.last_scan_ids[scan_type] = scan_id
+
+            logging.info(f"Scan {scan_id} stored with {len(results_df)} results")
+
+            market = get_tracker_market(scan_type)
+            if self.tracker is not None and market and not results_df.empty:
+                added_count = self.tracker.add_recommendations(results_df, market)
+                logging.info(f"  - Appended {added_count} new {market} recommendations to tracker")
+
+            return scan_id
+
+        except Exception as e:
+            logging.error(f"Error during {scan_type} scan: {e}")
+            return None
+
+    def start(self):
+        """Schedule all configured scans and start the scheduler thread"""
+        if self.is_running:
+            logging.info("Scan daemon is already running")
+            return
+
+        self.is_running = True
+
+        for scan_type, times in self.scan_schedule.items():
+            for at_time in times:
+                # Weekday-only: markets are closed on weekends
+                for day in (schedule.every().monday, schedule.every().tuesday, schedule.every().wednesday,
+                            schedule.every().thursday, schedule.every().friday):
+                    day.at(at_time).do(self.run_scan_now, scan_type).tag('scan_daemon', scan_type)
+
+        self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
+        self.scheduler_thread.start()
+
+        logging.info(f"Scan daemon started - schedule: {self.scan_schedule}")
+
+    def stop(self):
+        """Stop the scan daemon"""
+        self.is_running = False
+        schedule.clear('scan_daemon')
+        logging.info("Scan daemon stopped")
+
+    def _run_scheduler(self):
+        """Internal method to run the scheduler"""
+        while self.is_running:
+            schedule.run_pending()
+            time.sleep(30)
+
+    def get_status(self):
+        """Get daemon status and next run time"""
+        next_run = schedule.next_run('scan_daemon') if self.is_running else None
+        return {
+            'is_running': self.is_running,
+            'next_run': next_run.strftime('%Y-%m-%d %H:%M:%S') if next_run else None,
+            'last_scan_ids': dict(self.last_scan_ids),
+            'checked_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+if __name__ == "__main__":
+    import sys
+
+    daemon = ScanDaemon()
+
+    # "python scan_daemon.py indian us" runs those scans once and exits
+    if len(sys.argv) > 1:
+        for scan_type in sys.argv[1:]:
+            daemon.run_scan_now(scan_type)
+        sys.exit(0)
+
+    print("Starting scan daemon...")
+    daemon.start()
+
+    # Keep running
+    try:
+        while True:
+            time.sleep(10)
+    except KeyboardInterrupt:
+        print("Stopping scan daemon...")
+        daemon.stop()
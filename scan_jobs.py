@@ -0,0 +1,209 @@
+# scan_jobs.py - BACKGROUND SCAN JOBS WITH PROGRESS, PARTIAL RESULTS AND CANCELLATION
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from scan_runner import run_scan
+from scan_cache import make_scan_cache_key
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_CANCELLED = 'cancelled'
+JOB_FAILED = 'failed'
+
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_CANCELLED, JOB_FAILED)
+
+class ScanJob:
+    """One background scan; written by its worker thread, read by pollers"""
+
+    def __init__(self, scan_type, params, cache_key, source, submitted_by):
+        self.job_id = f"{scan_type}-job-{uuid.uuid4().hex[:8]}"
+        self.scan_type = scan_type
+        self.params = params
+        self.cache_key = cache_key
+        self.source = source
+        self.submitted_by = submitted_by
+        self.owners = set() if submitted_by is None else {submitted_by}
+        self.status = JOB_QUEUED
+        self.progress = 0.0
+        self.message = "Queued..."
+        self.partial_results = None
+        self.results = None
+        self.scan_id = None
+        self.error = None
+        self.from_cache = False
+        self.cancel_event = threading.Event()
+        self.submitted_at = datetime.now()
+        self.finished_at = None
+        self.last_polled = time.monotonic()
+
+    @property
+    def is_finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def snapshot(self):
+        """Copy of the job state that is safe to render"""
+        return {
+            'job_id': self.job_id,
+            'scan_type': self.scan_type,
+            'params': self.params,
+            'status': self.status,
+            'finished': self.is_finished,
+            'progress': self.progress,
+            'message': self.message,
+            'partial_results': self.partial_results,
+            'results': self.results,
+            'scan_id': self.scan_id,
+            'error': self.error,
+            'from_cache': self.from_cache,
+            'submitted_by': self.submitted_by,
+            'submitted_at': self.submitted_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None
+        }
+
+class ScanJobManager:
+    """Runs scans on worker threads; callers submit, poll and cancel by job id
+
+    Identical scans (same type, parameters and market-data window) share one job
+    and one cached result. Jobs submitted with an owner are cancelled once every
+    owner has released them or stopped polling for abandon_after_seconds.
+    """
+
+    def __init__(self, max_workers=2, store=None, cache=None, abandon_after_seconds=120, keep_finished=50):
+        self.store = store
+        self.cache = cache
+        self.abandon_after_seconds = abandon_after_seconds
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scan-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, scan_type, params=None, owner=None, source='dashboard', force_refresh=False):
+        """Start (or join) a scan job and return its id"""
+        cache_key = make_scan_cache_key(scan_type, params)
+
+        with self._lock:
+            for job in self._jobs.values():
+                if job.cache_key == cache_key and not job.is_finished and not job.cancel_event.is_set():
+                    if owner is not None:
+                        job.owners.add(owner)
+                    return job.job_id
+
+            job = ScanJob(scan_type, params, cache_key, source, owner)
+            self._jobs[job.job_id] = job
+            self._prune_locked()
+
+        cached = None
+        if self.cache is not None and not force_refresh:
+            cached = self.cache.get(cache_key)
+
+        if cached is not None:
+            job.scan_id, job.results = cached
+            job.from_cache = True
+            self._finish(job, JOB_COMPLETED, f"♻️ Reused shared results of scan {job.scan_id} (same parameters, same market-data window)")
+        else:
+            self._executor.submit(self._run_job, job)
+
+        return job.job_id
+
+    def poll(self, job_id):
+        """Job snapshot for a UI poll (also marks the job as still watched)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.last_polled = time.monotonic()
+            return job.snapshot()
+
+    def get_job(self, job_id):
+        """Job snapshot without touching the poll heartbeat"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def cancel(self, job_id, owner=None):
+        """Cancel a job; with an owner, only that owner's interest is released"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return False
+            if owner is not None:
+                job.owners.discard(owner)
+                if job.owners:
+                    return False
+            job.cancel_event.set()
+            job.message = "⏹️ Cancelling..."
+            return True
+
+    def list_jobs(self, owner=None):
+        """Snapshots of known jobs, newest first"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if owner is None or owner in job.owners]
+            return [job.snapshot() for job in reversed(jobs)]
+
+    def shutdown(self):
+        """Cancel everything and stop the worker threads"""
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel_event.set()
+        self._executor.shutdown(wait=False)
+
+    def _run_job(self, job):
+        if job.cancel_event.is_set():
+            self._finish(job, JOB_CANCELLED, "⏹️ Scan cancelled before it started")
+            return
+
+        job.status = JOB_RUNNING
+        job.message = "Starting scan..."
+
+        def progress_callback(fraction, message):
+            job.progress = min(max(fraction, 0.0), 1.0)
+            job.message = message
+            # Nobody is watching any more: stop spending API calls on this scan
+            if (self.abandon_after_seconds and job.owners and not job.cancel_event.is_set()
+                    and time.monotonic() - job.last_polled > self.abandon_after_seconds):
+                job.cancel_event.set()
+
+        def results_callback(top_df):
+            job.partial_results = top_df
+
+        try:
+            scan_id, results_df = run_scan(
+                job.scan_type,
+                job.params,
+                progress_callback=progress_callback,
+                store=self.store,
+                source=job.source,
+                results_callback=results_callback,
+                cancel_event=job.cancel_event
+            )
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, JOB_FAILED, f"❌ Scan failed: {e}")
+            return
+
+        if job.cancel_event.is_set():
+            job.partial_results = results_df
+            self._finish(job, JOB_CANCELLED, f"⏹️ Scan cancelled - {len(results_df)} candidates found before it stopped")
+            return
+
+        job.scan_id = scan_id
+        job.results = results_df
+        if self.cache is not None:
+            self.cache.put(job.cache_key, (scan_id, results_df))
+        self._finish(job, JOB_COMPLETED, job.message)
+
+    def _finish(self, job, status, message):
+        job.progress = 1.0 if status == JOB_COMPLETED else job.progress
+        job.message = message
+        job.finished_at = datetime.now()
+        job.status = status
+
+    def _prune_locked(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
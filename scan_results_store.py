@@ -0,0 +1,158 @@
+# scan_results_store.py - SQLITE STORE OF COMPLETED SCAN RESULT SETS
+import sqlite3
+import pandas as pd
+from datetime import datetime
+from io import StringIO
+import json
+import os
+import uuid
+
+from data_paths import get_data_dir
+
+class ScanResultsStore:
+    """Persists every completed scan result set under a scan id"""
+
+    def __init__(self, db_directory=None):
+        # Same directory as the recommendations tracker database by default
+        self.db_directory = db_directory or get_data_dir()
+        self.db_path = os.path.join(self.db_directory, "scan_results.db")
+
+        # Ensure directory exists
+        os.makedirs(self.db_directory, exist_ok=True)
+
+        # Initialize database
+        self.init_database()
+
+    def init_database(self):
+        """Initialize the SQLite database with scan run and result tables"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scan_runs (
+                scan_id TEXT PRIMARY KEY,
+                scan_type TEXT NOT NULL,
+                params TEXT,
+                source TEXT,
+                started_at TEXT,
+                completed_at TEXT NOT NULL,
+                row_count INTEGER DEFAULT 0
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scan_results (
+                scan_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_scan_runs_type_completed
+            ON scan_runs (scan_type, completed_at)
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def save_scan(self, scan_type, results_df, params=None, source='dashboard', started_at=None):
+        """Store a scan result set and return its scan id"""
+        completed_at = datetime.now()
+        scan_id = f"{scan_type}-{completed_at.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT INTO scan_runs (scan_id, scan_type, params, source, started_at, completed_at, row_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            scan_id,
+            scan_type,
+            json.dumps(params or {}, default=str),
+            source,
+            started_at.strftime('%Y-%m-%d %H:%M:%S') if started_at else None,
+            completed_at.strftime('%Y-%m-%d %H:%M:%S'),
+            len(results_df)
+        ))
+
+        cursor.execute(
+            "INSERT INTO scan_results (scan_id, payload) VALUES (?, ?)",
+            (scan_id, results_df.to_json(orient='split', index=False))
+        )
+
+        conn.commit()
+        conn.close()
+
+        return scan_id
+
+    def load_scan(self, scan_id):
+        """Load a stored result set; returns (scan_info, DataFrame)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT r.scan_id, r.scan_type, r.params, r.source, r.started_at, r.completed_at, r.row_count, s.payload
+            FROM scan_runs r JOIN scan_results s ON s.scan_id = r.scan_id
+            WHERE r.scan_id = ?
+        ''', (scan_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        return self._row_to_result(row)
+
+    def load_latest(self, scan_type):
+        """Load the most recent result set for a scan type; returns (scan_info, DataFrame)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT r.scan_id, r.scan_type, r.params, r.source, r.started_at, r.completed_at, r.row_count, s.payload
+            FROM scan_runs r JOIN scan_results s ON s.scan_id = r.scan_id
+            WHERE r.scan_type = ?
+            ORDER BY r.completed_at DESC, r.rowid DESC
+            LIMIT 1
+        ''', (scan_type,))
+        row = cursor.fetchone()
+        conn.close()
+
+        return self._row_to_result(row)
+
+    def list_scans(self, scan_type=None, limit=20):
+        """List recent scan runs without their payloads"""
+        conn = sqlite3.connect(self.db_path)
+
+        query = "SELECT scan_id, scan_type, source, started_at, completed_at, row_count FROM scan_runs"
+        params = []
+
+        if scan_type:
+            query += " WHERE scan_type = ?"
+            params.append(scan_type)
+
+        query += " ORDER BY completed_at DESC LIMIT ?"
+        params.append(limit)
+
+        df = pd.read_sql_query(query, conn, params=params)
+        conn.close()
+
+        return df
+
+    def _row_to_result(self, row):
+        """Convert a joined scan row into (scan_info, DataFrame)"""
+        if row is None:
+            return None, pd.DataFrame()
+
+        scan_info = {
+            'scan_id': row[0],
+            'scan_type': row[1],
+            'params': json.loads(row[2]) if row[2] else {},
+            'source': row[3],
+            'started_at': row[4],
+            'completed_at': row[5],
+            'row_count': row[6]
+        }
+
+        # Keep 'Date' and similar columns as plain strings for the tracker
+        results_df = pd.read_json(StringIO(row[7]), orient='split', convert_dates=False)
+
+        return scan_info, results_df
@@ -0,0 +1,56 @@
+# scan_runner.py - SHARED ENTRY POINT FOR DASHBOARD AND SCAN DAEMON SCANS
+import importlib
+from datetime import datetime
+
+# scan type -> (module, function, tracker market)
+SCAN_TYPES = {
+    'indian': ('indian_stock_logic', 'get_indian_recommendations', 'Indian'),
+    'us': ('us_stock_logic', 'get_us_recommendations', 'US'),
+    'fno': ('fixed_fno_options_logic', 'generate_fno_opportunities', None)
+}
+
+# Same defaults the dashboard inputs start with
+DEFAULT_SCAN_PARAMS = {
+    'indian': {'min_price': 25, 'max_rsi': 70, 'min_volume': 50000, 'batch_size': 200},
+    'us': {'min_price': 25, 'max_rsi': 65, 'min_volume': 500000, 'batch_size': 200},
+    'fno': {}
+}
+
+# Scan types whose scan function can stream a live top-N table via results_callback
+STREAMING_SCAN_TYPES = ('indian', 'us')
+
+def get_scan_function(scan_type):
+    """Import and return the scan function for a scan type"""
+    module_name, function_name, _ = SCAN_TYPES[scan_type]
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+def get_tracker_market(scan_type):
+    """Market label used by the recommendations tracker (None if not tracked)"""
+    return SCAN_TYPES[scan_type][2]
+
+def run_scan(scan_type, params=None, progress_callback=None, store=None, source='dashboard', results_callback=None,
+             cancel_event=None):
+    """Run a scan and persist it to the store; returns (scan_id, results DataFrame)
+
+    results_callback(top_df) gets ranked partial results while the scan runs
+    (ignored for scan types that do not stream). A scan stopped through
+    cancel_event is not persisted and comes back with scan_id None.
+    """
+    scan_params = dict(DEFAULT_SCAN_PARAMS[scan_type])
+    scan_params.update(params or {})
+
+    started_at = datetime.now()
+    scan_function = get_scan_function(scan_type)
+    scan_kwargs = dict(scan_params)
+    if cancel_event is not None:
+        scan_kwargs['cancel_event'] = cancel_event
+    if results_callback is not None and scan_type in STREAMING_SCAN_TYPES:
+        scan_kwargs['results_callback'] = results_callback
+    results_df = scan_function(progress_callback=progress_callback, **scan_kwargs)
+
+    scan_id = None
+    if store is not None and not (cancel_event is not None and cancel_event.is_set()):
+        scan_id = store.save_scan(scan_type, results_df, scan_params, source=source, started_at=started_at)
+
+    return scan_id, results_df
@@ -1,10 +1,9 @@
 # us_stock_logic.py - ENHANCED WITH TECHNICAL REASONING
-import streamlit as st
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
 import numpy as np
 import time
+from market_data_provider import get_market_data
 
 def calculate_rsi(data, window=14):
     """Calculate RSI indicator with fallback tracking"""
@@ -433,227 +432,232 @@ def calculate_us_dynamic_targets(data, current_price):
             }
         }
 
-def get_us_recommendations(min_price=25, max_rsi=65, min_volume=500000, batch_size=60):
-    """ENHANCED: Get US stock recommendations with technical reasoning"""
+def analyze_us_symbol(symbol, min_price, max_rsi, min_volume):
+    """Analyze one symbol; returns (passed_filters, recommendation dict or None)"""
+    passed = False
     
-    try:
-        symbols = get_expanded_sp500_universe()
-        recommendations = []
+    # Fetch data
+    data = get_market_data().history(symbol, period="3mo", interval="1d")
+    
+    if len(data) < 25:
+        return False, None
+    
+    # Calculate indicators with fallback tracking
+    data['RSI'], rsi_is_fallback = calculate_rsi(data)
+    data['EMA21'] = data['Close'].ewm(span=21).mean()
+    data['EMA50'] = data['Close'].ewm(span=50).mean()
+    data['SMA20'] = data['Close'].rolling(20).mean()
+    
+    # Bollinger Bands
+    data['BB_Middle'] = data['Close'].rolling(20).mean()
+    bb_std = data['Close'].rolling(20).std()
+    data['BB_Upper'] = data['BB_Middle'] + (bb_std * 2)
+    data['BB_Lower'] = data['BB_Middle'] - (bb_std * 2)
+    
+    # MACD
+    exp1 = data['Close'].ewm(span=12).mean()
+    exp2 = data['Close'].ewm(span=26).mean()
+    data['MACD'] = exp1 - exp2
+    data['MACD_Signal'] = data['MACD'].ewm(span=9).mean()
+    
+    latest = data.iloc[-1]
+    current_price = latest['Close']
+    rsi = latest['RSI']
+    
+    # Volume handling
+    avg_volume = data['Volume'].tail(10).mean() if 'Volume' in data.columns else min_volume
+    volume_is_fallback = 'Volume' not in data.columns
+    
+    # Apply filters
+    if (current_price >= min_price and 
+        rsi <= max_rsi and
+        not pd.isna(rsi) and 
+        not pd.isna(current_price) and
+        avg_volume >= min_volume * 0.2):
+        
+        passed = True
+        
+        # Analyze technical patterns
+        pattern_analysis = analyze_us_technical_patterns(data, symbol)
+        
+        # Calculate dynamic targets
+        target_data = calculate_us_dynamic_targets(data, current_price)
+        
+        # Technical score calculation
+        technical_score = 0
+        score_components = []
+        
+        # Trend alignment
+        if latest['Close'] > latest['EMA21']:
+            technical_score += 1
+            score_components.append("Above EMA21")
+        if latest['EMA21'] > latest['EMA50']:
+            technical_score += 1
+            score_components.append("EMA Bullish")
+        
+        # RSI conditions
+        if 20 <= rsi <= 65:
+            technical_score += 1
+            score_components.append("Good RSI")
+        
+        # MACD signal
+        if latest['MACD'] > latest['MACD_Signal']:
+            technical_score += 1
+            score_components.append("MACD+")
+        
+        # Bollinger Band position
+        if not pd.isna(latest['BB_Lower']) and not pd.isna(latest['BB_Upper']):
+            bb_position = (latest['Close'] - latest['BB_Lower']) / (latest['BB_Upper'] - latest['BB_Lower'])
+            if 0.1 <= bb_position <= 0.8:
+                technical_score += 1
+                score_components.append("BB Position")
+        else:
+            bb_position = 0.5
         
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        # Volume confirmation
+        if target_data['volume_surge'] and not target_data['fallback_flags'].get('volume', False):
+            technical_score += 1
+            score_components.append("Volume+")
         
-        total_symbols = min(len(symbols), batch_size)
+        # Include stocks with 2+ conditions
+        if technical_score >= 2:
+            
+            # Risk rating
+            if current_price > 200 and target_data['volatility'] < 0.25:
+                risk_rating = 'Low'
+            elif target_data['volatility'] > 0.35:
+                risk_rating = 'High'
+            else:
+                risk_rating = 'Medium'
+            
+            # Sector classification
+            sector = get_stock_sector(symbol)
+            
+            # Create fallback indicators
+            fallback_indicators = []
+            if rsi_is_fallback:
+                fallback_indicators.append("RSI*")
+            if target_data['fallback_flags'].get('volume', False):
+                fallback_indicators.append("Vol*")
+            if target_data['fallback_flags'].get('volatility', False):
+                fallback_indicators.append("Volatility*")
+            if target_data['fallback_flags'].get('complete_fallback', False):
+                fallback_indicators.append("Targets*")
+                
+            fallback_note = " (" + ", ".join(fallback_indicators) + ")" if fallback_indicators else ""
+            
+            return passed, {
+                'Date': datetime.now().strftime('%Y-%m-%d'),
+                'Stock': symbol,
+                'LTP': round(current_price, 2),
+                'RSI': round(rsi, 1),
+                'Target': round(target_data['target'], 2),
+                '% Gain': round(target_data['target_pct'], 1),
+                'Est.Days': target_data['estimated_days'],
+                'Stop Loss': round(target_data['stop_loss'], 2),
+                'SL %': round(target_data['sl_pct'], 1),
+                'Risk:Reward': f"1:{target_data['risk_reward_ratio']}",
+                'Selection Reason': pattern_analysis['all_reasons'],
+                'Primary Pattern': pattern_analysis['primary_reason'],
+                'Pattern Strength': pattern_analysis['pattern_strength'],
+                'Volume': int(avg_volume),
+                'Risk': risk_rating,
+                'Tech Score': f"{technical_score}/6",
+                'Sector': sector,
+                'Volatility': f"{target_data['volatility']:.1%}",
+                'BB Position': f"{bb_position:.2f}",
+                'Data Quality': f"Real Data{fallback_note}" if not fallback_indicators else f"Mixed Data{fallback_note}",
+                'Status': 'Active'
+            }
+    
+    return passed, None
+
+def rank_us_recommendations(recommendations, top_n=20):
+    """Sort candidates the way the final scan table is sorted and keep the top N"""
+    df = pd.DataFrame(recommendations)
+    if not df.empty:
+        df = df.sort_values(['Pattern Strength', 'Tech Score', '% Gain'], ascending=[False, False, False])
+        df = df.head(top_n)
+    return df
+
+def scan_us_stocks(min_price=25, max_rsi=65, min_volume=500000, batch_size=60):
+    """Generator that yields one event per analyzed symbol
+    
+    Events are dicts with 'done', 'total', 'symbol', 'passed' (symbol passed the
+    price/RSI/volume filters) and 'candidate' (recommendation dict or None).
+    A first event with done=0 announces the total before any data is fetched.
+    """
+    symbols = get_expanded_sp500_universe()
+    total_symbols = min(len(symbols), batch_size)
+    
+    yield {'done': 0, 'total': total_symbols, 'symbol': None, 'passed': False, 'candidate': None}
+    
+    for i, symbol in enumerate(symbols[:total_symbols]):
+        try:
+            time.sleep(0.08)
+            passed, candidate = analyze_us_symbol(symbol, min_price, max_rsi, min_volume)
+        except Exception as e:
+            passed, candidate = False, None
+        
+        yield {'done': i + 1, 'total': total_symbols, 'symbol': symbol, 'passed': passed, 'candidate': candidate}
+
+def get_us_recommendations(min_price=25, max_rsi=65, min_volume=500000, batch_size=60, progress_callback=None,
+                           results_callback=None, results_every=10, cancel_event=None):
+    """ENHANCED: Get US stock recommendations with technical reasoning
+
+    progress_callback(fraction, message) is called as the scan advances so
+    callers (dashboard, scan daemon) can render progress their own way.
+    results_callback(top_df) receives the current ranked top 20 every
+    results_every symbols (when new candidates came in) for a live table.
+    Setting cancel_event (a threading.Event) stops the scan before the next
+    symbol is fetched; the candidates found so far are returned.
+    """
+    
+    try:
+        recommendations = []
         successful_fetches = 0
+        total_symbols = 0
+        new_since_update = False
         
-        status_text.text(f"Starting enhanced scan of {total_symbols} US stocks...")
-        
-        for i, symbol in enumerate(symbols[:total_symbols]):
-            try:
-                progress_bar.progress((i + 1) / total_symbols)
-                status_text.text(f"Analyzing {symbol}... ({i+1}/{total_symbols})")
-                
-                time.sleep(0.08)
-                
-                # Fetch data
-                stock = yf.Ticker(symbol)
-                data = stock.history(period="3mo", interval="1d")
-                
-                if len(data) < 25:
-                    continue
-                
-                # Calculate indicators with fallback tracking
-                data['RSI'], rsi_is_fallback = calculate_rsi(data)
-                data['EMA21'] = data['Close'].ewm(span=21).mean()
-                data['EMA50'] = data['Close'].ewm(span=50).mean()
-                data['SMA20'] = data['Close'].rolling(20).mean()
-                
-                # Bollinger Bands
-                data['BB_Middle'] = data['Close'].rolling(20).mean()
-                bb_std = data['Close'].rolling(20).std()
-                data['BB_Upper'] = data['BB_Middle'] + (bb_std * 2)
-                data['BB_Lower'] = data['BB_Middle'] - (bb_std * 2)
-                
-                # MACD
-                exp1 = data['Close'].ewm(span=12).mean()
-                exp2 = data['Close'].ewm(span=26).mean()
-                data['MACD'] = exp1 - exp2
-                data['MACD_Signal'] = data['MACD'].ewm(span=9).mean()
-                
-                latest = data.iloc[-1]
-                current_price = latest['Close']
-                rsi = latest['RSI']
-                
-                # Volume handling
-                avg_volume = data['Volume'].tail(10).mean() if 'Volume' in data.columns else min_volume
-                volume_is_fallback = 'Volume' not in data.columns
-                
-                # Apply filters
-                if (current_price >= min_price and 
-                    rsi <= max_rsi and
-                    not pd.isna(rsi) and 
-                    not pd.isna(current_price) and
-                    avg_volume >= min_volume * 0.2):
-                    
-                    successful_fetches += 1
-                    
-                    # Analyze technical patterns
-                    pattern_analysis = analyze_us_technical_patterns(data, symbol)
-                    
-                    # Calculate dynamic targets
-                    target_data = calculate_us_dynamic_targets(data, current_price)
-                    
-                    # Technical score calculation
-                    technical_score = 0
-                    score_components = []
-                    
-                    # Trend alignment
-                    if latest['Close'] > latest['EMA21']:
-                        technical_score += 1
-                        score_components.append("Above EMA21")
-                    if latest['EMA21'] > latest['EMA50']:
-                        technical_score += 1
-                        score_components.append("EMA Bullish")
-                    
-                    # RSI conditions
-                    if 20 <= rsi <= 65:
-                        technical_score += 1
-                        score_components.append("Good RSI")
-                    
-                    # MACD signal
-                    if latest['MACD'] > latest['MACD_Signal']:
-                        technical_score += 1
-                        score_components.append("MACD+")
-                    
-                    # Bollinger Band position
-                    if not pd.isna(latest['BB_Lower']) and not pd.isna(latest['BB_Upper']):
-                        bb_position = (latest['Close'] - latest['BB_Lower']) / (latest['BB_Upper'] - latest['BB_Lower'])
-                        if 0.1 <= bb_position <= 0.8:
-                            technical_score += 1
-                            score_components.append("BB Position")
-                    else:
-                        bb_position = 0.5
-                    
-                    # Volume confirmation
-                    if target_data['volume_surge'] and not target_data['fallback_flags'].get('volume', False):
-                        technical_score += 1
-                        score_components.append("Volume+")
-                    
-                    # Include stocks with 2+ conditions
-                    if technical_score >= 2:
-                        
-                        # Risk rating
-                        if current_price > 200 and target_data['volatility'] < 0.25:
-                            risk_rating = 'Low'
-                        elif target_data['volatility'] > 0.35:
-                            risk_rating = 'High'
-                        else:
-                            risk_rating = 'Medium'
-                        
-                        # Sector classification
-                        sector = get_stock_sector(symbol)
-                        
-                        # Create fallback indicators
-                        fallback_indicators = []
-                        if rsi_is_fallback:
-                            fallback_indicators.append("RSI*")
-                        if target_data['fallback_flags'].get('volume', False):
-                            fallback_indicators.append("Vol*")
-                        if target_data['fallback_flags'].get('volatility', False):
-                            fallback_indicators.append("Volatility*")
-                        if target_data['fallback_flags'].get('complete_fallback', False):
-                            fallback_indicators.append("Targets*")
-                            
-                        fallback_note = " (" + ", ".join(fallback_indicators) + ")" if fallback_indicators else ""
-                        
-                        recommendations.append({
-                            'Date': datetime.now().strftime('%Y-%m-%d'),
-                            'Stock': symbol,
-                            'LTP': round(current_price, 2),
-                            'RSI': round(rsi, 1),
-                            'Target': round(target_data['target'], 2),
-                            '% Gain': round(target_data['target_pct'], 1),
-                            'Est.Days': target_data['estimated_days'],
-                            'Stop Loss': round(target_data['stop_loss'], 2),
-                            'SL %': round(target_data['sl_pct'], 1),
-                            'Risk:Reward': f"1:{target_data['risk_reward_ratio']}",
-                            'Selection Reason': pattern_analysis['all_reasons'],
-                            'Primary Pattern': pattern_analysis['primary_reason'],
-                            'Pattern Strength': pattern_analysis['pattern_strength'],
-                            'Volume': int(avg_volume),
-                            'Risk': risk_rating,
-                            'Tech Score': f"{technical_score}/6",
-                            'Sector': sector,
-                            'Volatility': f"{target_data['volatility']:.1%}",
-                            'BB Position': f"{bb_position:.2f}",
-                            'Data Quality': f"Real Data{fallback_note}" if not fallback_indicators else f"Mixed Data{fallback_note}",
-                            'Status': 'Active'
-                        })
+        for event in scan_us_stocks(min_price, max_rsi, min_volume, batch_size):
+            total_symbols = event['total']
             
-            except Exception as e:
+            if event['symbol'] is None:
+                if progress_callback:
+                    progress_callback(0.0, f"Starting enhanced scan of {total_symbols} US stocks...")
                 continue
+            
+            if event['passed']:
+                successful_fetches += 1
+            if event['candidate'] is not None:
+                recommendations.append(event['candidate'])
+                new_since_update = True
+            
+            if progress_callback:
+                progress_callback(event['done'] / total_symbols, f"Analyzing {event['symbol']}... ({event['done']}/{total_symbols})")
+            
+            if results_callback and new_since_update and (event['done'] % results_every == 0 or event['done'] == total_symbols):
+                results_callback(rank_us_recommendations(recommendations))
+                new_since_update = False
+            
+            if cancel_event is not None and cancel_event.is_set():
+                if progress_callback:
+                    progress_callback(event['done'] / total_symbols, f"⏹️ Scan cancelled after {event['done']} of {total_symbols} symbols")
+                return rank_us_recommendations(recommendations)
         
-        progress_bar.empty()
-        status_text.empty()
-        
-        # Display scan statistics
+        # Report scan statistics
         if successful_fetches > 0:
-            st.info(f"✅ Successfully analyzed {successful_fetches} US stocks out of {total_symbols} attempted")
+            scan_summary = f"✅ Successfully analyzed {successful_fetches} US stocks out of {total_symbols} attempted"
         else:
-            st.warning(f"⚠️ Could not fetch data for any US stocks. This might be due to market hours or API limits.")
+            scan_summary = f"⚠️ Could not fetch data for any US stocks. This might be due to market hours or API limits."
         
-        # Sort by pattern strength and technical score
-        df = pd.DataFrame(recommendations)
-        if not df.empty:
-            df = df.sort_values(['Pattern Strength', 'Tech Score', '% Gain'], ascending=[False, False, False])
-            df = df.head(20)
+        if progress_callback:
+            progress_callback(1.0, scan_summary)
         
-        return df
+        return rank_us_recommendations(recommendations)
         
     except Exception as e:
-        st.error(f"Error in get_us_recommendations: {str(e)}")
+        print(f"Error in get_us_recommendations: {str(e)}")
+        if progress_callback:
+            progress_callback(1.0, f"❌ Error in get_us_recommendations: {str(e)}")
         return pd.DataFrame()
-
-def get_us_market_overview():
-    """Get US market overview with error handling"""
-    try:
-        # Fetch major US indices
-        spy = yf.download("SPY", period="1d", interval="5m")
-        qqq = yf.download("QQQ", period="1d", interval="5m")
-        
-        overview = {}
-        
-        if not spy.empty:
-            spy_close = spy['Close'].iloc[-1]
-            spy_open = spy['Open'].iloc[0]
-            spy_change = spy_close - spy_open
-            spy_pct = (spy_change / spy_open) * 100
-            
-            overview['sp500'] = {
-                'price': round(spy_close, 2),
-                'change': round(spy_change, 2),
-                'change_pct': round(spy_pct, 2)
-            }
-        
-        if not qqq.empty:
-            qqq_close = qqq['Close'].iloc[-1]
-            qqq_open = qqq['Open'].iloc[0]
-            qqq_change = qqq_close - qqq_open
-            qqq_pct = (qqq_change / qqq_open) * 100
-            
-            overview['nasdaq'] = {
-                'price': round(qqq_close, 2),
-                'change': round(qqq_change, 2),
-                'change_pct': round(qqq_pct, 2)
-            }
-        
-        overview['last_updated'] = datetime.now().strftime('%H:%M:%S')
-        return overview
-        
-    except Exception as e:
-        return {
-            'sp500': {'price': 450, 'change': 0, 'change_pct': 0},
-            'nasdaq': {'price': 380, 'change': 0, 'change_pct': 0},
-            'last_updated': 'Market data unavailable*',
-            'error': str(e)
-        }